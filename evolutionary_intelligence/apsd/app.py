@@ -4,11 +4,13 @@ import array
 import math
 import logging
 import time
+import numpy
 
 from threading import Thread
 from sensor_area import SensorArea
 from sensor import Sensor
 from config import Config
+from renderer import Renderer
 from clustering.kmeans import KMeans
 from clustering.fcmeans import FCMeans
 import map_handler
@@ -90,6 +92,7 @@ class Controller:
         self.cfg = Config(width=width, height=height, radius=radius)
         self.sa = SensorArea(self.cfg)
         self.background = None
+        self.renderer = None
         self.selectedGrid = -1
 
     def reset_text_entries(self):
@@ -145,14 +148,24 @@ class Controller:
                 loc = self.txtLocationSearch.get_text()
                 zoom = int(self.txtZoomLevel.get_text())
 
-            imgSize = (self.cfg.width, self.cfg.height + self.cfg.gMapCrop)
-
-            googleMap = map_handler.get_google_map(imgDir=self.cfg.imgDir, center=loc, zoom=zoom, imgSize=imgSize)
+            googleMap = self.fetch_map(loc, zoom)
             self.load_image(googleMap, self.cfg.gMapCrop)
 
         except ValueError as e:
             print "ValueError:", e
 
+    def fetch_map(self, loc="", zoom=15):
+        """
+        retrieving map image data of the location (map is higher than the sensor area for cropping the logo)
+
+        :return
+            map image data (string)
+        """
+
+        imgSize = (self.cfg.width, self.cfg.height + self.cfg.gMapCrop)
+
+        return map_handler.get_google_map(imgDir=self.cfg.imgDir, center=loc, zoom=zoom, imgSize=imgSize)
+
     def import_image(self, widget):
         """
         import map manually
@@ -160,13 +173,14 @@ class Controller:
         imgDir = self.fileImportImage.get_filename()
         self.load_image(imgDir, self.cfg.gMapCrop)
 
-    def load_image(self, imgDir, crop=0):
+    def load_image(self, imgDir, crop=0, gridFeatures=None):
         """
         loading map which searched on google map or import manual for Drawing Area and Sensor Area object
 
         :param
-            imgDir (string) - saved image location
-            crop (int)      - cut google logo from map
+            imgDir (string)      - saved image location
+            crop (int)           - cut google logo from map
+            gridFeatures (array) - cached color features of the grids (None: calculating them)
 
         :return
             imageFile - loaded image file for Sensor Area object
@@ -176,7 +190,7 @@ class Controller:
         imageFile, imgd = image_handler.load_image(imgDir, self.cfg.width, self.cfg.height, crop)
 
         if imageFile and imgd:
-            self.sa.import_satellite_image(imageFile)
+            self.sa.import_satellite_image(imageFile, gridFeatures)
 
             a = array.array('B', imgd)
             self.background = cairo.ImageSurface.create_for_data(a, cairo.FORMAT_ARGB32, self.cfg.width, self.cfg.height)
@@ -279,20 +293,51 @@ class Controller:
         """
 
         if (clusterCnt > 0) and (len(self.sa.grids) > clusterCnt):
-            self.cfg.clusterCnt = clusterCnt
-            self.cfg.clusterPriorities = [0 for i in range(clusterCnt)]
-
-            inp = [grid.colorAvg + grid.colorStdDev for grid in self.sa.grids]
+            inp = self.sa.grid_features()
             clusters = self.cfg.clusteringMethod.cluster(inp, clusterCnt)
 
-            for i, grid in enumerate(self.sa.grids):
-                grid.clusterNum = clusters[i]
+            self.set_clusters(clusterCnt, clusters)
 
             return clusters
 
         else:
             raise ValueError("Invalid range for cluster count value")
 
+    def set_clusters(self, clusterCnt, clusters):
+        """
+        setting cluster numbers of the grids, cluster priorities and the cluster lookup table
+        """
+
+        self.cfg.clusterCnt = clusterCnt
+        self.cfg.clusterPriorities = [0 for i in range(clusterCnt)]
+        self.cfg.clusterLookup = None
+
+        for i, grid in enumerate(self.sa.grids):
+            grid.clusterNum = clusters[i]
+
+        self.sa.precompute_cluster_lookup()
+
+    def restore_clustering(self, clusteringMethod, clustering):
+        """
+        using cached clustering result (SensorArea.export_clustering) instead of clustering the grids again
+
+        :param
+            clusteringMethod (Cluster) - clustering method which found the result
+            clustering (dict)          - cluster centers and cluster number of each grid
+        """
+
+        labels = clustering["labels"]
+
+        if len(labels) != len(self.sa.grids):
+            raise ValueError("Cached clusters are different from sensor area grids")
+
+        clusteringMethod.clusterCenters = numpy.array(clustering["centers"], dtype=float)
+        self.cfg.clusteringMethod = clusteringMethod
+
+        self.set_clusters(len(clusteringMethod.clusterCenters), labels)
+
+        self.draw_again()
+
     def clustering_get_cnt(self, clusterCnt):
         try:
             if self.gui:
@@ -303,11 +348,14 @@ class Controller:
         except ValueError as e:
             print "ValueError:", e
 
-    def run_kmeans(self, clusterCnt=3):
+    def run_kmeans(self, clusterCnt=3, seed=None):
         """
         clustering with K-Means algorithm
+
+        :param
+            seed (int) - seed of the initial clusters (None: random)
         """
-        self.cfg.clusteringMethod = KMeans()
+        self.cfg.clusteringMethod = KMeans(seed)
         self.clustering_get_cnt(clusterCnt)
 
         self.draw_again()
@@ -359,13 +407,30 @@ class Controller:
         deploymentMethods = [self.sa.random_deployment]
         self.deployment(deploymentMethods, sensorCnt)
 
-    def deploy_simulated_annealing(self, sensorCnt=75):
+    def deploy_simulated_annealing(self, sensorCnt=75, chainCnt=None):
         """
         call simulated annealing optimization method with priority queue deployment
+
+        :param
+            chainCnt (int) - parallel simulated annealing chain count (default: Config.saChainCnt)
         """
 
-        # deploymentMethods = [self.sa.pq_deployment], self.sa.simulated_annealing]
-        deploymentMethods = [self.sa.genetic_algorithms] # , self.sa.simulated_annealing]
+        if chainCnt is not None:
+            self.cfg.saChainCnt = chainCnt
+
+        if self.cfg.saChainCnt > 1:
+            deploymentMethods = [self.sa.pq_deployment, self.sa.parallel_simulated_annealing]
+        else:
+            deploymentMethods = [self.sa.pq_deployment, self.sa.simulated_annealing]
+
+        self.deployment(deploymentMethods, sensorCnt)
+
+    def deploy_genetic_algorithms(self, sensorCnt=75):
+        """
+        call genetic algorithms deployment method
+        """
+
+        deploymentMethods = [self.sa.genetic_algorithms]
         self.deployment(deploymentMethods, sensorCnt)
 
     def start_deployment(self, deploymentMethods, sensorCnt):
@@ -412,7 +477,7 @@ class Controller:
                 sensor = Sensor(self.cfg.sensorCnt, event.x, event.y)
                 sensor.priority, c = self.sa.cover_and_priority(sensor.xPos, sensor.yPos, sensor.sensorId)
 
-                self.sa.sensors.append(sensor)
+                self.sa.add_sensor(sensor)
                 self.cfg.sensorCnt += 1
 
         self.draw_again()
@@ -439,6 +504,8 @@ class Controller:
         """
         method which is triggered by subject
         it is used for observing the subject (sensor_area)
+
+        messages come in batches (at most Config.notificationRate in a second), so screen is drawn once for a batch
         """
 
         if message:
@@ -448,102 +515,22 @@ class Controller:
     def draw(self, sensors):
         """
         drawing map, grids, clusters, and sensors to sensor area
-        """
-
-        width = self.cfg.width
-        height = self.cfg.height
-        radius = self.cfg.radius
-        gridEdge = self.cfg.gridEdge
-
-        cr = self.cr
-
-        def draw_background():
-            if self.background:
-                cr.set_source_surface(self.background, 0, 0)
-                cr.paint_with_alpha(1.0)  # transparent paint
-
-        def draw_grids():
-            cr.set_source_rgb(0.0, 0.0, 0.0)
-            cr.set_line_width(0.3)
-
-            for i in range(gridEdge, height, gridEdge):
-                cr.move_to(0, i)
-                cr.line_to(width, i)
-                cr.stroke()
-
-            for i in range(gridEdge, width, gridEdge):
-                cr.move_to(i, 0)
-                cr.line_to(i, height)
-                cr.stroke()
-
-        def draw_clusters():
-            cr.save()
-
-            for g in self.sa.grids:
-                if len(self.cfg.clusterPriorities) > 0:
-                    color = self.colors[g.clusterNum]
-                    cr.set_source_rgb(color[0], color[1], color[2])
 
-                    cr.select_font_face("Georgia", cairo.FONT_SLANT_NORMAL, cairo.FONT_WEIGHT_BOLD)
-
-                    cr.set_font_size(radius)
-                    cnXBearing, cnYBearing, cnWidth, cnHeight = cr.text_extents(str(g.clusterNum))[:4]
-                    cr.move_to(g.xPos - cnWidth/2 - cnXBearing, g.yPos - cnHeight/2 - cnYBearing)
-
-                    cr.show_text(str(g.clusterNum))
-                    cr.stroke()
-
-                    cr.set_font_size(radius/1.8)
-                    pvXBearing, pvYBearing, pvWidth, pvHeight = cr.text_extents(str(round(g.priority, 2)))[:4]
-                    cr.move_to(g.xPos - pvWidth/2 - pvXBearing, g.yPos - cnHeight/2 - (pvHeight * 1.5) - pvYBearing)
-
-                    cr.show_text(str(round(g.priority, 2)))
-                    cr.stroke()
-
-            cr.restore()
-
-        def draw_selected_grid():
-            if self.selectedGrid > 0:
-                cr.set_source_rgb(1.0, 0.0, 0.0)
-                cr.set_line_width(2.0)
-
-                xPos = self.sa.grids[self.selectedGrid].xPos
-                yPos = self.sa.grids[self.selectedGrid].yPos
-
-                cr.rectangle(xPos - radius,  yPos - radius, gridEdge, gridEdge)
-                cr.stroke()
-
-                self.lblPriority.set_text('Priority (' + str(self.selectedGrid) + '):')
-            else:
-                self.lblPriority.set_text('Priority ():')
-
-        def draw_sensors():
-            cr.set_source_rgb(1.0, 1.0, 1.0)
-            cr.set_line_width(1.4)
-
-            for s in sensors:
-                cr.arc(s.xPos, s.yPos, radius, 0, self.pi2)
-                cr.stroke()
-
-                cr.set_font_size(radius / 2.5)
-                cnXBearing, cnYBearing, cnWidth, cnHeight = cr.text_extents(str(s.sensorId))[:4]
-                cr.move_to(s.xPos - cnWidth/2 - cnXBearing, s.yPos - cnHeight/2 - cnYBearing)
+        map with grids and clusters are cached layers of the renderer (they are drawn again when the image, radius
+        or clusters are changed), only the changed sensors are drawn again to the sensor layer
+        """
 
-                cr.show_text(str(s.sensorId))
-                cr.stroke()
+        if self.renderer is None:
+            self.renderer = Renderer(self.cfg.width, self.cfg.height, self.cfg.radius, self.cfg.gridEdge, self.colors)
 
-                cr.set_font_size(radius / 2.5)
-                pvXBearing, pvYBearing, pvWidth, pvHeight = cr.text_extents(str(round(s.priority, 2)))[:4]
-                cr.move_to(s.xPos - pvWidth/2 - pvXBearing, s.yPos + cnHeight/2 + pvHeight/2 - pvYBearing)
+        selectedGrid = self.sa.grids[self.selectedGrid] if self.selectedGrid > 0 else None
 
-                cr.show_text(str(round(s.priority, 2)))
-                cr.stroke()
+        self.renderer.render(self.cr, self.background, self.sa.grids, self.cfg.clusterPriorities, sensors, selectedGrid)
 
-        draw_background()
-        draw_grids()
-        draw_clusters()
-        draw_selected_grid()
-        draw_sensors()
+        if selectedGrid is not None:
+            self.lblPriority.set_text('Priority (' + str(self.selectedGrid) + '):')
+        else:
+            self.lblPriority.set_text('Priority ():')
 
     def on_window1_destroy(self, widget):
         self.exit(widget)
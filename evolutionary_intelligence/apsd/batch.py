@@ -0,0 +1,401 @@
+"""
+headless batch deployment with parameter sweeps
+
+every combination of radius, cluster count, cluster priorities, sensor count, method and seed is one run,
+runs are done in a process pool and each of them writes one result row (csv or json)
+
+grids are clustered once for each (radius, cluster count) in the main process with the first seed,
+so all runs of the same configuration use the same clusters
+
+usage:
+    python batch.py images/google_map.png --radius 33 --cluster-count 3 --priorities 1,0.5,0 \
+        --sensor-count 50 75 --methods pq random sa ga --seeds 0 1 2 --output results.csv
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+import numpy
+
+import image_handler
+import instrument
+from config import Config
+from sensor_area import SensorArea
+from clustering.kmeans import KMeans
+from clustering.fcmeans import FCMeans
+
+clusteringMethods = {"kmeans": KMeans, "fcmeans": FCMeans}
+
+deploymentMethods = ("pq", "random", "sa", "ga")
+
+resultFields = ("runId", "image", "width", "height", "radius", "clusterCnt", "clusterPriorities", "sensorCnt",
+                "method", "seed", "coverageEngine", "objective", "totalPriority", "componentCnt", "deployedCnt",
+                "iterationCnt", "wallTime", "error")
+
+# image and clusters of the worker process
+batchImage = None
+batchClusters = None
+batchSettings = None
+
+
+def seed_all(seed):
+    random.seed(seed)
+    numpy.random.seed(seed)
+
+
+def create_area(settings, imageFile, radius, clusterCnt, sensorCnt=75):
+    """
+    creating sensor area of the batch image
+    """
+
+    cfg = Config(settings["width"], settings["height"], radius, sensorCnt=sensorCnt, clusterCnt=clusterCnt,
+                 coverageEngine=settings["coverageEngine"])
+
+    # parallelism is between the runs, worker processes can not have their own pools
+    cfg.gaProcessCnt = 1
+    cfg.saChainCnt = 1
+
+    sa = SensorArea(cfg)
+    sa.import_satellite_image(imageFile)
+
+    return sa
+
+
+def cluster_grids(settings, imageFile, radius, clusterCnt, seed):
+    """
+    clustering grids of the sensor area (same steps with Controller.clustering)
+
+    :return
+        clustering method (with cluster centers) and cluster number of each grid
+    """
+
+    sa = create_area(settings, imageFile, radius, clusterCnt)
+
+    if not 0 < clusterCnt < len(sa.grids):
+        raise ValueError("Invalid range for cluster count value")
+
+    seed_all(seed)
+
+    method = clusteringMethods[settings["clustering"]]()
+    clusters = method.cluster(sa.grid_features(), clusterCnt)
+
+    return method, numpy.asarray(clusters, dtype=numpy.int64)
+
+
+def set_cluster_priorities(sa, clusterNums, priorities):
+    """
+    setting cluster numbers and priorities of the grids (same rule with Controller.set_priority)
+    """
+
+    cfg = sa.cfg
+    cfg.clusterPriorities = list(priorities)
+
+    grids = sa.grids
+    grids.column("clusterNum")[:] = clusterNums
+    grids.column("priority")[:] = numpy.asarray(priorities)[clusterNums] * grids.column("sizeRatio")
+
+
+def init_worker(settings, clusters):
+    """
+    loading image and clusters of the worker process
+
+    :param
+        settings (dict) - image, size, crop, coverage engine and clustering settings
+        clusters (dict) - (clustering method, grid cluster numbers) by (radius, cluster count)
+    """
+
+    global batchImage, batchClusters, batchSettings
+
+    batchSettings = settings
+    batchImage = image_handler.open_image(settings["image"], settings["width"], settings["height"], settings["crop"])
+    batchClusters = clusters
+
+
+def deploy(sa, method):
+    """
+    running deployment method
+
+    :return
+        objective value of the method (sa: total priority / connected component count)
+    """
+
+    if method == "pq":
+        return sa.pq_deployment()
+    elif method == "random":
+        return sa.random_deployment()
+    elif method == "sa":
+        sa.pq_deployment()
+        return sa.simulated_annealing()
+    elif method == "ga":
+        return sa.genetic_algorithms()
+
+    raise ValueError("Invalid deployment method: " + str(method))
+
+
+def profile_run(sa, job, profileDir):
+    """
+    running deployment with instrumentation counters and sampling profiler,
+    they are written to the profile directory as run_<run id>.json
+
+    :return
+        objective value of the method
+    """
+
+    instrument.reset()
+    instrument.enable()
+
+    try:
+        objective, report = instrument.profile_call(deploy, sa, job["method"])
+    finally:
+        instrument.disable()
+
+    instrument.write_json({"run": job, "instrumentation": instrument.snapshot(), "profile": report},
+                          os.path.join(profileDir, "run_{0}.json".format(job["runId"])))
+
+    return objective
+
+
+def count_components(sa):
+    """
+    connected component count of the deployed sensors (connections are found again)
+    """
+
+    for sensor in sa.sensors:
+        sensor.connected = []
+
+    sa.find_connected_component()
+
+    return sa.calc_connected_component()
+
+
+def run(job):
+    """
+    one deployment run in the worker process
+
+    :param
+        job (dict) - run id, radius, cluster count, cluster priorities, sensor count, method and seed
+
+    :return
+        row (dict) - result row (error is set if the run fails)
+    """
+
+    settings = batchSettings
+    row = dict((field, None) for field in resultFields)
+    row.update(job)
+    row.update(image=settings["image"], width=settings["width"], height=settings["height"],
+               coverageEngine=settings["coverageEngine"])
+
+    startTime = time.time()
+    stdout = sys.stdout
+
+    if not settings["verbose"]:
+        sys.stdout = open(os.devnull, "w")
+
+    try:
+        method, clusterNums = batchClusters[(job["radius"], job["clusterCnt"])]
+
+        sa = create_area(settings, batchImage, job["radius"], job["clusterCnt"], job["sensorCnt"])
+        sa.cfg.clusteringMethod = method
+        set_cluster_priorities(sa, clusterNums, job["clusterPriorities"])
+        sa.precompute_cluster_lookup()
+
+        seed_all(job["seed"])
+
+        if settings["profileDir"]:
+            row["objective"] = profile_run(sa, job, settings["profileDir"])
+        else:
+            row["objective"] = deploy(sa, job["method"])
+
+        row["totalPriority"] = sum([sensor.priority for sensor in sa.sensors])
+        row["componentCnt"] = count_components(sa)
+        row["deployedCnt"] = len(sa.sensors)
+        row["iterationCnt"] = sa.iterationCnt
+
+    except Exception as e:
+        row["error"] = type(e).__name__ + ": " + str(e)
+
+    finally:
+        if sys.stdout is not stdout:
+            sys.stdout.close()
+            sys.stdout = stdout
+
+    row["wallTime"] = round(time.time() - startTime, 4)
+
+    return row
+
+
+def create_jobs(args):
+    """
+    cartesian product of the sweep parameters
+    """
+
+    jobs = []
+    sweep = itertools.product(args.radius, args.cluster_count, args.priorities, args.sensor_count, args.methods,
+                              args.seeds)
+
+    for radius, clusterCnt, priorities, sensorCnt, method, seed in sweep:
+        if len(priorities) != clusterCnt:
+            continue
+
+        jobs.append({"runId": len(jobs), "radius": radius, "clusterCnt": clusterCnt, "clusterPriorities": priorities,
+                     "sensorCnt": sensorCnt, "method": method, "seed": seed})
+
+    return jobs
+
+
+def write_results(rows, outputFile, outputFormat):
+    if outputFormat == "json":
+        with open(outputFile, "w") as f:
+            json.dump(rows, f, indent=2)
+    else:
+        with open(outputFile, "wb") as f:
+            writer = csv.DictWriter(f, resultFields)
+            writer.writeheader()
+
+            for row in rows:
+                row = dict(row, clusterPriorities=";".join(str(p) for p in row["clusterPriorities"]))
+                writer.writerow(row)
+
+
+def summarize(rows):
+    """
+    average objective of each configuration (runs with different seeds)
+    """
+
+    groups = {}
+
+    for row in rows:
+        if row["error"] is None:
+            key = (row["radius"], row["clusterCnt"], tuple(row["clusterPriorities"]), row["sensorCnt"], row["method"])
+            groups.setdefault(key, []).append(row["objective"])
+
+    for key in sorted(groups):
+        values = groups[key]
+        print "radius = {0} clusters = {1} priorities = {2} sensors = {3} {4}: {5} ({6} runs)".format(
+            key[0], key[1], ",".join(str(p) for p in key[2]), key[3], key[4], sum(values) / len(values), len(values))
+
+
+def parse_priorities(value):
+    try:
+        priorities = [float(p) for p in value.split(",")]
+    except ValueError:
+        raise argparse.ArgumentTypeError("Invalid cluster priorities: " + value)
+
+    if any(p < 0 for p in priorities):
+        raise argparse.ArgumentTypeError("Invalid range for priority value")
+
+    return priorities
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="headless sensor deployment sweep")
+
+    parser.add_argument("image", help="satellite image file")
+    parser.add_argument("--width", type=int, default=640, help="sensor area width")
+    parser.add_argument("--height", type=int, default=480, help="sensor area height")
+    parser.add_argument("--crop", type=int, default=0, help="pixel size to cut google logo from the image")
+
+    parser.add_argument("--radius", type=int, nargs="+", default=[33], help="sensor radius values")
+    parser.add_argument("--cluster-count", type=int, nargs="+", default=[3], help="cluster count values")
+    parser.add_argument("--priorities", type=parse_priorities, nargs="+", required=True,
+                        help="comma separated cluster priorities, e.g. 1,0.5,0 (one value for each cluster, "
+                             "they are skipped for other cluster counts)")
+    parser.add_argument("--sensor-count", type=int, nargs="+", default=[75], help="sensor count values")
+    parser.add_argument("--methods", nargs="+", choices=deploymentMethods, default=["pq"], help="deployment methods")
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0], help="random seeds")
+
+    parser.add_argument("--clustering", choices=sorted(clusteringMethods), default="kmeans")
+    parser.add_argument("--coverage-engine", default="numpy", help="coverage engine (list, numpy, integral ...)")
+    parser.add_argument("--processes", type=int, default=None, help="worker process count (default: cpu count)")
+
+    parser.add_argument("--output", default="results.csv", help="result file")
+    parser.add_argument("--format", choices=("csv", "json"), default=None, help="result format (default: extension)")
+    parser.add_argument("--verbose", action="store_true", help="show output of the deployment methods")
+    parser.add_argument("--profile-dir", default=None,
+                        help="directory for instrumentation counters and sampling profiles of each run")
+
+    args = parser.parse_args(argv)
+
+    if args.format is None:
+        args.format = "json" if args.output.endswith(".json") else "csv"
+
+    if args.processes is not None and args.processes < 1:
+        parser.error("Invalid range for process count value")
+
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    settings = {"image": args.image, "width": args.width, "height": args.height, "crop": args.crop,
+                "coverageEngine": args.coverage_engine, "clustering": args.clustering, "verbose": args.verbose,
+                "profileDir": args.profile_dir}
+
+    if args.profile_dir and not os.path.isdir(args.profile_dir):
+        os.makedirs(args.profile_dir)
+
+    jobs = create_jobs(args)
+
+    if not jobs:
+        raise ValueError("No run: cluster priorities should have one value for each cluster")
+
+    imageFile = image_handler.open_image(args.image, args.width, args.height, args.crop)
+    clusters = {}
+
+    for job in jobs:
+        key = (job["radius"], job["clusterCnt"])
+
+        if key not in clusters:
+            clusters[key] = cluster_grids(settings, imageFile, job["radius"], job["clusterCnt"], args.seeds[0])
+
+    processCnt = args.processes or multiprocessing.cpu_count()
+    processCnt = min(processCnt, len(jobs))
+
+    print "{0} runs, {1} processes".format(len(jobs), processCnt)
+
+    rows = []
+    startTime = time.time()
+
+    if processCnt > 1:
+        pool = multiprocessing.Pool(processCnt, init_worker, (settings, clusters))
+        results = pool.imap(run, jobs)
+    else:
+        pool = None
+        init_worker(settings, clusters)
+        results = (run(job) for job in jobs)
+
+    try:
+        for row in results:
+            rows.append(row)
+
+            print "[{0}/{1}] {2} sensors = {3} seed = {4}: {5} ({6} sec.)".format(
+                len(rows), len(jobs), row["method"], row["sensorCnt"], row["seed"],
+                row["error"] or row["objective"], row["wallTime"])
+
+        if pool is not None:
+            pool.close()
+            pool.join()
+    except:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+        raise
+
+    write_results(rows, args.output, args.format)
+
+    print "Total: {0} sec., results: {1}".format(round(time.time() - startTime, 2), args.output)
+    summarize(rows)
+
+    return rows
+
+
+if __name__ == "__main__":
+    main()
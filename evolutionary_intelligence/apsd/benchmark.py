@@ -0,0 +1,372 @@
+"""
+benchmark suite for deployment methods and their kernels
+
+synthetic satellite-like images (water, vegetation, urban and bare land regions with texture noise) are generated
+with fixed seeds in several sizes, grids are clustered with the reference land colors and fixed cluster priorities,
+so every run measures the same deployment
+
+each benchmark has warmup runs and timed repetitions, results are written as json and compared with a stored
+baseline (a benchmark fails if its median time is slower than baseline median * (1 + threshold))
+
+usage:
+    python benchmark.py --sizes small medium --output results.json --save-baseline baseline.json
+    python benchmark.py --sizes small medium --baseline baseline.json --threshold 0.25
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import timeit
+
+import numpy
+from PIL import Image
+
+from config import Config
+from sensor_area import SensorArea
+from clustering.cluster import Cluster
+
+imageSizes = {"small": (320, 240), "medium": (640, 480), "large": (1280, 960)}
+
+# land classes: (name, rgb color, texture noise, cluster priority)
+landClasses = [("water", (38, 64, 104), 6, 0.0),
+               ("vegetation", (72, 108, 58), 18, 1.0),
+               ("urban", (148, 140, 132), 32, 0.5),
+               ("bare", (172, 150, 112), 14, 0.2)]
+
+deploymentBenchmarks = ("pq_deployment", "random_deployment", "simulated_annealing", "genetic_algorithms")
+kernelBenchmarks = ("calc_priority", "cover_and_priority", "calc_connected_component", "clustering")
+
+
+class ReferenceClusters(Cluster):
+    """
+    clusters which have the colors of the land classes as centers (same clusters for every run)
+    """
+
+    def __init__(self):
+        Cluster.__init__(self)
+
+        self.clusterCenters = numpy.array([list(color) + [noise] * 3 for name, color, noise, p in landClasses],
+                                          dtype=float)
+
+
+def make_image(width, height, seed=0):
+    """
+    synthetic satellite-like image: smooth land class regions with texture noise
+
+    :return
+        rgb image (PIL)
+    """
+
+    rs = numpy.random.RandomState(seed)
+
+    # land class of each 16 x 16 block from a smoothed random field
+    field = rs.random_sample((height // 16 + 3, width // 16 + 3))
+    field = (field[:-2, :-2] + field[1:-1, 1:-1] + field[2:, 2:] + field[2:, :-2] + field[:-2, 2:]) / 5.0
+    classes = numpy.digitize(field, numpy.percentile(field, [20, 55, 80]))
+
+    blocks = numpy.kron(classes, numpy.ones((16, 16), dtype=classes.dtype))[:height, :width]
+
+    colors = numpy.array([color for name, color, noise, p in landClasses], dtype=float)
+    noises = numpy.array([noise for name, color, noise, p in landClasses], dtype=float)
+
+    pixels = colors[blocks] + rs.standard_normal((height, width, 3)) * noises[blocks][:, :, None]
+
+    return Image.fromarray(pixels.clip(0, 255).astype(numpy.uint8), "RGB")
+
+
+def create_area(size, radius, sensorCnt, coverageEngine, seed=0):
+    """
+    creating sensor area of the benchmark image with the reference clusters and fixed priorities
+    """
+
+    width, height = imageSizes[size]
+
+    cfg = Config(width, height, radius, sensorCnt=sensorCnt, clusterCnt=len(landClasses),
+                 coverageEngine=coverageEngine)
+    cfg.gaProcessCnt = 1
+    cfg.clusteringMethod = ReferenceClusters()
+    cfg.clusterPriorities = [priority for name, color, noise, priority in landClasses]
+
+    sa = SensorArea(cfg)
+    sa.import_satellite_image(make_image(width, height, seed))
+
+    for grid in sa.grids:
+        grid.priority, grid.clusterNum = sa.find_cluster_and_priority(list(grid.colorAvg), list(grid.colorStdDev),
+                                                                      grid.sizeRatio)
+
+    sa.precompute_cluster_lookup()
+
+    return sa
+
+
+def measure(func, warmup=1, repetitions=5, setup=None):
+    """
+    timing func after warmup runs (setup is called before each run and it is not timed)
+
+    :return
+        result (dict) - times and their statistics in seconds, value of the last run
+    """
+
+    times = []
+    value = None
+
+    for i in range(warmup + repetitions):
+        if setup is not None:
+            setup()
+
+        startTime = timeit.default_timer()
+        value = func()
+        elapsed = timeit.default_timer() - startTime
+
+        if i >= warmup:
+            times.append(elapsed)
+
+    return {"times": times, "min": min(times), "median": float(numpy.median(times)), "mean": float(numpy.mean(times)),
+            "std": float(numpy.std(times)), "value": value}
+
+
+def deployment_benchmark(sa, name, seed):
+    """
+    deployment method with the same random seed for every run
+
+    :return
+        (func, setup) of the benchmark
+    """
+
+    def setup():
+        random.seed(seed)
+        numpy.random.seed(seed)
+
+    if name == "simulated_annealing":
+        def func():
+            sa.pq_deployment()
+            return sa.simulated_annealing()
+    else:
+        func = getattr(sa, name)
+
+    return func, setup
+
+
+def kernel_benchmark(sa, name, seed, clustering):
+    """
+    kernel functions on the candidate sensor locations (grid centers)
+
+    :return
+        (func, setup) of the benchmark
+    """
+
+    positions = [(grid.xPos, grid.yPos) for grid in sa.grids]
+
+    if name == "calc_priority":
+        def func():
+            return sum([sa.calc_priority(xPos, yPos)[0] for xPos, yPos in positions])
+
+        return func, sa.clear_deployment
+
+    if name == "cover_and_priority":
+        def func():
+            return sum([sa.cover_and_priority(xPos, yPos, i)[0] for i, (xPos, yPos) in enumerate(positions)])
+
+        return func, sa.clear_deployment
+
+    if name == "calc_connected_component":
+        random.seed(seed)
+        sa.pq_deployment()
+
+        def setup():
+            for sensor in sa.sensors:
+                sensor.connected = []
+
+        def func():
+            sa.find_connected_component()
+            return sa.calc_connected_component()
+
+        return func, setup
+
+    if name == "clustering":
+        # clustering methods are imported when they are used (kmeans needs pycluster)
+        if clustering == "kmeans":
+            from clustering.kmeans import KMeans as method
+        else:
+            from clustering.fcmeans import FCMeans as method
+
+        features = sa.grid_features()
+
+        def setup():
+            random.seed(seed)
+            numpy.random.seed(seed)
+
+        def func():
+            return len(set(method().cluster(features, len(landClasses))))
+
+        return func, setup
+
+    raise ValueError("Invalid benchmark: " + str(name))
+
+
+def run_benchmarks(args):
+    """
+    :return
+        report (dict) - environment information and results by "size/benchmark"
+    """
+
+    report = {"environment": {"python": platform.python_version(), "numpy": numpy.__version__,
+                              "platform": platform.platform(), "date": time.strftime("%Y-%m-%d %H:%M:%S")},
+              "settings": {"radius": args.radius, "sensorCnt": args.sensor_count, "coverageEngine": args.coverage_engine,
+                           "warmup": args.warmup, "repetitions": args.repetitions, "seed": args.seed},
+              "results": {}}
+
+    stdout = sys.stdout
+
+    for size in args.sizes:
+        sa = create_area(size, args.radius, args.sensor_count, args.coverage_engine, args.seed)
+
+        for name in args.benchmarks:
+            key = size + "/" + name
+            stdout.write(key + " ... ")
+            stdout.flush()
+
+            # output of the deployment methods is not shown
+            sys.stdout = open(os.devnull, "w")
+
+            try:
+                if name in deploymentBenchmarks:
+                    func, setup = deployment_benchmark(sa, name, args.seed)
+                    warmup, repetitions = args.warmup, args.repetitions
+                else:
+                    func, setup = kernel_benchmark(sa, name, args.seed, args.clustering)
+                    warmup, repetitions = args.warmup, args.repetitions * args.kernel_factor
+
+                result = measure(func, warmup, repetitions, setup)
+
+            except ImportError as e:
+                result = {"skipped": str(e)}
+
+            finally:
+                sys.stdout.close()
+                sys.stdout = stdout
+
+            report["results"][key] = result
+
+            if "skipped" in result:
+                print "skipped ({0})".format(result["skipped"])
+            else:
+                print "median {0:.4f} sec. (min {1:.4f}, std {2:.4f})".format(result["median"], result["min"],
+                                                                            result["std"])
+
+    return report
+
+
+def compare(report, baseline, threshold, thresholds=None):
+    """
+    comparing median times with the baseline
+
+    :param
+        threshold (float)  - allowed slowdown ratio (0.2: 20% slower than baseline)
+        thresholds (dict)  - allowed slowdown ratio by benchmark name (e.g. "simulated_annealing") or key
+
+    :return
+        regressions (list) - (key, median, baseline median, ratio) of the slower benchmarks
+    """
+
+    thresholds = thresholds or {}
+    regressions = []
+
+    for key, result in sorted(report["results"].items()):
+        base = baseline["results"].get(key)
+
+        if base is None or "median" not in base or "median" not in result:
+            continue
+
+        limit = thresholds.get(key, thresholds.get(key.split("/")[1], threshold))
+        ratio = result["median"] / base["median"] if base["median"] > 0 else 1.0
+
+        status = "ok"
+
+        if ratio > 1.0 + limit:
+            regressions.append((key, result["median"], base["median"], ratio))
+            status = "REGRESSION"
+
+        print "{0}: {1:.4f} / {2:.4f} sec. (x{3:.2f}, limit x{4:.2f}) {5}".format(
+            key, result["median"], base["median"], ratio, 1.0 + limit, status)
+
+    return regressions
+
+
+def parse_threshold(value):
+    """
+    benchmark specific threshold: name=ratio (e.g. simulated_annealing=0.5)
+    """
+
+    try:
+        name, ratio = value.split("=")
+        return name, float(ratio)
+    except ValueError:
+        raise argparse.ArgumentTypeError("Invalid threshold: " + value)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="sensor deployment benchmarks")
+
+    parser.add_argument("--sizes", nargs="+", choices=sorted(imageSizes), default=["small", "medium"])
+    parser.add_argument("--benchmarks", nargs="+", choices=deploymentBenchmarks + kernelBenchmarks,
+                        default=list(deploymentBenchmarks + kernelBenchmarks))
+    parser.add_argument("--radius", type=int, default=15, help="sensor radius")
+    parser.add_argument("--sensor-count", type=int, default=40, help="sensor count")
+    parser.add_argument("--coverage-engine", default="numpy", help="coverage engine (list, numpy, integral ...)")
+    parser.add_argument("--clustering", choices=("kmeans", "fcmeans"), default="kmeans",
+                        help="clustering method of the clustering benchmark")
+    parser.add_argument("--seed", type=int, default=0, help="image and deployment random seed")
+
+    parser.add_argument("--warmup", type=int, default=1, help="untimed runs before the repetitions")
+    parser.add_argument("--repetitions", type=int, default=3, help="timed runs of the deployment benchmarks")
+    parser.add_argument("--kernel-factor", type=int, default=3, help="repetition multiplier of the kernel benchmarks")
+
+    parser.add_argument("--output", default=None, help="result file (json)")
+    parser.add_argument("--baseline", default=None, help="baseline result file for regression check")
+    parser.add_argument("--save-baseline", default=None, help="writing results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown ratio (default: 0.2)")
+    parser.add_argument("--benchmark-threshold", type=parse_threshold, action="append", default=[],
+                        help="allowed slowdown ratio of one benchmark (name=ratio or size/name=ratio)")
+
+    args = parser.parse_args(argv)
+
+    if args.warmup < 0 or args.repetitions < 1 or args.kernel_factor < 1:
+        parser.error("Invalid range for warmup or repetition count value")
+
+    return args
+
+
+def main(argv=None):
+    """
+    :return
+        exit status (1 if there is a regression)
+    """
+
+    args = parse_args(argv)
+    report = run_benchmarks(args)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+        regressions = compare(report, baseline, args.threshold, dict(args.benchmark_threshold))
+
+        if regressions:
+            print "{0} benchmark(s) are slower than the baseline".format(len(regressions))
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
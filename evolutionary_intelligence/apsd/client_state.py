@@ -1,3 +1,10 @@
+from session_store import estimate_size
+
+# estimated bytes of one sensor object and the fixed part of a client state
+sensorSize = 512
+baseSize = 64 * 1024
+
+
 class ClientState():
     """
     Client side for web handling
@@ -13,4 +20,48 @@ class ClientState():
         self.radius = radius
         self.clusterCnt = clusterCnt
         self.clusters = []
-        self.controller = None
\ No newline at end of file
+        self.controller = None
+
+    def estimate_size(self):
+        """
+        estimated memory footprint of the client (image, coverage matrix, grids, sensors and drawing surfaces)
+
+        :return
+            size (int) - bytes
+        """
+
+        size = baseSize + estimate_size(self.clusters)
+
+        if self.controller is None:
+            return size
+
+        sa = self.controller.sa
+        cfg = sa.cfg
+
+        # image which is loaded with PIL (4 bytes for each pixel) and its color array
+        if sa.pixels:
+            size += 4 * cfg.width * cfg.height
+
+        size += estimate_size(sa.pixelArray)
+
+        coverage = cfg.coverage
+
+        if coverage is not None:
+            size += estimate_size(coverage.matrix)
+
+            if coverage.pixels is not sa.pixelArray:
+                size += estimate_size(coverage.pixels)
+
+        size += estimate_size(getattr(sa.grids, "records", None))
+        size += estimate_size(cfg.clusterLookup)
+        size += len(sa.sensors) * sensorSize
+
+        # background and cached layers of the renderer (4 bytes for each pixel)
+        surfaceCnt = 1 if self.controller.background else 0
+
+        if self.controller.renderer is not None:
+            surfaceCnt += 3
+
+        size += surfaceCnt * 4 * cfg.width * cfg.height
+
+        return size
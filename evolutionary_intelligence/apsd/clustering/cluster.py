@@ -1,4 +1,4 @@
-from scipy.spatial.distance import euclidean
+import numpy
 
 
 class Cluster():
@@ -18,22 +18,29 @@ class Cluster():
 
         raise NotImplementedError("Should have implemented this")
 
-    def find_nearest_cluster(self, data):
+    def find_nearest_clusters(self, data):
         """
-        finding cluster center of only 1 data point
+        finding cluster centers of data points with one vectorized distance calculation
+
+        :param
+            data (float matrix) - data points (n x feature count)
+
+        :return
+            nearest cluster index for each data point (first one if distances are equal)
         """
 
-        minDistance = 0
-        nearestClusterIndex = -1
+        centers = numpy.asarray(self.clusterCenters, dtype=float)
+        data = numpy.asarray(data, dtype=float).reshape(-1, centers.shape[1])
+
+        # squared distances have same order with euclidean distances
+        differences = data[:, None, :] - centers[None, :, :]
+        distances = (differences * differences).sum(axis=2)
 
-        for i in range(self.clusterCenters.shape[0]):
-            distance = euclidean(data, self.clusterCenters[i])
+        return distances.argmin(axis=1)
 
-            if i == 0:
-                minDistance = distance
-                nearestClusterIndex = 0
-            elif minDistance > distance:
-                minDistance = distance
-                nearestClusterIndex = i
+    def find_nearest_cluster(self, data):
+        """
+        finding cluster center of only 1 data point
+        """
 
-        return nearestClusterIndex
\ No newline at end of file
+        return int(self.find_nearest_clusters([data])[0])
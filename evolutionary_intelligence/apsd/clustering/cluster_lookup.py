@@ -0,0 +1,112 @@
+import numpy
+
+
+class ClusterLookup:
+    """
+    lookup table for nearest cluster centers of the (color average + color standard deviation) features
+
+    features are quantized with step (0: exact values are used as key) and nearest cluster of the
+    quantized feature is cached, so deployment algorithms find clusters without distance calculations
+    for the repeated features (sensor features are repeated for same locations and coverage)
+
+    :param
+        clusteringMethod (Cluster) - clustering method which has cluster centers
+        step (float)               - quantization step of the features (0: no quantization)
+        maxSize (int)              - maximum number of cached features (table is cleaned if it is full)
+        labels (dict)              - nearest cluster index for each quantized feature
+        hitCnt (int)               - number of found features
+        missCnt (int)              - number of features which are not found
+    """
+
+    def __init__(self, clusteringMethod, step=0.0, maxSize=200000):
+        if step < 0:
+            raise ValueError("Invalid range for quantization step value")
+
+        self.clusteringMethod = clusteringMethod
+        self.step = step
+        self.maxSize = maxSize
+        self.labels = {}
+        self.hitCnt = 0
+        self.missCnt = 0
+
+    def __len__(self):
+        return len(self.labels)
+
+    def key(self, feature):
+        if self.step:
+            return tuple([int(round(v / self.step)) for v in feature])
+
+        return tuple(feature)
+
+    def key_feature(self, key):
+        """
+        representative feature of the key (same for all features which are quantized to key)
+        """
+
+        if self.step:
+            return [k * self.step for k in key]
+
+        return list(key)
+
+    def make_room(self, count):
+        """
+        cleaning the table if count new features do not fit
+        """
+
+        if len(self.labels) + count > self.maxSize:
+            self.labels.clear()
+
+    def add(self, keys, features):
+        """
+        finding nearest clusters of the features with one vectorized step and caching them by keys
+        """
+
+        for k, label in zip(keys, self.clusteringMethod.find_nearest_clusters(features)):
+            self.labels[k] = int(label)
+
+    def nearest(self, feature):
+        """
+        finding nearest cluster index of one feature
+
+        :param
+            feature (float list) - color averages and color standard deviations
+        """
+
+        key = self.key(feature)
+        label = self.labels.get(key)
+
+        if label is None:
+            self.missCnt += 1
+            self.make_room(1)
+            self.add([key], [self.key_feature(key)])
+
+            return self.labels[key]
+
+        self.hitCnt += 1
+
+        return label
+
+    def nearest_batch(self, features):
+        """
+        finding nearest cluster indexes of the features, missing ones are calculated together
+
+        :return
+            nearest cluster index list
+        """
+
+        keys = [self.key(f) for f in features]
+        missing = list(set([k for k in keys if k not in self.labels]))
+
+        self.missCnt += len(missing)
+        self.hitCnt += len(keys) - len(missing)
+
+        if missing:
+            self.make_room(len(missing))
+
+            # cached keys of the batch are calculated again if the table is cleaned
+            if not self.labels:
+                missing = list(set(keys))
+
+            self.add(missing, numpy.array([self.key_feature(k) for k in missing], dtype=float))
+
+        return [self.labels[k] for k in keys]
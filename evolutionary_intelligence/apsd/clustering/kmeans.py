@@ -18,8 +18,23 @@ from cluster import Cluster
 class KMeans(Cluster):
     """
     k-means clustering algorithm implementation using pycluster
+
+    :param
+        seed (int) - seed of the initial clusters (same data gives same clusters, so results can be cached),
+                     None: pycluster chooses random initial clusters
     """
 
+    def __init__(self, seed=None):
+        Cluster.__init__(self)
+        self.seed = seed
+
+    def initial_clusters(self, itemCnt, clusterCnt):
+        """
+        initial cluster of each data item from the seed (each cluster has at least one item)
+        """
+
+        return numpy.random.RandomState(self.seed).permutation(itemCnt) % clusterCnt
+
     def find_cluster_centers(self, data, clusterCnt, rlabels):
         """
         finding cluster centers
@@ -40,7 +55,12 @@ class KMeans(Cluster):
         """
         k-means implementation using PyCluster
         """
-        rlabels, error, nfound = Pycluster.kcluster(data, clusterCnt)
+        if self.seed is None:
+            rlabels, error, nfound = Pycluster.kcluster(data, clusterCnt)
+        else:
+            initialId = self.initial_clusters(len(data), clusterCnt)
+            rlabels, error, nfound = Pycluster.kcluster(data, clusterCnt, initialid=initialId)
+
         self.clusterCenters = self.find_cluster_centers(data, clusterCnt, rlabels)
 
         return rlabels
@@ -1,6 +1,16 @@
 import math
 import os
 
+from stencil import get_stencil
+from coverage_engine.list_engine import ListEngine
+from coverage_engine.numpy_engine import NumpyEngine
+from coverage_engine.integral_engine import IntegralEngine
+from coverage_engine.tiled_engine import TiledEngine
+from coverage_engine.bits_engine import BitsEngine
+
+coverageEngines = {"list": ListEngine, "numpy": NumpyEngine, "integral": IntegralEngine, "tiled": TiledEngine,
+                   "bits": BitsEngine}
+
 
 class Config:
     """
@@ -16,24 +26,53 @@ class Config:
         rowCnt (int)    - row count in sensor area
         columnCnt (int) - column count in sensor area
 
-        clusterCnt (int)           - cluster count
-        clusterPriorities (float)  - priority value for each cluster
-        clusteringMethod (Cluster) - method for clustering (kmeans, fuzzy c means)
+        clusterCnt (int)              - cluster count
+        clusterPriorities (float)     - priority value for each cluster
+        clusteringMethod (Cluster)    - method for clustering (kmeans, fuzzy c means)
+        clusterLookup (ClusterLookup) - precomputed nearest clusters of the features (None: not precomputed)
+        clusterLookupStep (float)     - quantization step of the lookup features (0: exact features)
 
         sensorCnt (int)           - total sensor count
-        coverageMatrix (int)      - pixel coverage matrix which holds sensor ids of the corresponding (default: -1)
+        coverageMatrix (int)      - pixel coverage matrix which holds sensor ids of the corresponding,
+                                    uncovered pixels have coverage.noOwner value (-1, bits engine: 65535 in uint16
+                                    owner plane), None for bits engine without owner plane (bitsOwnerPlane: False)
+        coverageEngine (string)   - name of the coverage engine (list, numpy, integral, tiled, bits)
+        coverage (CoverageEngine) - coverage engine which owns coverageMatrix and does cover, uncover operations
+
+        tileSize (int)         - tile edge length of the tiled coverage engine and tiled grid color calculation
+        tileMemoryBudget (int) - maximum memory size of the loaded tiles in bytes (tiled engine)
+        tileDir (string)       - directory of the coverage file (None: system temporary directory)
+
+        bitsOwnerPlane (bool) - keep sensor ids of the pixels in bits engine (False: only covered or not, no uncover)
+
+        validateConnectivity (bool) - check connected component count with breadth first search (slow)
+
+        notificationRate (float) - maximum observer notifications in a second, messages are delivered in batches
+                                   (None: each message is delivered immediately)
 
-        sensorCoordinates (int list) - default coordinates for finding own pixels by each sensor
-        sensorCoorCnt (int)          - number of sensor's coordinate
-        gridCoordinates (int list)   - default coordinates for finding own pixels by each grid
-        gridCoorCnt (int)            - number of grid's coordinate for using coverage ratio calculation
+        saChainCnt (int)            - number of parallel simulated annealing chains
+        saExchangeInterval (int)    - iteration count between chain exchanges (0: independent chains)
+        saTemperatureLadder (float) - starting temperature ratio between neighbour chains
+        saSeeds (int list)          - random seed of each chain (None: random seeds)
+
+        gaPopulationSize (int)  - population size of genetic algorithms
+        gaProcessCnt (int)      - worker process count for fitness evaluation (None: cpu count, 1: serial)
+        gaCacheSize (int)       - maximum number of cached fitness values (0: caching is disabled)
+        gaDropDuplicates (bool) - evaluate same individuals only once in a generation
+
+        stencil (Stencil)              - shared disk stencil of the radius (offsets, spans and counts)
+        sensorCoordinates (int matrix) - default coordinates for finding own pixels by each sensor (read-only)
+        sensorCoorCnt (int)            - number of sensor's coordinate
+        gridCoordinates (int matrix)   - default coordinates for finding own pixels by each grid (read-only)
+        gridCoorCnt (int)              - number of grid's coordinate for using coverage ratio calculation
 
         gMapCrop (int)      - pixel size to cut google logo from satellite image
         appRootDir (string) - project root directory
         imgDir (string)     - default map image file directory
     """
 
-    def __init__(self, width, height, radius, sensorCnt=75, clusterCnt=3, gMapCrop=50):
+    def __init__(self, width, height, radius, sensorCnt=75, clusterCnt=3, gMapCrop=50, coverageEngine="numpy",
+                 tileSize=1024, tileMemoryBudget=256 * 2 ** 20, tileDir=None):
         self.width = width
         self.height = height
         self.radius = radius
@@ -46,13 +85,38 @@ class Config:
         self.clusterCnt = clusterCnt
         self.clusterPriorities = []
         self.clusteringMethod = None
+        self.clusterLookup = None
+        self.clusterLookupStep = 0.0
 
         self.sensorCnt = sensorCnt
-        self.coverageMatrix = [[-1] * height for i in range(width)]
+        self.coverageMatrix = None
+        self.coverageEngine = coverageEngine
+        self.coverage = None
+
+        self.tileSize = tileSize
+        self.tileMemoryBudget = tileMemoryBudget
+        self.tileDir = tileDir
+
+        self.bitsOwnerPlane = True
+
+        self.validateConnectivity = False
+
+        self.notificationRate = 30
 
-        self.sensorCoordinates = []
+        self.saChainCnt = 1
+        self.saExchangeInterval = 100
+        self.saTemperatureLadder = 1.5
+        self.saSeeds = None
+
+        self.gaPopulationSize = 75
+        self.gaProcessCnt = None
+        self.gaCacheSize = 10000
+        self.gaDropDuplicates = True
+
+        self.stencil = None
+        self.sensorCoordinates = None
         self.sensorCoorCnt = 0
-        self.gridCoordinates = []
+        self.gridCoordinates = None
         self.gridCoorCnt = 0
 
         self.gMapCrop = gMapCrop
@@ -62,6 +126,7 @@ class Config:
         self.calc_row_column_count()
         self.find_sensor_coordinates()
         self.find_grid_coordinates()
+        self.create_coverage_engine()
 
     def __str__(self):
         return 'Global params: ',\
@@ -80,56 +145,46 @@ class Config:
 
     def find_sensor_coordinates(self):
         """
-        finding covered coordinates for the sensor which has default location (xPos = radius, yPos = radius)
-
-        :param
-            start (int)   - minimum x and y position value
-            end (int)     - maximum x and y position value
-            centerX (int) - default sensor's x position
-            centerY (int) - default sensor's y position
+        finding covered coordinates for the sensor which has default location (xPos = 0, yPos = 0)
 
         :return
-            Scanning Coordinates list for another sensors' covered coordinates
+            Scanning Coordinates (read-only offsets of the shared stencil) for another sensors' covered coordinates
         """
 
-        start, end = self.radius * -1, self.radius
-        centerX = centerY = 0
-        self.sensorCoorCnt = 0
-
-        for xPos in range(start, end):
-            for yPos in range(start, end):
-                dist = math.sqrt((xPos - centerX) ** 2 + (yPos - centerY) ** 2)
-
-                if dist <= self.radius:
-                    self.sensorCoordinates.append([xPos, yPos])
-                    self.sensorCoorCnt += 1
+        self.stencil = get_stencil(self.radius)
+        self.sensorCoordinates = self.stencil.offsets
+        self.sensorCoorCnt = self.stencil.pixelCnt
 
     def find_grid_coordinates(self):
         """
-        finding covered coordinates for the grid which has default location (xPos = radius, yPos = radius)
-
-        :param
-            start (int) - minimum x and y position value
-            end (int)   - maximum x and y position value
+        finding covered coordinates for the grid which has default location (xPos = 0, yPos = 0)
 
         :return
-            Scanning Coordinates list for another grids' covered coordinates
+            Scanning Coordinates (read-only offsets of the shared stencil) for another grids' covered coordinates
         """
 
-        start, end = self.radius * -1, self.radius
-        self.gridCoorCnt = 0
+        self.stencil = get_stencil(self.radius)
+        self.gridCoordinates = self.stencil.squareOffsets
+        self.gridCoorCnt = self.stencil.squareCnt
+
+    def create_coverage_engine(self):
+        """
+        creating coverage engine which is selected with coverageEngine name
+        """
+
+        if self.coverageEngine not in coverageEngines:
+            raise ValueError("Invalid coverage engine: " + str(self.coverageEngine))
 
-        for xPos in range(start, end):
-            for yPos in range(start, end):
-                self.gridCoordinates.append([xPos, yPos])
-                self.gridCoorCnt += 1
+        self.coverage = coverageEngines[self.coverageEngine](self)
+        self.coverageMatrix = self.coverage.matrix
 
     def clear_coverage(self):
         """
         cleaning sensor ids information in coverage matrix
 
         :return
-            zeros matrix for coverage matrix
+            cleaned coverage matrix (default: -1)
         """
 
-        self.coverageMatrix = [[-1] * self.height for i in range(self.width)]
+        self.coverage.clear()
+        self.coverageMatrix = self.coverage.matrix
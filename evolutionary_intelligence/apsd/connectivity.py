@@ -0,0 +1,214 @@
+class ComponentCounter():
+    """
+    connected component counter for sensors (union-find)
+
+    each sensor has a union-find node, a removed sensor's node stays in the structure as a ghost
+    if its removal can not split the component (other nodes may use it as parent)
+    when a removal splits the component, only that component is rebuilt (local rebuild)
+    ghost nodes are cleaned with a full rebuild when they are more than the sensors
+
+    :param
+        node (dict)        - union-find node of each sensor
+        parent (dict)      - union-find parent of each node
+        size (dict)        - size of each root node's tree
+        neighbours (dict)  - connected sensors set of each sensor
+        componentCnt (int) - number of connected components
+        ghostCnt (int)     - number of nodes which belong to removed sensors
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def __len__(self):
+        return len(self.node)
+
+    def count(self):
+        return self.componentCnt
+
+    def clear(self):
+        self.node = {}
+        self.parent = {}
+        self.size = {}
+        self.neighbours = {}
+
+        self.nextNode = 0
+        self.componentCnt = 0
+        self.ghostCnt = 0
+
+    def new_node(self, item):
+        node = self.nextNode
+        self.nextNode += 1
+
+        self.node[item] = node
+        self.parent[node] = node
+        self.size[node] = 1
+
+        return node
+
+    def find(self, node):
+        """
+        finding root node of the component (with path halving)
+        """
+
+        parent = self.parent
+
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+
+        return node
+
+    def union(self, first, second):
+        """
+        merging components of two nodes (union by size)
+        """
+
+        firstRoot, secondRoot = self.find(first), self.find(second)
+
+        if firstRoot != secondRoot:
+            if self.size[firstRoot] < self.size[secondRoot]:
+                firstRoot, secondRoot = secondRoot, firstRoot
+
+            self.parent[secondRoot] = firstRoot
+            self.size[firstRoot] += self.size.pop(secondRoot)
+            self.componentCnt -= 1
+
+    def build(self, items, find_neighbours):
+        """
+        building components from all items
+
+        :param
+            items (list)               - sensors
+            find_neighbours (function) - returns connected sensors of a sensor
+        """
+
+        self.clear()
+
+        for item in items:
+            self.neighbours[item] = set()
+
+        for item in items:
+            for n in find_neighbours(item):
+                if n != item and n in self.neighbours:
+                    self.neighbours[item].add(n)
+                    self.neighbours[n].add(item)
+
+        self.rebuild()
+
+    def rebuild(self):
+        """
+        building union-find nodes again from connections (cleans ghost nodes)
+        """
+
+        self.node, self.parent, self.size = {}, {}, {}
+        self.componentCnt = self.ghostCnt = 0
+
+        for item in self.neighbours:
+            self.new_node(item)
+            self.componentCnt += 1
+
+        for item, neighbours in self.neighbours.iteritems():
+            for n in neighbours:
+                self.union(self.node[item], self.node[n])
+
+    def add(self, item, neighbours):
+        """
+        adding item with its connected items
+        """
+
+        node = self.new_node(item)
+        self.neighbours[item] = set()
+        self.componentCnt += 1
+
+        for n in neighbours:
+            if n != item and n in self.neighbours:
+                self.neighbours[item].add(n)
+                self.neighbours[n].add(item)
+                self.union(node, self.node[n])
+
+    def connected_part(self, start, targets=None):
+        """
+        finding items which are reachable from start item,
+        search stops when all targets are reached
+        """
+
+        part = set([start])
+        willCheck = [start]
+        remaining = set(targets) - part if targets is not None else None
+
+        while willCheck and remaining != set():
+            for n in self.neighbours[willCheck.pop()]:
+                if n not in part:
+                    part.add(n)
+                    willCheck.append(n)
+
+                    if remaining is not None:
+                        remaining.discard(n)
+
+        return part, remaining
+
+    def remove(self, item):
+        """
+        removing item, its component is rebuilt locally if it is split
+        """
+
+        neighbours = self.neighbours.pop(item)
+        node = self.node.pop(item)
+
+        for n in neighbours:
+            self.neighbours[n].discard(item)
+
+        if not neighbours:
+            # item was alone in its component
+            del self.parent[node]
+            self.size.pop(node, None)
+            self.componentCnt -= 1
+            return
+
+        self.ghostCnt += 1
+        neighbours = list(neighbours)
+
+        if len(neighbours) > 1:
+            part, remaining = self.connected_part(neighbours[0], neighbours[1:])
+
+            if remaining:
+                self.split(neighbours)
+
+        if self.ghostCnt > len(self.node):
+            self.rebuild()
+
+    def split(self, neighbours):
+        """
+        rebuilding nodes of the parts which are separated by a removed item
+        """
+
+        checked = set()
+        self.componentCnt -= 1
+
+        for n in neighbours:
+            if n not in checked:
+                part, remaining = self.connected_part(n)
+                checked.update(part)
+                self.componentCnt += 1
+
+                root = None
+                for member in part:
+                    node = self.new_node(member)
+
+                    if root is None:
+                        root = node
+                    else:
+                        self.parent[node] = root
+                        self.size[root] += self.size.pop(node)
+
+        self.ghostCnt += len(checked)
+
+    def move(self, item, neighbours):
+        """
+        updating connections of the moved item
+        """
+
+        if item in self.node:
+            self.remove(item)
+
+        self.add(item, neighbours)
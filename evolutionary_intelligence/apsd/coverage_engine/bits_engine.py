@@ -0,0 +1,255 @@
+import numpy
+
+from numpy_engine import NumpyEngine
+
+# number of set bits for each byte value
+popcountTable = numpy.array([bin(i).count("1") for i in range(256)], dtype=numpy.uint8)
+
+# owner value of the uncovered pixels
+noOwner = 2 ** 16 - 1
+
+
+def popcount(packed):
+    """
+    number of set bits in a byte array
+    """
+
+    return int(popcountTable[packed].sum(dtype=numpy.int64))
+
+
+class BitsEngine(NumpyEngine):
+    """
+    coverage engine which keeps coverage as a bit-packed plane (one bit for each pixel, 8 pixels along y axis in a byte)
+    and optionally a compact owner plane (uint16 sensor ids) for the ownership rules of cover and uncover
+
+    covered and uncovered pixel counts, coverage ratio and overlap area of two sensors are found with
+    packed bitwise operations and popcount, disk masks are packed once for each of 8 bit offsets
+
+    without owner plane only "covered or not" is known (sensor ids are not kept), so uncover is not possible
+
+    :param
+        plane (uint8 array)      - bit-packed coverage plane (width x ceil(height / 8))
+        owners (uint16 array)    - sensor id of each pixel (noOwner if it is not covered, None if it is disabled),
+                                   it is also coverage matrix of the engine
+        validBytes (uint8 array) - bits which are in the image for each byte column of the plane
+        packedMasks (list)       - packed disk masks for bit offsets 0 to 7 (2 * radius x byte count)
+    """
+
+    # owner value of the uncovered pixels (uint16 owner plane can not hold -1)
+    noOwner = noOwner
+
+    def __init__(self, cfg):
+        self.ownerPlane = cfg.bitsOwnerPlane
+        self.plane = None
+        self.owners = None
+
+        byteCnt = (cfg.height + 7) // 8
+        self.validBytes = numpy.full(byteCnt, 0xFF, dtype=numpy.uint8)
+
+        if cfg.height % 8:
+            # bits are ordered from the most significant bit (same with numpy.packbits)
+            self.validBytes[-1] = (0xFF << (8 - cfg.height % 8)) & 0xFF
+
+        NumpyEngine.__init__(self, cfg)
+
+        self.packedMasks = []
+
+        for offset in range(8):
+            shifted = numpy.zeros((self.mask.shape[0], self.mask.shape[1] + offset), dtype=bool)
+            shifted[:, offset:] = self.mask
+
+            self.packedMasks.append(numpy.packbits(shifted, axis=1))
+
+    def clear(self):
+        """
+        cleaning coverage plane and owner plane (fill instead of reallocating)
+        """
+
+        if self.plane is None:
+            self.plane = numpy.zeros((self.cfg.width, len(self.validBytes)), dtype=numpy.uint8)
+
+            if self.ownerPlane:
+                self.owners = numpy.empty((self.cfg.width, self.cfg.height), dtype=numpy.uint16)
+
+        self.plane.fill(0)
+
+        if self.owners is not None:
+            self.owners.fill(noOwner)
+
+        self.matrix = self.owners
+        self.journal = None
+
+    def packed_window(self, xPos, yPos):
+        """
+        finding the bytes of the plane which have the sensor area
+
+        :return
+            area (slice tuple)  - slices of the plane for the sensor
+            mask (uint8 matrix) - packed disk mask for the area (None if sensor area is out of the image)
+        """
+
+        xStart = int(xPos) - self.cfg.radius
+        yStart = int(yPos) - self.cfg.radius
+
+        packedMask = self.packedMasks[yStart % 8]
+        byteStart = yStart // 8
+
+        xs, xe = max(xStart, 0), min(xStart + packedMask.shape[0], self.cfg.width)
+        bs, be = max(byteStart, 0), min(byteStart + packedMask.shape[1], self.plane.shape[1])
+
+        if xs >= xe or bs >= be:
+            return None, None
+
+        return (slice(xs, xe), slice(bs, be)), packedMask[xs - xStart:xe - xStart, bs - byteStart:be - byteStart]
+
+    def covered_bits(self, area):
+        """
+        unpacked coverage plane for a pixel area
+        """
+
+        xArea, yArea = area
+        packed = self.plane[xArea, yArea.start // 8:(yArea.stop + 7) // 8]
+        offset = yArea.start % 8
+
+        return numpy.unpackbits(packed, axis=1)[:, offset:offset + yArea.stop - yArea.start].astype(bool)
+
+    def pack_area(self, area):
+        """
+        updating coverage plane from owner plane for the bytes which have the pixel area
+        """
+
+        bs, be = area[1].start // 8, (area[1].stop + 7) // 8
+        owners = self.owners[area[0], bs * 8:be * 8]
+
+        self.plane[area[0], bs:be] = numpy.packbits(owners != noOwner, axis=1)
+
+    def record(self, area, selected):
+        """
+        recording old owners or old plane bytes of the sensor area if journal is active
+        """
+
+        if self.journal is None:
+            return
+
+        if self.owners is not None:
+            self.journal.append((area, selected, self.owners[area][selected]))
+        else:
+            bytesArea = (area[0], slice(area[1].start // 8, (area[1].stop + 7) // 8))
+            self.journal.append((bytesArea, None, self.plane[bytesArea].copy()))
+
+    def restore(self, area, selected, values):
+        if selected is None:
+            self.plane[area] = values
+        else:
+            self.owners[area][selected] = values
+            self.pack_area(area)
+
+    def check_id(self, sensorId):
+        if self.owners is not None and not 0 <= sensorId < noOwner:
+            raise ValueError("Sensor id is out of owner plane range: " + str(sensorId))
+
+    def cover(self, xPos, yPos, sensorId):
+        self.cover_area(xPos, yPos, sensorId)
+
+    def cover_area(self, xPos, yPos, sensorId):
+        """
+        marking sensor area (same rules with cover)
+
+        :return
+            area (slice tuple)     - slices of the sensor area
+            selected (bool matrix) - pixels which are marked by the sensor (None if sensor area is out of the image)
+        """
+
+        self.check_id(sensorId)
+        area, mask = self.window(xPos, yPos)
+
+        if mask is None:
+            return None, None
+
+        if self.owners is not None:
+            region = self.owners[area]
+            selected = mask & ((region == noOwner) | (region >= sensorId))
+
+            self.record(area, selected)
+            region[selected] = sensorId
+        else:
+            selected = mask & ~self.covered_bits(area)
+            self.record(area, selected)
+
+        bytesArea, packedMask = self.packed_window(xPos, yPos)
+        self.plane[bytesArea] |= packedMask & self.validBytes[bytesArea[1]]
+
+        return area, selected
+
+    def uncover(self, xPos, yPos, sensorId):
+        if self.owners is None:
+            raise ValueError("Owner plane is needed for uncover")
+
+        area, mask = self.window(xPos, yPos)
+
+        if mask is not None:
+            region = self.owners[area]
+            selected = mask & (region == sensorId)
+
+            self.record(area, selected)
+            region[selected] = noOwner
+            self.pack_area(area)
+
+    def color_sums(self, xPos, yPos):
+        area, mask = self.window(xPos, yPos)
+
+        if mask is None:
+            return 0, [0, 0, 0], [0, 0, 0]
+
+        if self.owners is not None:
+            selected = mask & (self.owners[area] == noOwner)
+        else:
+            selected = mask & ~self.covered_bits(area)
+
+        return self.reduce_colors(self.pixels[area][selected])
+
+    def cover_and_color_sums(self, xPos, yPos, sensorId):
+        area, selected = self.cover_area(xPos, yPos, sensorId)
+
+        if selected is None:
+            return 0, [0, 0, 0], [0, 0, 0]
+
+        return self.reduce_colors(self.pixels[area][selected])
+
+    # COVERAGE STATISTICS
+    def covered_count(self):
+        return popcount(self.plane)
+
+    def uncovered_count(self, xPos, yPos):
+        """
+        number of uncovered pixels in the sensor area
+        """
+
+        area, packedMask = self.packed_window(xPos, yPos)
+
+        if packedMask is None:
+            return 0
+
+        return popcount(packedMask & ~self.plane[area] & self.validBytes[area[1]])
+
+    def overlap_area(self, xPos1, yPos1, xPos2, yPos2):
+        """
+        number of pixels in the image which are in both sensor areas
+        """
+
+        area1, packedMask1 = self.packed_window(xPos1, yPos1)
+        area2, packedMask2 = self.packed_window(xPos2, yPos2)
+
+        if packedMask1 is None or packedMask2 is None:
+            return 0
+
+        xs, xe = max(area1[0].start, area2[0].start), min(area1[0].stop, area2[0].stop)
+        bs, be = max(area1[1].start, area2[1].start), min(area1[1].stop, area2[1].stop)
+
+        if xs >= xe or bs >= be:
+            return 0
+
+        part1 = packedMask1[xs - area1[0].start:xe - area1[0].start, bs - area1[1].start:be - area1[1].start]
+        part2 = packedMask2[xs - area2[0].start:xe - area2[0].start, bs - area2[1].start:be - area2[1].start]
+
+        return popcount(part1 & part2 & self.validBytes[bs:be])
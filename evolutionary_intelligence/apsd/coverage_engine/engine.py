@@ -0,0 +1,132 @@
+class CoverageEngine():
+    """
+    this abstract class is used for coverage operations
+
+    coverage matrix holds sensor id of the sensor which covers the pixel (noOwner if it is not covered)
+    smaller sensor ids are more important for coverage (lowest sensor id wins)
+
+    :param
+        noOwner (int)          - coverage matrix value of the uncovered pixels (-1, bits engine: 65535)
+        cfg (Config)           - Config instance for global parameters
+        matrix (int matrix)    - pixel coverage matrix (width x height)
+        pixels (color matrix)  - color values of the satellite image (width x height x 3)
+        journal (list)         - changed coverage matrix entries since begin_journal (None if it is not recording)
+    """
+
+    noOwner = -1
+
+    def __init__(self, cfg):
+        """
+        Constructor
+        """
+
+        self.cfg = cfg
+        self.matrix = None
+        self.pixels = None
+        self.journal = None
+
+        self.clear()
+
+    def clear(self):
+        """
+        cleaning sensor ids information in coverage matrix
+        """
+
+        raise NotImplementedError("Should have implemented this")
+
+    def set_pixels(self, pixels):
+        """
+        setting color values of the satellite image
+
+        :param
+            pixels (uint8 array) - rgb color values (width x height x 3)
+        """
+
+        raise NotImplementedError("Should have implemented this")
+
+    def cover(self, xPos, yPos, sensorId):
+        """
+        marking coverage matrix with sensor id if it is:
+            - coordinate is not covered or
+            - covered by another sensor which its id is bigger than current sensor id
+        """
+
+        raise NotImplementedError("Should have implemented this")
+
+    def uncover(self, xPos, yPos, sensorId):
+        """
+        unmarking coverage matrix coordinates which are covered by current sensor
+        """
+
+        raise NotImplementedError("Should have implemented this")
+
+    def color_sums(self, xPos, yPos):
+        """
+        finding color sums of the uncovered pixels around the sensor location
+
+        :return
+            coveredCnt (int)   - number of uncovered pixels in the sensor area
+            sums (int list)    - sum of the color values for each color
+            sumSqs (int list)  - sum of the squared color values for each color
+        """
+
+        raise NotImplementedError("Should have implemented this")
+
+    def cover_and_color_sums(self, xPos, yPos, sensorId):
+        """
+        marking coverage matrix with sensor id (same rules with cover) and
+        finding color sums of the pixels which are marked by the sensor
+
+        :return
+            same with color_sums
+        """
+
+        raise NotImplementedError("Should have implemented this")
+
+    def access_order(self, xPositions, yPositions):
+        """
+        order for processing many sensor locations (engines which load parts of the image can group them)
+
+        :return
+            indices of the locations
+        """
+
+        return range(len(xPositions))
+
+    def covered_count(self):
+        """
+        number of covered pixels in the image
+        """
+
+        return sum([sum([1 for sensorId in column if sensorId != self.noOwner]) for column in self.matrix])
+
+    def begin_journal(self):
+        """
+        starting to record changed coverage matrix entries (for undoing a deployment step)
+        """
+
+        self.journal = []
+
+    def commit_journal(self):
+        """
+        keeping changes and stopping to record
+        """
+
+        self.journal = None
+
+    def rollback_journal(self):
+        """
+        undoing recorded changes in reverse order and stopping to record
+        """
+
+        for entry in reversed(self.journal):
+            self.restore(*entry)
+
+        self.journal = None
+
+    def restore(self, *entry):
+        """
+        undoing one recorded change
+        """
+
+        raise NotImplementedError("Should have implemented this")
@@ -0,0 +1,153 @@
+import numpy
+
+from numpy_engine import NumpyEngine
+
+
+class IntegralEngine(NumpyEngine):
+    """
+    numpy coverage engine with integral images (row-wise prefix sums) for scoring uncovered sensor areas
+
+    each column of the image has prefix sums of [1, r, g, b, r^2, g^2, b^2] values along y axis,
+    so sensor's disk is scored with one difference per disk row (O(radius) instead of O(radius^2))
+    covered pixels are subtracted with the matching prefix sums of the coverage mask
+
+    :param
+        spanStart (int array)     - first covered y offset for each x offset of the disk mask
+        spanEnd (int array)       - last covered y offset + 1 for each x offset of the disk mask
+        pixelPrefix (int array)   - prefix sums of the image (width x height + 1 x 7)
+        coveredPrefix (int array) - prefix sums of the covered pixels (width x height + 1 x 7)
+        dirtyStart (int)          - first column which coveredPrefix is out of date
+        dirtyEnd (int)            - last column + 1 which coveredPrefix is out of date
+    """
+
+    def __init__(self, cfg):
+        self.pixelPrefix = None
+        self.coveredPrefix = None
+        self.dirtyStart = self.dirtyEnd = 0
+
+        NumpyEngine.__init__(self, cfg)
+
+        self.xOffsets = cfg.stencil.xOffsets
+        self.spanStart = cfg.stencil.spanStart
+        self.spanEnd = cfg.stencil.spanEnd
+
+        # squared color values of a column should not overflow
+        self.dtype = numpy.int32 if (255 ** 2) * cfg.height < 2 ** 31 else numpy.int64
+
+    def clear(self):
+        NumpyEngine.clear(self)
+
+        if self.coveredPrefix is not None:
+            self.coveredPrefix.fill(0)
+
+        self.dirtyStart = self.dirtyEnd = 0
+
+    def column_values(self, xStart, xEnd):
+        """
+        finding [1, r, g, b, r^2, g^2, b^2] values of the pixels in the columns
+        """
+
+        colors = self.pixels[xStart:xEnd, :, :3].astype(self.dtype)
+
+        ones = numpy.ones(colors.shape[:2] + (1,), dtype=self.dtype)
+
+        return numpy.concatenate((ones, colors, colors * colors), axis=2)
+
+    def set_pixels(self, pixels):
+        """
+        setting color values and precomputing integral images of the satellite image
+        """
+
+        NumpyEngine.set_pixels(self, pixels)
+
+        width, height = self.cfg.width, self.cfg.height
+
+        self.pixelPrefix = numpy.zeros((width, height + 1, 7), dtype=self.dtype)
+        numpy.cumsum(self.column_values(0, width), axis=1, out=self.pixelPrefix[:, 1:])
+
+        self.coveredPrefix = numpy.zeros_like(self.pixelPrefix)
+        self.mark_dirty(0, width)
+
+    def mark_dirty(self, xStart, xEnd):
+        """
+        marking columns which coverage is changed
+        """
+
+        xStart, xEnd = max(xStart, 0), min(xEnd, self.cfg.width)
+
+        if xStart >= xEnd:
+            return
+
+        if self.dirtyStart >= self.dirtyEnd:
+            self.dirtyStart, self.dirtyEnd = xStart, xEnd
+        else:
+            self.dirtyStart = min(self.dirtyStart, xStart)
+            self.dirtyEnd = max(self.dirtyEnd, xEnd)
+
+    def mark_sensor_dirty(self, xPos):
+        xStart = int(xPos) - self.cfg.radius
+        self.mark_dirty(xStart, xStart + 2 * self.cfg.radius)
+
+    def update_covered_prefix(self):
+        """
+        recomputing prefix sums of the covered pixels only for dirty columns
+        """
+
+        xStart, xEnd = self.dirtyStart, self.dirtyEnd
+
+        if xStart >= xEnd:
+            return
+
+        covered = (self.matrix[xStart:xEnd] != -1).astype(self.dtype)
+        values = self.column_values(xStart, xEnd) * covered[:, :, None]
+
+        numpy.cumsum(values, axis=1, out=self.coveredPrefix[xStart:xEnd, 1:])
+
+        self.dirtyStart = self.dirtyEnd = 0
+
+    def cover(self, xPos, yPos, sensorId):
+        NumpyEngine.cover(self, xPos, yPos, sensorId)
+        self.mark_sensor_dirty(xPos)
+
+    def uncover(self, xPos, yPos, sensorId):
+        NumpyEngine.uncover(self, xPos, yPos, sensorId)
+        self.mark_sensor_dirty(xPos)
+
+    def restore(self, area, selected, sensorIds):
+        NumpyEngine.restore(self, area, selected, sensorIds)
+        self.mark_dirty(area[0].start, area[0].stop)
+
+    def cover_and_color_sums(self, xPos, yPos, sensorId):
+        self.mark_sensor_dirty(xPos)
+
+        return NumpyEngine.cover_and_color_sums(self, xPos, yPos, sensorId)
+
+    def color_sums(self, xPos, yPos):
+        """
+        finding color sums of the uncovered pixels around the sensor location with integral images
+        """
+
+        if self.pixelPrefix is None:
+            return NumpyEngine.color_sums(self, xPos, yPos)
+
+        self.update_covered_prefix()
+
+        xPos, yPos = int(xPos), int(yPos)
+        width, height = self.cfg.width, self.cfg.height
+
+        columns = self.xOffsets + xPos
+        inImage = (columns >= 0) & (columns < width)
+        columns = columns[inImage]
+
+        if columns.size == 0:
+            return 0, [0, 0, 0], [0, 0, 0]
+
+        yStart = numpy.clip(self.spanStart[inImage] + yPos, 0, height)
+        yEnd = numpy.clip(self.spanEnd[inImage] + yPos, 0, height)
+
+        total = (self.pixelPrefix[columns, yEnd] - self.pixelPrefix[columns, yStart]).sum(axis=0, dtype=numpy.int64)
+        covered = (self.coveredPrefix[columns, yEnd] - self.coveredPrefix[columns, yStart]).sum(axis=0, dtype=numpy.int64)
+
+        uncovered = [int(v) for v in total - covered]
+
+        return uncovered[0], uncovered[1:4], uncovered[4:7]
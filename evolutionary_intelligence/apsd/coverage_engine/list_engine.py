@@ -0,0 +1,122 @@
+from engine import CoverageEngine
+
+
+class ListEngine(CoverageEngine):
+    """
+    coverage engine which uses python lists (width x height) and scans the sensor area column by column
+    (covered y range of each column is taken from the stencil spans, so bounds are checked once for each span)
+    """
+
+    def clear(self):
+        """
+        cleaning sensor ids information in coverage matrix (columns are refilled instead of reallocating)
+
+        :return
+            coverage matrix (default: -1)
+        """
+
+        if self.matrix is None:
+            self.matrix = [[-1] * self.cfg.height for i in range(self.cfg.width)]
+        else:
+            column = [-1] * self.cfg.height
+
+            for c in self.matrix:
+                c[:] = column
+
+        self.journal = None
+
+    def set_pixels(self, pixels):
+        """
+        setting color values of the satellite image as python lists (faster than numpy for single pixel access)
+        """
+
+        self.pixels = pixels.tolist()
+
+    def cover(self, xPos, yPos, sensorId):
+        cM = self.matrix
+        journal = self.journal
+
+        for x, yStart, yEnd in self.cfg.stencil.clipped_spans(xPos, yPos, self.cfg.width, self.cfg.height):
+            column = cM[x]
+
+            for y in range(yStart, yEnd):
+                if column[y] == -1 or sensorId <= column[y]:
+                    if journal is not None:
+                        journal.append((x, y, column[y]))
+
+                    column[y] = sensorId
+
+    def uncover(self, xPos, yPos, sensorId):
+        cM = self.matrix
+        journal = self.journal
+
+        for x, yStart, yEnd in self.cfg.stencil.clipped_spans(xPos, yPos, self.cfg.width, self.cfg.height):
+            column = cM[x]
+
+            for y in range(yStart, yEnd):
+                if sensorId == column[y]:
+                    if journal is not None:
+                        journal.append((x, y, column[y]))
+
+                    column[y] = -1
+
+    def color_sums(self, xPos, yPos):
+        coveredCnt = 0
+        cM = self.matrix
+
+        rsum = gsum = bsum = 0
+        rsumSq = gsumSq = bsumSq = 0
+
+        for x, yStart, yEnd in self.cfg.stencil.clipped_spans(xPos, yPos, self.cfg.width, self.cfg.height):
+            column = cM[x]
+            pixelColumn = self.pixels[x]
+
+            for y in range(yStart, yEnd):
+                if column[y] == -1:
+                    r, g, b = pixelColumn[y][:3]
+
+                    rsum += r
+                    rsumSq += r*r
+                    gsum += g
+                    gsumSq += g*g
+                    bsum += b
+                    bsumSq += b*b
+
+                    coveredCnt += 1
+
+        return coveredCnt, [rsum, gsum, bsum], [rsumSq, gsumSq, bsumSq]
+
+    def cover_and_color_sums(self, xPos, yPos, sensorId):
+        coveredCnt = 0
+        cM = self.matrix
+        journal = self.journal
+
+        rsum = gsum = bsum = 0
+        rsumSq = gsumSq = bsumSq = 0
+
+        for x, yStart, yEnd in self.cfg.stencil.clipped_spans(xPos, yPos, self.cfg.width, self.cfg.height):
+            column = cM[x]
+            pixelColumn = self.pixels[x]
+
+            for y in range(yStart, yEnd):
+                if column[y] == -1 or sensorId <= column[y]:
+                    r, g, b = pixelColumn[y][:3]
+
+                    rsum += r
+                    rsumSq += r*r
+                    gsum += g
+                    gsumSq += g*g
+                    bsum += b
+                    bsumSq += b*b
+
+                    coveredCnt += 1
+
+                    if journal is not None:
+                        journal.append((x, y, column[y]))
+
+                    column[y] = sensorId
+
+        return coveredCnt, [rsum, gsum, bsum], [rsumSq, gsumSq, bsumSq]
+
+    def restore(self, x, y, sensorId):
+        self.matrix[x][y] = sensorId
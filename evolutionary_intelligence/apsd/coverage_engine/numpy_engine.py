@@ -0,0 +1,123 @@
+import numpy
+
+from engine import CoverageEngine
+
+
+class NumpyEngine(CoverageEngine):
+    """
+    coverage engine which uses a compact integer ndarray (width x height) and vectorized disk operations
+
+    :param
+        mask (bool matrix) - covered coordinates of the sensor which has default location (2 * radius x 2 * radius),
+                             read-only mask of the shared stencil (Config.stencil)
+    """
+
+    def __init__(self, cfg):
+        self.mask = cfg.stencil.mask
+
+        CoverageEngine.__init__(self, cfg)
+
+    def clear(self):
+        """
+        cleaning sensor ids information in coverage matrix (fill instead of reallocating)
+        """
+
+        if self.matrix is None:
+            self.matrix = numpy.empty((self.cfg.width, self.cfg.height), dtype=numpy.int32)
+
+        self.matrix.fill(-1)
+        self.journal = None
+
+    def set_pixels(self, pixels):
+        self.pixels = pixels
+
+    def window(self, xPos, yPos):
+        """
+        finding the part of the sensor area which is in the image
+
+        :return
+            area (slice tuple) - slices of coverage matrix and pixels for the sensor
+            mask (bool matrix) - clipped disk mask for the area (None if sensor area is out of the image)
+        """
+
+        diameter = 2 * self.cfg.radius
+        x0 = int(xPos) - self.cfg.radius
+        y0 = int(yPos) - self.cfg.radius
+
+        xs, xe = max(x0, 0), min(x0 + diameter, self.cfg.width)
+        ys, ye = max(y0, 0), min(y0 + diameter, self.cfg.height)
+
+        if xs >= xe or ys >= ye:
+            return None, None
+
+        return (slice(xs, xe), slice(ys, ye)), self.mask[xs - x0:xe - x0, ys - y0:ye - y0]
+
+    def reduce_colors(self, colors):
+        """
+        finding count, sums and squared sums for selected pixels' colors (n x 3)
+        """
+
+        values = colors[:, :3].astype(numpy.int64)
+
+        sums = values.sum(axis=0)
+        sumSqs = (values * values).sum(axis=0)
+
+        return values.shape[0], [int(s) for s in sums], [int(s) for s in sumSqs]
+
+    def record(self, area, region, selected):
+        """
+        recording old sensor ids of the selected pixels if journal is active
+        """
+
+        if self.journal is not None:
+            self.journal.append((area, selected, region[selected]))
+
+    def restore(self, area, selected, sensorIds):
+        self.matrix[area][selected] = sensorIds
+
+    def cover(self, xPos, yPos, sensorId):
+        area, mask = self.window(xPos, yPos)
+
+        if mask is not None:
+            region = self.matrix[area]
+            selected = mask & ((region == -1) | (region >= sensorId))
+
+            self.record(area, region, selected)
+            region[selected] = sensorId
+
+    def uncover(self, xPos, yPos, sensorId):
+        area, mask = self.window(xPos, yPos)
+
+        if mask is not None:
+            region = self.matrix[area]
+            selected = mask & (region == sensorId)
+
+            self.record(area, region, selected)
+            region[selected] = -1
+
+    def color_sums(self, xPos, yPos):
+        area, mask = self.window(xPos, yPos)
+
+        if mask is None:
+            return 0, [0, 0, 0], [0, 0, 0]
+
+        selected = mask & (self.matrix[area] == -1)
+
+        return self.reduce_colors(self.pixels[area][selected])
+
+    def cover_and_color_sums(self, xPos, yPos, sensorId):
+        area, mask = self.window(xPos, yPos)
+
+        if mask is None:
+            return 0, [0, 0, 0], [0, 0, 0]
+
+        region = self.matrix[area]
+        selected = mask & ((region == -1) | (region >= sensorId))
+
+        self.record(area, region, selected)
+        region[selected] = sensorId
+
+        return self.reduce_colors(self.pixels[area][selected])
+
+    def covered_count(self):
+        return int(numpy.count_nonzero(self.matrix != -1))
@@ -0,0 +1,290 @@
+import os
+import tempfile
+from collections import OrderedDict
+
+import numpy
+
+import image_handler
+from numpy_engine import NumpyEngine
+
+
+class Tile:
+    """
+    in-memory copy of one tile with its halo border
+
+    :param
+        key (tuple)             - tile column and tile row
+        xStart, yStart (int)    - image coordinates of the tile copy's first pixel (halo included)
+        pixels (uint8 array)    - color values of the tile copy
+        coverage (int32 array)  - coverage matrix of the tile copy
+        size (int)              - memory size of the tile copy in bytes
+    """
+
+    def __init__(self, key, xStart, yStart, pixels, coverage):
+        self.key = key
+        self.xStart = xStart
+        self.yStart = yStart
+        self.pixels = pixels
+        self.coverage = coverage
+        self.size = pixels.nbytes + coverage.nbytes
+
+
+class TiledEngine(NumpyEngine):
+    """
+    out-of-core coverage engine for big images
+
+    the image and the coverage matrix are memory-mapped arrays, they are split into tileSize x tileSize tiles and
+    each tile is loaded with a halo border of radius pixels, so a sensor is processed in the tile of its center
+    loaded tiles are kept in a least recently used cache which is limited with the memory budget,
+    coverage changes are written through to the coverage file and to the other loaded tiles which overlap them
+    files are read and written with temporary mappings of the needed columns, so their pages do not stay in memory
+
+    :param
+        matrixFile (file)     - coverage file (it is removed from the directory, it lives until the engine is deleted)
+        tileSize (int)        - tile edge length (Config.tileSize)
+        halo (int)            - halo border length (sensor radius)
+        memoryBudget (int)    - maximum memory size of the loaded tiles in bytes (Config.tileMemoryBudget)
+        tiles (OrderedDict)   - loaded tiles by (tile column, tile row), the least recently used one is the first
+        loadedSize (int)      - memory size of the loaded tiles in bytes
+        loadCnt (int)         - number of tile loads (for checking the cache size)
+    """
+
+    def __init__(self, cfg):
+        self.tileSize = cfg.tileSize
+        self.halo = cfg.radius
+        self.memoryBudget = cfg.tileMemoryBudget
+
+        self.matrixFile = None
+        self.tiles = OrderedDict()
+        self.loadedSize = 0
+        self.loadCnt = 0
+
+        if self.tileSize < 1:
+            raise ValueError("Invalid range for tile size value")
+
+        NumpyEngine.__init__(self, cfg)
+
+    def create_matrix(self):
+        """
+        creating coverage matrix file (it is removed when the engine is deleted)
+        """
+
+        fileNo, fileName = tempfile.mkstemp(prefix="coverage_", suffix=".dat", dir=self.cfg.tileDir)
+
+        try:
+            self.matrixFile = os.fdopen(fileNo, "w+b")
+            self.matrix = numpy.memmap(self.matrixFile, dtype=numpy.int32, mode="w+",
+                                       shape=(self.cfg.width, self.cfg.height))
+        finally:
+            os.remove(fileName)
+
+    def map_columns(self, xStart, xEnd):
+        """
+        temporary mapping of the coverage file's columns (xStart to xEnd, all rows)
+        """
+
+        return numpy.memmap(self.matrixFile, dtype=numpy.int32, mode="r+",
+                            offset=xStart * self.cfg.height * 4, shape=(xEnd - xStart, self.cfg.height))
+
+    def clear(self):
+        """
+        cleaning sensor ids information in coverage file tile by tile and dropping loaded tiles
+        """
+
+        if self.matrix is None:
+            self.create_matrix()
+
+        for xStart in range(0, self.cfg.width, self.tileSize):
+            columns = self.map_columns(xStart, min(xStart + self.tileSize, self.cfg.width))
+            columns.fill(-1)
+            columns.flush()
+            del columns
+
+        self.drop_tiles()
+        self.journal = None
+
+    def set_pixels(self, pixels):
+        """
+        setting color values of the satellite image (numpy array or memory-mapped array)
+        """
+
+        self.pixels = pixels
+        self.drop_tiles()
+
+    def drop_tiles(self):
+        self.tiles.clear()
+        self.loadedSize = 0
+
+    def tile_key(self, xPos, yPos):
+        """
+        tile which has the location (locations out of the image use the nearest tile)
+        """
+
+        x = min(max(int(xPos), 0), self.cfg.width - 1)
+        y = min(max(int(yPos), 0), self.cfg.height - 1)
+
+        return x // self.tileSize, y // self.tileSize
+
+    def access_order(self, xPositions, yPositions):
+        """
+        ordering locations tile by tile (tiles are loaded once while locations are processed in this order)
+        """
+
+        xTiles = numpy.clip(numpy.asarray(xPositions), 0, self.cfg.width - 1) // self.tileSize
+        yTiles = numpy.clip(numpy.asarray(yPositions), 0, self.cfg.height - 1) // self.tileSize
+
+        return numpy.lexsort((xTiles, yTiles))
+
+    def load_tile(self, key):
+        """
+        loading tile with its halo (least recently used tiles are dropped to keep memory budget)
+        """
+
+        tile = self.tiles.pop(key, None)
+
+        if tile is None:
+            column, row = key
+            xStart = max(column * self.tileSize - self.halo, 0)
+            yStart = max(row * self.tileSize - self.halo, 0)
+            xEnd = min((column + 1) * self.tileSize + self.halo, self.cfg.width)
+            yEnd = min((row + 1) * self.tileSize + self.halo, self.cfg.height)
+
+            columns = self.map_columns(xStart, xEnd)
+            tile = Tile(key, xStart, yStart, image_handler.read_block(self.pixels, xStart, xEnd, yStart, yEnd),
+                        numpy.array(columns[:, yStart:yEnd]))
+            del columns
+
+            # the last tile is always kept even if it is bigger than the budget
+            while self.tiles and self.loadedSize + tile.size > self.memoryBudget:
+                oldKey, oldTile = self.tiles.popitem(last=False)
+                self.loadedSize -= oldTile.size
+
+            self.loadedSize += tile.size
+            self.loadCnt += 1
+
+        self.tiles[key] = tile
+
+        return tile
+
+    def window(self, xPos, yPos):
+        """
+        finding the part of the sensor area which is in the image, in the tile of the sensor center
+
+        :return
+            tile (Tile)        - loaded tile of the sensor
+            area (slice tuple) - slices of the tile arrays for the sensor
+            mask (bool matrix) - clipped disk mask for the area (None if sensor area is out of the image)
+        """
+
+        globalArea, mask = NumpyEngine.window(self, xPos, yPos)
+
+        if mask is None:
+            return None, None, None
+
+        tile = self.load_tile(self.tile_key(xPos, yPos))
+        area = (slice(globalArea[0].start - tile.xStart, globalArea[0].stop - tile.xStart),
+                slice(globalArea[1].start - tile.yStart, globalArea[1].stop - tile.yStart))
+
+        return tile, area, mask
+
+    def write_through(self, tile, area, selected):
+        """
+        writing changed coverage of the tile to the coverage file and to the other loaded tiles
+        """
+
+        xStart, yStart = tile.xStart + area[0].start, tile.yStart + area[1].start
+        xEnd, yEnd = tile.xStart + area[0].stop, tile.yStart + area[1].stop
+
+        region = tile.coverage[area]
+
+        columns = self.map_columns(xStart, xEnd)
+        columns[:, yStart:yEnd][selected] = region[selected]
+        del columns
+
+        for other in self.tiles.itervalues():
+            if other is tile:
+                continue
+
+            otherXEnd = other.xStart + other.coverage.shape[0]
+            otherYEnd = other.yStart + other.coverage.shape[1]
+
+            xs, xe = max(xStart, other.xStart), min(xEnd, otherXEnd)
+            ys, ye = max(yStart, other.yStart), min(yEnd, otherYEnd)
+
+            if xs < xe and ys < ye:
+                part = (slice(xs - xStart, xe - xStart), slice(ys - yStart, ye - yStart))
+                otherPart = other.coverage[xs - other.xStart:xe - other.xStart, ys - other.yStart:ye - other.yStart]
+
+                changed = selected[part]
+                otherPart[changed] = region[part][changed]
+
+    def record(self, tile, area, region, selected):
+        if self.journal is not None:
+            self.journal.append((tile.key, area, selected, region[selected]))
+
+    def restore(self, key, area, selected, sensorIds):
+        """
+        undoing one recorded change in the tile (it is loaded again from coverage file if it was dropped)
+        """
+
+        tile = self.load_tile(key)
+
+        tile.coverage[area][selected] = sensorIds
+        self.write_through(tile, area, selected)
+
+    def cover(self, xPos, yPos, sensorId):
+        tile, area, mask = self.window(xPos, yPos)
+
+        if mask is not None:
+            region = tile.coverage[area]
+            selected = mask & ((region == -1) | (region >= sensorId))
+
+            self.record(tile, area, region, selected)
+            region[selected] = sensorId
+            self.write_through(tile, area, selected)
+
+    def uncover(self, xPos, yPos, sensorId):
+        tile, area, mask = self.window(xPos, yPos)
+
+        if mask is not None:
+            region = tile.coverage[area]
+            selected = mask & (region == sensorId)
+
+            self.record(tile, area, region, selected)
+            region[selected] = -1
+            self.write_through(tile, area, selected)
+
+    def color_sums(self, xPos, yPos):
+        tile, area, mask = self.window(xPos, yPos)
+
+        if mask is None:
+            return 0, [0, 0, 0], [0, 0, 0]
+
+        selected = mask & (tile.coverage[area] == -1)
+
+        return self.reduce_colors(tile.pixels[area][selected])
+
+    def cover_and_color_sums(self, xPos, yPos, sensorId):
+        tile, area, mask = self.window(xPos, yPos)
+
+        if mask is None:
+            return 0, [0, 0, 0], [0, 0, 0]
+
+        region = tile.coverage[area]
+        selected = mask & ((region == -1) | (region >= sensorId))
+
+        self.record(tile, area, region, selected)
+        region[selected] = sensorId
+        self.write_through(tile, area, selected)
+
+        return self.reduce_colors(tile.pixels[area][selected])
+
+    def covered_count(self):
+        coveredCnt = 0
+
+        for xStart in range(0, self.cfg.width, self.tileSize):
+            columns = self.map_columns(xStart, min(xStart + self.tileSize, self.cfg.width))
+            coveredCnt += int(numpy.count_nonzero(columns != -1))
+            del columns
+
+        return coveredCnt
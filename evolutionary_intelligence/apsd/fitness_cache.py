@@ -0,0 +1,84 @@
+from collections import OrderedDict
+
+import instrument
+
+
+class FitnessCache:
+    """
+    bounded least recently used cache for fitness values of the deployment individuals
+
+    key of an individual is its sorted candidate indexes, so the individuals which have same candidates
+    in different order share the fitness value (order only changes sensor ids for coverage tie-breaking)
+
+    :param
+        maxSize (int)          - maximum number of cached fitness values (0: caching is disabled)
+        entries (OrderedDict)  - fitness values by key, the least recently used one is the first
+        hitCnt (int)           - number of found fitness values
+        missCnt (int)          - number of fitness values which are not found
+    """
+
+    def __init__(self, maxSize=10000):
+        if maxSize < 0:
+            raise ValueError("Invalid range for cache size value")
+
+        self.maxSize = maxSize
+        self.entries = OrderedDict()
+        self.hitCnt = 0
+        self.missCnt = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, individual):
+        return self.key(individual) in self.entries
+
+    def key(self, individual):
+        return tuple(sorted(individual))
+
+    def get(self, individual):
+        """
+        finding fitness value of the individual and marking it as the most recently used
+
+        :return
+            fitness (tuple) - None if it is not cached
+        """
+
+        key = self.key(individual)
+        fitness = self.entries.pop(key, None)
+
+        if instrument.enabled:
+            instrument.count("ga.cacheLookups")
+            instrument.count("ga.cacheHits", int(fitness is not None))
+
+        if fitness is None:
+            self.missCnt += 1
+            return None
+
+        self.entries[key] = fitness
+        self.hitCnt += 1
+
+        return fitness
+
+    def put(self, individual, fitness):
+        """
+        adding fitness value of the individual, the least recently used value is removed if cache is full
+        """
+
+        if self.maxSize == 0:
+            return
+
+        key = self.key(individual)
+        self.entries.pop(key, None)
+        self.entries[key] = fitness
+
+        if len(self.entries) > self.maxSize:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+        self.hitCnt = self.missCnt = 0
+
+    def hit_ratio(self):
+        total = self.hitCnt + self.missCnt
+
+        return float(self.hitCnt) / total if total else 0.0
@@ -1,9 +1,39 @@
 from PIL import Image
 import cStringIO
+import numpy
+import mmap
+import os
 
 cmyk_scale = 100
 
 
+def open_image(imgDir, width=640, height=480, crop=0):
+    """
+    opening image (file directory or image data) and resizing it to the sensor area size
+
+    :param
+        imgDir (string) - image file's directory or image data
+        width (int)     - image file's width
+        height (int)    - image file's height
+        crop (int)      - crop the image (remove google logo from satellite image)
+
+    :return
+        imageFile - resized image file (IOError if it can not be opened)
+    """
+
+    try:
+        imageFile = Image.open(cStringIO.StringIO(imgDir))
+    except IOError:
+        imageFile = Image.open(imgDir)
+
+    size = width, height
+
+    if crop > 0:
+        imageFile = imageFile.crop((0, crop/2, width, height + crop/2))
+
+    return imageFile.resize(size, Image.ANTIALIAS)
+
+
 def load_image(imgDir, width=640, height=480, crop=0):
     """
     loading image to draw
@@ -19,17 +49,7 @@ def load_image(imgDir, width=640, height=480, crop=0):
         imgd      - image raw data
     """
     try:
-        try:
-            imageFile = Image.open(cStringIO.StringIO(imgDir))
-        except IOError:
-            imageFile = Image.open(imgDir)
-
-        size = width, height
-
-        if crop > 0:
-            imageFile = imageFile.crop((0, crop/2, width, height + crop/2))
-
-        imageFile = imageFile.resize(size, Image.ANTIALIAS)
+        imageFile = open_image(imgDir, width, height, crop)
 
         try:
             imgd = imageFile.tostring("raw", "BGRA")
@@ -49,6 +69,95 @@ def load_image(imgDir, width=640, height=480, crop=0):
         return None, ""
 
 
+def image_to_array(imageFile):
+    """
+    converting loaded image to contiguous color array which is indexed like pixel access (x, y)
+
+    :param
+        imageFile - loaded image file
+
+    :return
+        pixels (uint8 array) - rgb color values (width x height x 3)
+    """
+
+    pixels = numpy.asarray(imageFile.convert("RGB"), dtype=numpy.uint8)
+
+    return numpy.ascontiguousarray(pixels.transpose(1, 0, 2))
+
+
+def load_image_tiled(imgDir, arrayFile=None, bandHeight=512):
+    """
+    loading big image in full resolution as memory-mapped color array for tiled processing
+
+    the image is decoded once and written to the array file band by band,
+    next calls map the array file directly without decoding the image
+
+    :param
+        imgDir (string)    - image file's directory (or .npy color array file)
+        arrayFile (string) - color array file (default: image file's directory + .rgb.npy)
+        bandHeight (int)   - row count of the image bands which are converted at once
+
+    :return
+        pixels (uint8 memmap) - rgb color values (width x height x 3)
+    """
+
+    if imgDir.endswith(".npy"):
+        arrayFile = imgDir
+    elif arrayFile is None:
+        arrayFile = os.path.splitext(imgDir)[0] + ".rgb.npy"
+
+    if os.path.exists(arrayFile) and (arrayFile == imgDir or os.path.getmtime(arrayFile) >= os.path.getmtime(imgDir)):
+        return numpy.load(arrayFile, mmap_mode="r")
+
+    # big satellite tiles are bigger than decompression bomb limit of PIL
+    maxPixels = Image.MAX_IMAGE_PIXELS
+    Image.MAX_IMAGE_PIXELS = None
+
+    try:
+        imageFile = Image.open(imgDir)
+        width, height = imageFile.size
+
+        pixels = numpy.lib.format.open_memmap(arrayFile, mode="w+", dtype=numpy.uint8, shape=(width, height, 3))
+
+        for yStart in range(0, height, bandHeight):
+            yEnd = min(yStart + bandHeight, height)
+            band = numpy.asarray(imageFile.crop((0, yStart, width, yEnd)).convert("RGB"), dtype=numpy.uint8)
+
+            pixels[:, yStart:yEnd] = band.transpose(1, 0, 2)
+
+        pixels.flush()
+    finally:
+        Image.MAX_IMAGE_PIXELS = maxPixels
+
+    del pixels
+
+    return numpy.load(arrayFile, mmap_mode="r")
+
+
+def read_block(pixels, xStart, xEnd, yStart, yEnd):
+    """
+    copying a block of the color array, memory-mapped arrays are read with a temporary mapping of the block's
+    columns so pages of the image do not stay in memory after the copy
+
+    :return
+        block (uint8 array) - rgb color values of the block ((xEnd - xStart) x (yEnd - yStart) x 3)
+    """
+
+    # only whole mappings of the files (not their views) can be mapped again with their offset
+    if not isinstance(pixels, numpy.memmap) or not isinstance(pixels.base, mmap.mmap) or \
+            not pixels.flags["C_CONTIGUOUS"]:
+        return numpy.array(pixels[xStart:xEnd, yStart:yEnd, :3])
+
+    rowSize = pixels.strides[0]
+    columns = numpy.memmap(pixels.filename, dtype=pixels.dtype, mode="r", offset=pixels.offset + xStart * rowSize,
+                           shape=(xEnd - xStart,) + pixels.shape[1:])
+
+    block = numpy.array(columns[:, yStart:yEnd, :3])
+    del columns
+
+    return block
+
+
 def rgb2rgb(rgb):
     """
     normalized rgb color values
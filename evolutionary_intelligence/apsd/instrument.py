@@ -0,0 +1,464 @@
+"""
+lightweight instrumentation for the hot paths: named counters, named timers and a sampling profiler
+
+instrumentation is disabled by default, hot paths check the module flag before counting:
+
+    if instrument.enabled:
+        instrument.count("calc_priority")
+
+so the cost of the disabled instrumentation is one attribute lookup
+
+each thread (deployment thread of the GUI, web server threads) counts into its own statistics without locking,
+snapshots aggregate the statistics of all threads and can be written to a json file periodically
+statistics are kept for the current process (worker processes of the pools have their own statistics)
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import timeit
+
+enabled = False
+
+# statistics of each thread (registered once, they are kept after the thread finishes)
+local = threading.local()
+registry = []
+registryLock = threading.Lock()
+
+# derived values of the snapshots: name -> (numerator counter, denominator counter)
+ratios = {"sa.acceptanceRate": ("sa.accepted", "sa.steps"),
+          "ga.cacheHitRate": ("ga.cacheHits", "ga.cacheLookups")}
+
+exporter = None
+
+
+class ThreadStats:
+    """
+    counters and timers of one thread
+
+    :param
+        threadName (string) - name of the thread
+        counters (dict)     - counter values by name
+        timers (dict)       - [call count, total seconds, max seconds] by name
+    """
+
+    def __init__(self, threadName):
+        self.threadName = threadName
+        self.counters = {}
+        self.timers = {}
+
+    def clear(self):
+        self.counters.clear()
+        self.timers.clear()
+
+
+def thread_stats():
+    """
+    statistics of the current thread (created at the first use)
+    """
+
+    stats = getattr(local, "stats", None)
+
+    if stats is None:
+        stats = ThreadStats(threading.current_thread().name)
+        local.stats = stats
+
+        with registryLock:
+            registry.append(stats)
+
+    return stats
+
+
+def enable():
+    global enabled
+    enabled = True
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+def reset():
+    """
+    cleaning statistics of all threads
+    """
+
+    with registryLock:
+        for stats in registry:
+            stats.clear()
+
+
+def count(name, value=1):
+    if not enabled:
+        return
+
+    counters = thread_stats().counters
+    counters[name] = counters.get(name, 0) + value
+
+
+def add_time(name, seconds):
+    if not enabled:
+        return
+
+    timers = thread_stats().timers
+    timer = timers.get(name)
+
+    if timer is None:
+        timers[name] = [1, seconds, seconds]
+    else:
+        timer[0] += 1
+        timer[1] += seconds
+
+        if seconds > timer[2]:
+            timer[2] = seconds
+
+
+class Timer(object):
+    """
+    context manager which adds elapsed time to the named timer
+    """
+
+    __slots__ = ("name", "startTime")
+
+    def __init__(self, name):
+        self.name = name
+        self.startTime = 0.0
+
+    def __enter__(self):
+        self.startTime = timeit.default_timer()
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        add_time(self.name, timeit.default_timer() - self.startTime)
+        return False
+
+
+class NullTimer(object):
+    """
+    context manager which does nothing (instrumentation is disabled)
+    """
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        return False
+
+nullTimer = NullTimer()
+
+
+def timer(name):
+    """
+    with instrument.timer("name"): ...
+    """
+
+    return Timer(name) if enabled else nullTimer
+
+
+def timed(name):
+    """
+    decorator which times each call of the function with the named timer
+    """
+
+    def decorator(func):
+        def timed_func(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+
+            startTime = timeit.default_timer()
+
+            try:
+                return func(*args, **kwargs)
+            finally:
+                add_time(name, timeit.default_timer() - startTime)
+
+        timed_func.__name__ = func.__name__
+        timed_func.__doc__ = func.__doc__
+
+        return timed_func
+
+    return decorator
+
+
+# SNAPSHOTS
+def merge_timers(target, timers):
+    for name, (callCnt, total, maximum) in timers.items():
+        timer = target.get(name)
+
+        if timer is None:
+            target[name] = [callCnt, total, maximum]
+        else:
+            timer[0] += callCnt
+            timer[1] += total
+            timer[2] = max(timer[2], maximum)
+
+
+def format_timers(timers):
+    return dict((name, {"count": callCnt, "total": total, "mean": total / callCnt if callCnt else 0.0,
+                        "max": maximum}) for name, (callCnt, total, maximum) in timers.items())
+
+
+def snapshot(perThread=False):
+    """
+    aggregated statistics of all threads
+
+    :param
+        perThread (bool) - adding statistics of each thread
+
+    :return
+        snapshot (dict) - time, counters, timers (count, total, mean, max seconds) and ratios
+    """
+
+    with registryLock:
+        statsList = list(registry)
+
+    counters = {}
+    timers = {}
+    threads = {}
+
+    for stats in statsList:
+        threadCounters = dict(stats.counters)
+        threadTimers = dict((name, list(timer)) for name, timer in stats.timers.items())
+
+        for name, value in threadCounters.items():
+            counters[name] = counters.get(name, 0) + value
+
+        merge_timers(timers, threadTimers)
+
+        if perThread and (threadCounters or threadTimers):
+            threadSnapshot = threads.setdefault(stats.threadName, {"counters": {}, "timers": {}})
+
+            for name, value in threadCounters.items():
+                threadSnapshot["counters"][name] = threadSnapshot["counters"].get(name, 0) + value
+
+            merge_timers(threadSnapshot["timers"], threadTimers)
+
+    result = {"time": time.time(), "enabled": enabled, "counters": counters, "timers": format_timers(timers),
+              "ratios": {}}
+
+    for name, (numerator, denominator) in ratios.items():
+        if counters.get(denominator):
+            result["ratios"][name] = float(counters.get(numerator, 0)) / counters[denominator]
+
+    if perThread:
+        for threadSnapshot in threads.values():
+            threadSnapshot["timers"] = format_timers(threadSnapshot["timers"])
+
+        result["threads"] = threads
+
+    return result
+
+
+def write_json(data, path):
+    """
+    writing json file atomically (readers never see a half written file)
+    """
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fileNo, tempName = tempfile.mkstemp(prefix=".instrument_", suffix=".json", dir=directory)
+
+    try:
+        with os.fdopen(fileNo, "w") as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+
+        os.rename(tempName, path)
+    except:
+        os.remove(tempName)
+        raise
+
+
+def write_snapshot(path, perThread=True):
+    write_json(snapshot(perThread), path)
+
+
+class Exporter(threading.Thread):
+    """
+    background thread which writes snapshots to the json file periodically
+
+    :param
+        path (string)    - snapshot file
+        interval (float) - seconds between snapshots
+    """
+
+    def __init__(self, path, interval=10.0):
+        threading.Thread.__init__(self, name="instrument-exporter")
+        self.daemon = True
+
+        self.path = path
+        self.interval = interval
+        self.stopEvent = threading.Event()
+
+    def run(self):
+        while not self.stopEvent.wait(self.interval):
+            write_snapshot(self.path)
+
+    def stop(self):
+        self.stopEvent.set()
+        self.join()
+
+        # last statistics are written when it is stopped
+        write_snapshot(self.path)
+
+
+def start_export(path, interval=10.0):
+    """
+    starting periodic snapshot export (previous exporter is stopped)
+    """
+
+    global exporter
+
+    if interval <= 0:
+        raise ValueError("Invalid range for export interval value")
+
+    stop_export()
+
+    exporter = Exporter(path, interval)
+    exporter.start()
+
+    return exporter
+
+
+def stop_export():
+    global exporter
+
+    if exporter is not None:
+        exporter.stop()
+        exporter = None
+
+
+# SAMPLING PROFILER
+class SamplingProfiler(threading.Thread):
+    """
+    statistical profiler which samples the call stack of one thread at fixed intervals
+    (target thread runs without tracing overhead, unlike cProfile)
+
+    :param
+        threadId (int)      - sampled thread (default: thread which creates the profiler)
+        interval (float)    - seconds between samples
+        maxDepth (int)      - maximum stack depth of a sample
+        sampleCnt (int)     - number of samples
+        selfCounts (dict)   - sample count of each function which is running (top of the stack)
+        totalCounts (dict)  - sample count of each function which is in the stack
+    """
+
+    def __init__(self, threadId=None, interval=0.005, maxDepth=64):
+        threading.Thread.__init__(self, name="instrument-profiler")
+        self.daemon = True
+
+        if interval <= 0:
+            raise ValueError("Invalid range for sampling interval value")
+
+        self.threadId = threadId if threadId is not None else threading.current_thread().ident
+        self.interval = interval
+        self.maxDepth = maxDepth
+
+        self.sampleCnt = 0
+        self.selfCounts = {}
+        self.totalCounts = {}
+        self.running = False
+        self.startTime = self.endTime = 0.0
+
+    def start(self):
+        self.running = True
+        self.startTime = time.time()
+        threading.Thread.start(self)
+
+    def run(self):
+        while self.running:
+            time.sleep(self.interval)
+
+            frame = sys._current_frames().get(self.threadId)
+
+            if frame is not None:
+                self.sample(frame)
+
+            del frame
+
+    def sample(self, frame):
+        self.sampleCnt += 1
+
+        seen = set()
+        depth = 0
+
+        while frame is not None and depth < self.maxDepth:
+            code = frame.f_code
+            key = "{0}:{1}({2})".format(code.co_filename, code.co_firstlineno, code.co_name)
+
+            if depth == 0:
+                self.selfCounts[key] = self.selfCounts.get(key, 0) + 1
+
+            # recursive functions are counted once in a sample
+            if key not in seen:
+                self.totalCounts[key] = self.totalCounts.get(key, 0) + 1
+                seen.add(key)
+
+            frame = frame.f_back
+            depth += 1
+
+    def stop(self):
+        self.running = False
+        self.join()
+        self.endTime = time.time()
+
+    def report(self, limit=30):
+        """
+        :return
+            report (dict) - sample count, duration and the functions which have the most samples
+                            (self: running, total: in the stack)
+        """
+
+        sampleCnt = max(self.sampleCnt, 1)
+        functions = sorted(self.totalCounts, key=lambda f: (-self.selfCounts.get(f, 0), -self.totalCounts[f]))
+
+        return {"sampleCnt": self.sampleCnt, "interval": self.interval, "duration": self.endTime - self.startTime,
+                "functions": [{"function": f, "self": self.selfCounts.get(f, 0), "total": self.totalCounts[f],
+                               "selfRatio": float(self.selfCounts.get(f, 0)) / sampleCnt,
+                               "totalRatio": float(self.totalCounts[f]) / sampleCnt} for f in functions[:limit]]}
+
+
+def profile_call(func, *args, **kwargs):
+    """
+    running function in the current thread with the sampling profiler
+
+    :return
+        result - return value of the function
+        report (dict) - report of the sampling profiler
+    """
+
+    profiler = SamplingProfiler()
+    profiler.start()
+
+    try:
+        result = func(*args, **kwargs)
+    finally:
+        profiler.stop()
+
+    return result, profiler.report()
+
+
+def print_snapshot(data=None):
+    data = data or snapshot()
+
+    for name, value in sorted(data["counters"].items()):
+        print "{0}: {1}".format(name, value)
+
+    for name, value in sorted(data["ratios"].items()):
+        print "{0}: {1:.4f}".format(name, value)
+
+    for name, timer in sorted(data["timers"].items()):
+        print "{0}: {1} calls, {2:.4f} sec. (mean {3:.6f}, max {4:.6f})".format(
+            name, timer["count"], timer["total"], timer["mean"], timer["max"])
+
+
+def print_profile(report, limit=20):
+    print "{0} samples in {1:.2f} sec.".format(report["sampleCnt"], report["duration"])
+    print "{0:>7} {1:>7}  function".format("self%", "total%")
+
+    for f in report["functions"][:limit]:
+        print "{0:7.2f} {1:7.2f}  {2}".format(100 * f["selfRatio"], 100 * f["totalRatio"], f["function"])
@@ -0,0 +1,360 @@
+"""
+asynchronous deployment jobs for the web handler
+
+deployments run in a process pool, so a web request only submits a job and returns its id,
+workers send progress (stage, iteration, temperature, best objective) to the web process with a queue
+and check cancellation with each progress batch
+
+job queue is bounded (queued and running jobs) and each client can have a limited number of active jobs
+"""
+
+import multiprocessing
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from subject import ProgressEvent
+
+# progress queue and cancelled job ids of the worker process
+progressQueue = None
+cancelledJobs = None
+
+activeStatuses = ("queued", "running", "cancelling")
+
+
+class JobError(ValueError):
+    """
+    job is not accepted (queue is full, client limit) or it is not found
+    """
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def init_worker(queue, cancelled):
+    global progressQueue, cancelledJobs
+
+    progressQueue = queue
+    cancelledJobs = cancelled
+
+
+class ProgressObserver:
+    """
+    observer of the worker's sensor area, it sends the last progress of each notification batch to the web process
+
+    :param
+        jobId (string) - job of the observed deployment
+    """
+
+    def __init__(self, jobId):
+        self.jobId = jobId
+
+    def update(self, subject, message):
+        messages = message if isinstance(message, list) else [message]
+        progress = None
+
+        for m in messages:
+            if isinstance(m, ProgressEvent):
+                progress = m
+
+        if progress is not None:
+            progressQueue.put((self.jobId, "progress", {"stage": progress.name, "iteration": progress.iteration,
+                                                        "temperature": progress.temperature,
+                                                        "objective": progress.value}))
+
+        if self.jobId in cancelledJobs:
+            raise JobCancelled()
+
+
+def run_job(task):
+    """
+    priority queue deployment and simulated annealing in the worker process
+
+    :param
+        task (dict) - job id, exported sensor area context, random seed and progress rate
+
+    :return
+        (job id, status, result or error message)
+    """
+
+    from sensor_area import create_sensor_area
+
+    jobId = task["jobId"]
+
+    if jobId in cancelledJobs:
+        return jobId, "cancelled", None
+
+    progressQueue.put((jobId, "running", None))
+
+    try:
+        if task["seed"] is not None:
+            random.seed(task["seed"])
+
+        sa = create_sensor_area(task["context"])
+        sa.set_notification_rate(task["progressRate"])
+        sa.attach(ProgressObserver(jobId))
+
+        sa.pq_deployment()
+        objective = sa.simulated_annealing()
+
+        sensors = [{"sensorId": s.sensorId, "priority": s.priority, "xPos": s.xPos, "yPos": s.yPos}
+                   for s in sa.sensors]
+
+        return jobId, "done", {"objective": objective, "iterationCnt": sa.iterationCnt, "sensors": sensors}
+
+    except JobCancelled:
+        return jobId, "cancelled", None
+    except Exception as e:
+        return jobId, "failed", type(e).__name__ + ": " + str(e)
+
+
+class Job:
+    """
+    deployment job
+
+    :param
+        jobId (string)     - unique job id
+        clientId (string)  - client which submits the job
+        status (string)    - queued, running, cancelling, done, failed or cancelled
+        progress (dict)    - last progress of the deployment (stage, iteration, temperature, objective)
+        result (dict)      - objective, iteration count and sensors (None until it is done)
+        error (string)     - error message of the failed job
+        submitTime, startTime, finishTime (float) - times of the status changes
+    """
+
+    def __init__(self, jobId, clientId):
+        self.jobId = jobId
+        self.clientId = clientId
+        self.status = "queued"
+        self.progress = {}
+        self.result = None
+        self.error = None
+
+        self.submitTime = time.time()
+        self.startTime = None
+        self.finishTime = None
+
+    def is_active(self):
+        return self.status in activeStatuses
+
+    def to_dict(self, withResult=False):
+        job = {"jobId": self.jobId, "status": self.status, "progress": dict(self.progress), "error": self.error,
+               "submitTime": self.submitTime, "startTime": self.startTime, "finishTime": self.finishTime}
+
+        if withResult:
+            job["result"] = self.result
+
+        return job
+
+
+class JobQueue:
+    """
+    bounded job queue with a process pool
+
+    :param
+        processCnt (int)   - worker process count (None: cpu count)
+        maxPending (int)   - maximum count of the queued and running jobs
+        maxPerClient (int) - maximum count of the queued and running jobs of a client
+        maxFinished (int)  - finished jobs which are kept for status and result requests (oldest ones are dropped)
+        progressRate (float) - maximum progress messages in a second for a job
+
+        jobs (OrderedDict) - jobs by id in submit order
+        lock (Lock)        - lock for jobs (web threads, pool result thread and progress thread use them)
+        startLock (Lock)   - lock for starting the pool (jobs are not locked while the processes are forked)
+    """
+
+    def __init__(self, processCnt=None, maxPending=20, maxPerClient=1, maxFinished=100, progressRate=2):
+        if processCnt is None:
+            processCnt = multiprocessing.cpu_count()
+
+        if processCnt < 1 or maxPending < 1 or maxPerClient < 1:
+            raise ValueError("Invalid range for job queue limits")
+
+        self.processCnt = processCnt
+        self.maxPending = maxPending
+        self.maxPerClient = maxPerClient
+        self.maxFinished = maxFinished
+        self.progressRate = progressRate
+
+        self.jobs = OrderedDict()
+        self.lock = threading.Lock()
+        self.startLock = threading.Lock()
+
+        self.pool = None
+        self.manager = None
+        self.cancelled = None
+        self.progressQueue = None
+        self.listener = None
+
+    def start(self):
+        """
+        starting worker processes and progress listener (with the first job)
+        """
+
+        with self.startLock:
+            if self.pool is not None:
+                return
+
+            self.manager = multiprocessing.Manager()
+            self.cancelled = self.manager.dict()
+            self.progressQueue = multiprocessing.Queue()
+
+            pool = multiprocessing.Pool(self.processCnt, init_worker, (self.progressQueue, self.cancelled))
+
+            self.listener = threading.Thread(target=self.listen, name="job-progress")
+            self.listener.daemon = True
+            self.listener.start()
+
+            # pool is set last, submit uses it without the start lock
+            self.pool = pool
+
+    def submit(self, clientId, context, seed=None):
+        """
+        adding deployment job to the queue
+
+        :param
+            clientId (string) - client which submits the job
+            context (dict)    - exported sensor area (SensorArea.export_context)
+            seed (int)        - random seed of the deployment (None: random)
+
+        :return
+            job (Job) - queued job (JobError if the queue is full or the client has too many jobs)
+        """
+
+        if self.pool is None:
+            self.start()
+
+        with self.lock:
+            active = [job for job in self.jobs.itervalues() if job.is_active()]
+
+            if len(active) >= self.maxPending:
+                raise JobError("Job queue is full")
+
+            if len([job for job in active if job.clientId == clientId]) >= self.maxPerClient:
+                raise JobError("Client has too many active jobs")
+
+            job = Job(str(uuid.uuid4()), clientId)
+            self.jobs[job.jobId] = job
+
+            self.drop_finished()
+
+        task = {"jobId": job.jobId, "context": context, "seed": seed, "progressRate": self.progressRate}
+        self.pool.apply_async(run_job, (task,), callback=self.finish)
+
+        return job
+
+    def get(self, jobId):
+        with self.lock:
+            job = self.jobs.get(jobId)
+
+        if job is None:
+            raise JobError("Job is not found: " + str(jobId))
+
+        return job
+
+    def cancel(self, jobId):
+        """
+        cancelling job (queued job returns when a worker takes it, running job stops with its next progress batch)
+        job is active until the worker returns, so cancelled jobs which wait in the pool are counted for the limits
+        """
+
+        job = self.get(jobId)
+
+        with self.lock:
+            if job.status in ("queued", "running"):
+                job.status = "cancelling"
+                self.cancelled[jobId] = True
+
+        return job
+
+    def cancel_client(self, clientId):
+        """
+        cancelling active jobs of the client and dropping its finished jobs
+        """
+
+        for job in self.client_jobs(clientId):
+            if job.is_active():
+                self.cancel(job.jobId)
+
+        with self.lock:
+            for jobId, job in self.jobs.items():
+                if job.clientId == clientId and not job.is_active():
+                    del self.jobs[jobId]
+
+    def client_jobs(self, clientId):
+        with self.lock:
+            return [job for job in self.jobs.itervalues() if job.clientId == clientId]
+
+    def finish(self, result):
+        """
+        pool callback for finished jobs
+        """
+
+        jobId, status, value = result
+
+        with self.lock:
+            job = self.jobs.get(jobId)
+
+            if jobId in self.cancelled:
+                del self.cancelled[jobId]
+
+            if job is None:
+                return
+
+            job.status = status
+            job.finishTime = time.time()
+
+            if status == "done":
+                job.result = value
+                job.progress["objective"] = value["objective"]
+            elif status == "failed":
+                job.error = value
+
+    def listen(self):
+        """
+        updating job status and progress with the messages of the workers
+        """
+
+        while True:
+            message = self.progressQueue.get()
+
+            if message is None:
+                break
+
+            jobId, kind, value = message
+
+            with self.lock:
+                job = self.jobs.get(jobId)
+
+                # messages can come after the result of the job
+                if job is None or not job.is_active():
+                    continue
+
+                if kind == "running" and job.status == "queued":
+                    job.status = "running"
+                    job.startTime = time.time()
+                elif kind == "progress":
+                    job.progress = value
+
+    def drop_finished(self):
+        """
+        dropping oldest finished jobs (lock is held by the caller)
+        """
+
+        finished = [jobId for jobId, job in self.jobs.iteritems() if not job.is_active()]
+
+        for jobId in finished[:max(len(finished) - self.maxFinished, 0)]:
+            del self.jobs[jobId]
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.progressQueue.put(None)
+            self.listener.join()
+            self.manager.shutdown()
+
+            self.pool = None
@@ -1,16 +1,146 @@
+"""
+static map retrieving with pluggable fetch backends
+
+HttpBackend requests the maps from the static google maps server (or from the stand-in server),
+DirectoryBackend reads the maps from a local directory, so offline and benchmark runs do not need the network
+maps are read through the tile cache if it is set (set_tile_cache)
+
+stand-in map server serves a map directory with the static maps url format:
+    python map_handler.py serve maps --port 8080
+    python map_handler.py save maps "Bornova, Izmir" --zoom 15
+"""
+
+import argparse
+import BaseHTTPServer
+import os
+import re
+import SocketServer
 import urllib
+import urllib2
+import urlparse
 
+googleMapUrl = "http://maps.google.com/maps/api/staticmap"
 
-def get_google_map(imgDir, center=None, imgSize=(640, 480), imgFormat="png",
-                   zoom=15, mapType="satellite", markers=None):
+# maps are read through this cache if it is set (TileCache)
+tileCache = None
+
+
+def set_tile_cache(cache):
+    global tileCache
+    tileCache = cache
+
+
+def map_params(center=None, imgSize=(640, 480), imgFormat="png", zoom=15, mapType="satellite", markers=None):
     """
-    retrieve a map (image) from the static google maps server
-    (http://hci574.blogspot.com.tr/2010/04/using-google-maps-static-images.html)
-    (http://code.google.com/apis/maps/documentation/staticmaps/)
+    parameters of a static map request
+
+    :return
+        params (dict) - center, zoom, size, format, maptype and markers
+    """
+
+    return {"center": center, "zoom": zoom, "size": "%ix%i" % tuple(imgSize), "format": imgFormat,
+            "maptype": mapType, "markers": list(markers) if markers else []}
 
+
+def map_url(params, baseUrl=googleMapUrl):
+    """
     creates a request string with a URL like this:
     http://maps.google.com/maps/api/staticmap?center=Brooklyn+Bridge,New+York,NY&zoom=14&size=512x512
     &maptype=roadmap&markers=color:blue|label:S|40.702147,-74.015794&sensor=false
+    """
+
+    request = baseUrl + "?"
+
+    if params["center"] is not None:
+        request += "center=%s&" % urllib.quote(params["center"], safe=",:|")
+        request += "zoom=%i&" % params["zoom"]
+
+    request += "size=%s&" % params["size"]
+    request += "format=%s&" % params["format"]
+    request += "maptype=%s&" % params["maptype"]
+
+    # add markers (location and style)
+    for marker in params["markers"]:
+        request += "%s&" % urllib.quote(marker, safe="=,:|")
+
+    # request += "mobile=false&" # optional: mobile=true will assume the image is shown on mobile device
+    request += "sensor=false&"  # must be given, deals with getting location from mobile device
+
+    return request
+
+
+def map_name(params):
+    """
+    file name of the map in a map directory (e.g. Bornova-Izmir_15_640x530_satellite.png)
+    """
+
+    center = re.sub(r"[^A-Za-z0-9.]+", "-", params["center"] or "").strip("-") or "none"
+    name = "%s_%s_%s_%s" % (center, params["zoom"], params["size"], params["maptype"])
+
+    if params["markers"]:
+        name += "_" + re.sub(r"[^A-Za-z0-9.]+", "-", "_".join(params["markers"]))
+
+    return name + "." + params["format"]
+
+
+class HttpBackend:
+    """
+    fetching maps from the static maps server
+
+    :param
+        baseUrl (string) - static maps url (google or stand-in server)
+        timeout (float)  - seconds for the connection and the response
+    """
+
+    def __init__(self, baseUrl=googleMapUrl, timeout=10.0):
+        self.baseUrl = baseUrl
+        self.timeout = timeout
+
+    def fetch(self, params):
+        response = urllib2.urlopen(map_url(params, self.baseUrl), timeout=self.timeout)
+
+        try:
+            return response.read()
+        finally:
+            response.close()
+
+
+class DirectoryBackend:
+    """
+    reading maps from a local directory (files are named with map_name)
+
+    :param
+        mapDir (string)      - map directory
+        defaultMap (string)  - map file which is returned for unknown maps (None: IOError)
+    """
+
+    def __init__(self, mapDir, defaultMap=None):
+        self.mapDir = mapDir
+        self.defaultMap = defaultMap
+
+    def fetch(self, params):
+        path = os.path.join(self.mapDir, map_name(params))
+
+        if not os.path.isfile(path):
+            if self.defaultMap is None:
+                raise IOError("Map is not found: " + path)
+
+            path = os.path.join(self.mapDir, self.defaultMap)
+
+        with open(path, "rb") as f:
+            return f.read()
+
+    def save(self, params, data):
+        with open(os.path.join(self.mapDir, map_name(params)), "wb") as f:
+            f.write(data)
+
+
+def get_google_map(imgDir, center=None, imgSize=(640, 480), imgFormat="png",
+                   zoom=15, mapType="satellite", markers=None, backend=None):
+    """
+    retrieve a map (image) from the static google maps server
+    (http://hci574.blogspot.com.tr/2010/04/using-google-maps-static-images.html)
+    (http://code.google.com/apis/maps/documentation/staticmaps/)
 
     :param
         imgDir (string)     - retrieving image will save to file to this directory
@@ -18,29 +148,106 @@ def get_google_map(imgDir, center=None, imgSize=(640, 480), imgFormat="png",
         imgFormat (string)  - image file type (default png)
         zoom (integer)      - retrieving map area zoom ratio
         mapType (string)    - retrieving map type (default satellite (roadmap, hybrid, terrain))
+        backend             - fetch backend when there is no tile cache (default: HttpBackend)
 
     :return
-        saved map image file from retrieving google map
+        retrieved map image data
     """
 
-    request = "http://maps.google.com/maps/api/staticmap?"
+    params = map_params(center, imgSize, imgFormat, zoom, mapType, markers)
 
-    if center is not None:
-        request += "center=%s&" % center
-        request += "zoom=%i&" % zoom
+    if tileCache is not None:
+        return tileCache.get(params)
 
-    request += "size=%ix%i&" % imgSize
-    request += "format=%s&" % imgFormat
-    request += "maptype=%s&" % mapType
+    return (backend or HttpBackend()).fetch(params)
+    # save image directly to disk
+    # urllib.urlretrieve(request, imgDir)
 
-    # add markers (location and style)
-    if markers is not None:
-        for marker in markers:
-            request += "%s&" % marker
 
-    # request += "mobile=false&" # optional: mobile=true will assume the image is shown on mobile device
-    request += "sensor=false&"  # must be given, deals with getting location from mobile device
+# STAND-IN MAP SERVER
+class StandInHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """
+    static maps request handler which reads maps from the backend of the server
+    """
 
-    return urllib.urlopen(request).read()
-    # save image directly to disk
-    # urllib.urlretrieve(request, imgDir)
+    def do_GET(self):
+        url = urlparse.urlparse(self.path)
+        query = urlparse.parse_qs(url.query)
+
+        try:
+            width, height = query["size"][0].split("x")
+            params = map_params(center=query.get("center", [None])[0], imgSize=(int(width), int(height)),
+                                imgFormat=query.get("format", ["png"])[0], zoom=int(query.get("zoom", [15])[0]),
+                                mapType=query.get("maptype", ["satellite"])[0],
+                                markers=["markers=" + marker for marker in query.get("markers", [])])
+        except (KeyError, ValueError):
+            self.send_error(400, "Invalid map request")
+            return
+
+        try:
+            data = self.server.backend.fetch(params)
+        except IOError as e:
+            self.send_error(404, str(e))
+            return
+
+        self.send_response(200)
+        self.send_header("Content-type", "image/" + params["format"])
+        self.send_header("Content-length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandInServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """
+    local map server which has the static maps url format (use HttpBackend with its url)
+
+    :param
+        backend - backend of the maps (DirectoryBackend)
+    """
+
+    daemon_threads = True
+
+    def __init__(self, backend, host="localhost", port=8080):
+        BaseHTTPServer.HTTPServer.__init__(self, (host, port), StandInHandler)
+        self.backend = backend
+
+    def url(self):
+        return "http://%s:%i/maps/api/staticmap" % self.server_address[:2]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="stand-in static map server")
+    commands = parser.add_subparsers(dest="command")
+
+    serve = commands.add_parser("serve", help="serving map directory")
+    serve.add_argument("mapDir")
+    serve.add_argument("--host", default="localhost")
+    serve.add_argument("--port", type=int, default=8080)
+    serve.add_argument("--default-map", default=None, help="map file for unknown maps")
+
+    save = commands.add_parser("save", help="saving a map from google to the map directory")
+    save.add_argument("mapDir")
+    save.add_argument("center")
+    save.add_argument("--zoom", type=int, default=15)
+    save.add_argument("--size", default="640x530")
+    save.add_argument("--maptype", default="satellite")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        server = StandInServer(DirectoryBackend(args.mapDir, args.default_map), args.host, args.port)
+        print "serving", args.mapDir, "at", server.url()
+        server.serve_forever()
+    else:
+        width, height = args.size.split("x")
+        params = map_params(args.center, (int(width), int(height)), zoom=args.zoom, mapType=args.maptype)
+
+        DirectoryBackend(args.mapDir).save(params, HttpBackend().fetch(params))
+        print "saved", map_name(params)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+parallel multi-chain simulated annealing for sensor deployment
+
+each chain runs in a worker process which has its own sensor area and coverage matrix,
+chains have a temperature ladder (chain k starts at temperature * ladder^k) and all of them cool with the same rate
+after each exchange interval neighbour chains swap their deployments with replica exchange (parallel tempering) rule
+"""
+
+import math
+import random
+import multiprocessing
+
+# sensor area of the worker process (created once per worker from the exported context)
+chainArea = None
+
+
+def init_worker(context):
+    """
+    creating sensor area of the worker process
+    """
+
+    global chainArea
+    from sensor_area import create_sensor_area
+
+    chainArea = create_sensor_area(context)
+
+
+def run_chain(task):
+    """
+    running simulated annealing steps of one chain in the worker process
+
+    :param
+        task (dict) - positions, temperature, coolingRate, iterations and seed of the chain
+
+    :return
+        result (dict) - last deployment and its objective, best deployment and its objective
+    """
+
+    sa = chainArea
+    random.seed(task["seed"])
+
+    sa.load_deployment(task["positions"])
+    totalPriority, objective = sa.start_annealing()
+
+    best, bestPositions = objective, task["positions"]
+    temperature = task["temperature"]
+
+    for i in range(task["iterations"]):
+        totalPriority, objective, event = sa.annealing_step(temperature, totalPriority, objective)
+        temperature *= task["coolingRate"]
+
+        if objective > best:
+            best, bestPositions = objective, sa.deployment_positions()
+
+    return {"positions": sa.deployment_positions(), "objective": objective,
+            "best": best, "bestPositions": bestPositions}
+
+
+def exchange(chains, offset, rand):
+    """
+    swapping deployments of neighbour chains (offset 0: 0-1, 2-3 ..., offset 1: 1-2, 3-4 ...)
+    a hotter chain's better deployment is always moved to the colder chain, otherwise with metropolis probability
+    """
+
+    for k in range(offset, len(chains) - 1, 2):
+        cold, hot = chains[k], chains[k + 1]
+
+        # same scale with simulated annealing acceptance (exp(delta * 15 / temperature))
+        delta = 15 * (hot["objective"] - cold["objective"]) * (1.0 / cold["temperature"] - 1.0 / hot["temperature"])
+
+        if delta >= 0 or math.exp(delta) > rand.random():
+            cold["positions"], hot["positions"] = hot["positions"], cold["positions"]
+            cold["objective"], hot["objective"] = hot["objective"], cold["objective"]
+
+
+def run_chains(context, positions, cfg, temperature=0.3, absoluteTemperature=0.05, coolingRate=0.9995):
+    """
+    running chains in a process pool
+
+    :param
+        context (dict)    - exported sensor area
+        positions (list)  - (sensorId, xPos, yPos) list of the starting deployment
+        cfg (Config)      - saChainCnt, saExchangeInterval (0: independent chains), saTemperatureLadder, saSeeds
+
+    :return
+        best (float)          - best objective value of all chains
+        bestPositions (list)  - best deployment of all chains
+        iterCnt (int)         - iteration count of each chain
+    """
+
+    chainCnt = cfg.saChainCnt
+    seeds = cfg.saSeeds
+
+    if chainCnt < 1:
+        raise ValueError("Invalid range for chain count value")
+
+    if seeds is None:
+        seeds = [random.randint(0, 2 ** 31 - 1) for k in range(chainCnt)]
+    elif len(seeds) < chainCnt:
+        raise ValueError("Seed count is less than chain count")
+
+    # same iteration count with single chain simulated annealing
+    totalIterations = int(math.ceil(math.log(absoluteTemperature / temperature) / math.log(coolingRate)))
+    interval = cfg.saExchangeInterval if cfg.saExchangeInterval > 0 else totalIterations
+
+    chains = [{"positions": positions, "objective": None, "temperature": temperature * cfg.saTemperatureLadder ** k}
+              for k in range(chainCnt)]
+    exchangeRandom = random.Random(seeds[0])
+
+    best, bestPositions = None, positions
+    iterCnt = roundCnt = 0
+
+    pool = multiprocessing.Pool(min(chainCnt, multiprocessing.cpu_count()), init_worker, (context,))
+
+    try:
+        while iterCnt < totalIterations:
+            iterations = min(interval, totalIterations - iterCnt)
+
+            tasks = [{"positions": chain["positions"], "temperature": chain["temperature"],
+                      "coolingRate": coolingRate, "iterations": iterations,
+                      "seed": seeds[k] * 1000003 + roundCnt}
+                     for k, chain in enumerate(chains)]
+
+            for chain, result in zip(chains, pool.map(run_chain, tasks)):
+                chain["positions"] = result["positions"]
+                chain["objective"] = result["objective"]
+                chain["temperature"] *= coolingRate ** iterations
+
+                if best is None or result["best"] > best:
+                    best, bestPositions = result["best"], result["bestPositions"]
+
+            iterCnt += iterations
+            roundCnt += 1
+
+            if cfg.saExchangeInterval > 0:
+                exchange(chains, roundCnt % 2, exchangeRandom)
+
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+
+    return best, bestPositions, iterCnt
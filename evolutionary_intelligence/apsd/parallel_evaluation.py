@@ -0,0 +1,156 @@
+"""
+parallel fitness evaluation for genetic algorithms deployment
+
+each worker process has its own sensor area and coverage matrix (scratch buffers which are cleaned with fill),
+the image and the candidate sensor locations are sent once to every worker with the pool initializer
+"""
+
+import multiprocessing
+
+import instrument
+
+# sensor area and candidate sensor locations of the worker process
+evaluationArea = None
+candidates = None
+
+
+def init_worker(context, candidateLocations):
+    """
+    creating sensor area of the worker process
+
+    :param
+        context (dict)            - exported sensor area
+        candidateLocations (list) - (xPos, yPos) list of the candidate sensors
+    """
+
+    global evaluationArea, candidates
+    from sensor_area import create_sensor_area
+
+    evaluationArea = create_sensor_area(context)
+    candidates = candidateLocations
+
+
+def evaluate(individual):
+    """
+    total priority of the deployment, sensor ids are the positions in the individual
+
+    :param
+        individual (int list) - candidate sensor indexes
+
+    :return
+        fitness (tuple) - total priority
+    """
+
+    sa = evaluationArea
+    sa.cfg.clear_coverage()
+
+    totalPriority = 0
+
+    for sensorId, index in enumerate(individual):
+        xPos, yPos = candidates[index]
+        priority, clusterNum = sa.cover_and_priority(xPos, yPos, sensorId)
+        totalPriority += priority
+
+    return totalPriority,
+
+
+class Evaluator:
+    """
+    map function of deap toolbox which evaluates individuals in a process pool
+    (in the current process if there is one process)
+
+    :param
+        processCnt (int)      - worker process count (None: cpu count)
+        pool (Pool)           - process pool (None if it is serial)
+        cache (FitnessCache)  - fitness values of the evaluated individuals (None: caching is disabled)
+        dropDuplicates (bool) - evaluate same individuals only once in a generation
+    """
+
+    def __init__(self, context, candidateLocations, processCnt=None, cache=None, dropDuplicates=False):
+        if processCnt is None:
+            processCnt = multiprocessing.cpu_count()
+
+        if processCnt < 1:
+            raise ValueError("Invalid range for process count value")
+
+        self.processCnt = processCnt
+        self.pool = None
+        self.cache = cache
+        self.dropDuplicates = dropDuplicates
+
+        if processCnt > 1:
+            self.pool = multiprocessing.Pool(processCnt, init_worker, (context, candidateLocations))
+        else:
+            init_worker(context, candidateLocations)
+
+    def evaluate_all(self, func, individuals):
+        if self.pool is None:
+            return map(func, individuals)
+
+        return self.pool.map(func, individuals)
+
+    def map(self, func, individuals):
+        """
+        evaluating individuals which are not in the cache (duplicates once if dropDuplicates is set)
+
+        :return
+            fitness values in the same order with individuals
+        """
+
+        results = [None] * len(individuals)
+        pending = []
+
+        for i, individual in enumerate(individuals):
+            if self.cache is not None:
+                results[i] = self.cache.get(individual)
+
+            if results[i] is None:
+                pending.append(i)
+
+        duplicates = []
+
+        if self.dropDuplicates:
+            # same individuals in the generation are evaluated with their first occurrence
+            first = {}
+            unique = []
+
+            for i in pending:
+                key = tuple(individuals[i])
+
+                if key in first:
+                    duplicates.append((i, first[key]))
+                else:
+                    first[key] = i
+                    unique.append(i)
+
+            pending = unique
+
+        if instrument.enabled:
+            instrument.count("ga.individuals", len(individuals))
+            instrument.count("ga.evaluated", len(pending))
+
+        with instrument.timer("ga.evaluate"):
+            fitnesses = self.evaluate_all(func, [individuals[i] for i in pending])
+
+        for i, fitness in zip(pending, fitnesses):
+            results[i] = fitness
+
+            if self.cache is not None:
+                self.cache.put(individuals[i], fitness)
+
+        for i, j in duplicates:
+            results[i] = results[j]
+
+        return results
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+    def terminate(self):
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
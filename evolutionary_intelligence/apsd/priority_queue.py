@@ -0,0 +1,70 @@
+import heapq
+
+
+class PriorityQueue():
+    """
+    indexed max-heap with lazy invalidation
+
+    items are ordered by (priority, order), bigger order wins between same priorities
+    pushing an item again or removing it only invalidates its old heap entry, invalid entries are skipped by pop
+
+    :param
+        heap (list)     - heap entries [-priority, -order, index, valid]
+        entries (dict)  - valid heap entry for each item index
+    """
+
+    def __init__(self):
+        self.heap = []
+        self.entries = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, index):
+        return index in self.entries
+
+    def push(self, index, priority, order):
+        """
+        adding item to the queue or updating its priority and order
+        """
+
+        self.remove(index)
+
+        entry = [-priority, -order, index, True]
+        self.entries[index] = entry
+
+        heapq.heappush(self.heap, entry)
+
+    def remove(self, index):
+        """
+        removing item from the queue (lazy)
+        """
+
+        entry = self.entries.pop(index, None)
+
+        if entry is not None:
+            entry[3] = False
+
+    def priority(self, index):
+        return -self.entries[index][0]
+
+    def order(self, index):
+        return -self.entries[index][1]
+
+    def pop(self):
+        """
+        removing and returning the item which has the biggest (priority, order)
+
+        :return
+            index (int)      - item index
+            priority (float) - item priority
+        """
+
+        while self.heap:
+            entry = heapq.heappop(self.heap)
+
+            if entry[3]:
+                del self.entries[entry[2]]
+                return entry[2], -entry[0]
+
+        raise IndexError("pop from empty priority queue")
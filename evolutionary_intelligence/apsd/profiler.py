@@ -1,22 +1,35 @@
-import cProfile
+import instrument
 
 
 def do_profile(func):
     """
-    profiling tool for python
-    (https://zapier.com/engineering/profiling-python-boss/)
+    profiling tool for python (sampling profiler and instrumentation counters of instrument module)
 
     we can put this annotation above to function:
         @profiler.do_profile
+
+    counters and timers are enabled during the call, they are printed with the functions which have most samples
     """
 
     def profiled_func(*args, **kwargs):
-        profile = cProfile.Profile()
+        wasEnabled = instrument.enabled
+        instrument.enable()
+
+        profiler = instrument.SamplingProfiler()
+        profiler.start()
+
         try:
-            profile.enable()
-            result = func(*args, **kwargs)
-            profile.disable()
-            return result
+            return func(*args, **kwargs)
         finally:
-            profile.print_stats()
-    return profiled_func
\ No newline at end of file
+            profiler.stop()
+
+            if not wasEnabled:
+                instrument.disable()
+
+            instrument.print_snapshot()
+            instrument.print_profile(profiler.report())
+
+    profiled_func.__name__ = func.__name__
+    profiled_func.__doc__ = func.__doc__
+
+    return profiled_func
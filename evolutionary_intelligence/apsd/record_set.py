@@ -0,0 +1,221 @@
+"""
+columnar (struct of arrays) storage for sensor and grid populations
+
+values are kept in one numpy record array, view objects give attribute access (sensor.xPos, grid.priority ...)
+to one record for the existing callers, filter, sort and top-k selection are done with numpy
+"""
+
+import numpy
+
+
+def record_property(field):
+    """
+    attribute of the view object which reads and writes one field of its record
+    """
+
+    def get(self):
+        return self.records[field][self.index].item()
+
+    def set(self, value):
+        self.records[field][self.index] = value
+
+    return property(get, set)
+
+
+def array_property(field):
+    """
+    attribute of the view object for a sub-array field (array is a view of the record)
+    """
+
+    def get(self):
+        return self.records[field][self.index]
+
+    def set(self, value):
+        self.records[field][self.index] = value
+
+    return property(get, set)
+
+
+class RecordView(object):
+    """
+    lightweight view of one record of a record set
+
+    :param
+        records (record array) - records of the set
+        index (int)            - record index
+    """
+
+    __slots__ = ("records", "index")
+
+    def __init__(self, records, index):
+        self.records = records
+        self.index = index
+
+
+class SensorView(RecordView):
+    __slots__ = ()
+
+    sensorId = record_property("sensorId")
+    xPos = record_property("xPos")
+    yPos = record_property("yPos")
+    priority = record_property("priority")
+    clusterNum = record_property("clusterNum")
+
+    def __str__(self):
+        return 'Sensor: ',\
+               'id =', self.sensorId, 'priority =', self.priority,\
+               'xPos =', self.xPos, 'yPos =', self.yPos
+
+
+class GridView(RecordView):
+    __slots__ = ()
+
+    gridId = record_property("gridId")
+    xPos = record_property("xPos")
+    yPos = record_property("yPos")
+    priority = record_property("priority")
+    sizeRatio = record_property("sizeRatio")
+    clusterNum = record_property("clusterNum")
+    colorAvg = array_property("colorAvg")
+    colorStdDev = array_property("colorStdDev")
+
+    def __str__(self):
+        return 'Grid: ',\
+               'id =', self.gridId, 'priority =', self.priority,\
+               'xPos =', self.xPos, 'yPos =', self.yPos,\
+               'size ratio =', self.sizeRatio, 'cluster number =', self.clusterNum,\
+               'color average =', self.colorAvg, 'color std dev =', self.colorStdDev
+
+
+class RecordSet(object):
+    """
+    this abstract class is used for columnar record storage
+
+    :param
+        records (record array) - one record for each member (columns are records[field])
+    """
+
+    dtype = None
+    viewClass = RecordView
+
+    def __init__(self, count=0, records=None):
+        if records is None:
+            records = numpy.zeros(count, dtype=self.dtype)
+
+        self.records = records
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        records = self.records
+
+        for i in range(len(records)):
+            yield self.viewClass(records, i)
+
+    def __getitem__(self, key):
+        """
+        view of one record for an int, new set for a slice, index array or bool mask
+        """
+
+        if isinstance(key, (int, long, numpy.integer)):
+            if key < 0:
+                key += len(self.records)
+
+            if not 0 <= key < len(self.records):
+                raise IndexError("Record index out of range")
+
+            return self.viewClass(self.records, key)
+
+        return self.__class__(records=self.records[key])
+
+    def column(self, field):
+        return self.records[field]
+
+    def filter(self, mask):
+        """
+        selecting records with a bool mask (e.g. sensors.column("priority") != 0)
+        """
+
+        return self.__class__(records=self.records[numpy.asarray(mask, dtype=bool)])
+
+    def argsort(self, field, reverse=False):
+        """
+        stable ordering of the records by field (equal values keep their order for both directions)
+        """
+
+        values = self.records[field]
+
+        if reverse:
+            values = -values
+
+        return numpy.argsort(values, kind="mergesort")
+
+    def sort(self, field, reverse=False):
+        return self.__class__(records=self.records[self.argsort(field, reverse)])
+
+    def top(self, k, field="priority"):
+        """
+        k records which have the biggest field values (same order with stable descending sort)
+        """
+
+        values = self.records[field]
+
+        if k >= len(values):
+            return self.sort(field, reverse=True)
+
+        if k <= 0:
+            return self.__class__(0)
+
+        # records which are bigger than k-th biggest value and enough of the equal ones (in their order)
+        kth = numpy.partition(values, len(values) - k)[len(values) - k]
+        bigger = numpy.flatnonzero(values > kth)
+        equal = numpy.flatnonzero(values == kth)[:k - len(bigger)]
+
+        selected = numpy.concatenate((bigger, equal))
+        selected.sort()
+
+        return self[selected].sort(field, reverse=True)
+
+    def concatenate(self, other):
+        return self.__class__(records=numpy.concatenate((self.records, other.records)))
+
+    def positions(self):
+        """
+        (xPos, yPos) list of the records
+        """
+
+        return zip(self.records["xPos"].tolist(), self.records["yPos"].tolist())
+
+
+class SensorSet(RecordSet):
+    """
+    columnar storage for sensors (e.g. fake sensors of the deployment algorithms)
+    """
+
+    dtype = numpy.dtype([("sensorId", numpy.int64), ("xPos", numpy.int64), ("yPos", numpy.int64),
+                         ("priority", numpy.float64), ("clusterNum", numpy.int64)])
+    viewClass = SensorView
+
+    def __init__(self, count=0, records=None):
+        RecordSet.__init__(self, count, records)
+
+        if records is None:
+            self.records["clusterNum"] = -1
+
+
+class GridSet(RecordSet):
+    """
+    columnar storage for grids (with their color averages and standard deviations)
+    """
+
+    dtype = numpy.dtype([("gridId", numpy.int64), ("xPos", numpy.int64), ("yPos", numpy.int64),
+                         ("priority", numpy.float64), ("sizeRatio", numpy.float64), ("clusterNum", numpy.int64),
+                         ("colorAvg", numpy.float64, 3), ("colorStdDev", numpy.float64, 3)])
+    viewClass = GridView
+
+    def __init__(self, count=0, records=None):
+        RecordSet.__init__(self, count, records)
+
+        if records is None:
+            self.records["clusterNum"] = -1
@@ -0,0 +1,301 @@
+"""
+layer-cached rendering of the sensor area
+
+static layers (background with grid lines, cluster labels) are drawn once into off-screen surfaces and they are
+drawn again only when their keys change (image, grid edge, clusters and priorities)
+sensors are drawn into their own layer, only the rectangles of the sensors which are moved, added, removed or
+which have a new priority label are cleaned and drawn again, so expose events only paint the cached surfaces
+"""
+
+import math
+
+import cairo
+
+# pixels around the sensor circle for its line width
+sensorPadding = 2
+
+
+class Renderer:
+    """
+    :param
+        width, height (int)     - drawing area size
+        radius (int)            - sensor radius
+        gridEdge (int)          - grid edge length
+        colors (list)           - rgb colors of the clusters
+
+        staticLayer (Surface)   - background and grid lines
+        staticKey (tuple)       - background and grid settings of the static layer
+        clusterLayer (Surface)  - cluster numbers and priorities of the grids (transparent)
+        clusterKey (tuple)      - cluster numbers and priorities of the cluster layer
+        sensorLayer (Surface)   - sensor circles and labels (transparent)
+        drawnSensors (set)      - (sensorId, xPos, yPos, priority label) of the sensors in the sensor layer
+        cellSize (int)          - cell edge for finding sensors in the dirty rectangles
+        extents (dict)          - text extents by (font, text, font size)
+        redrawRatio (float)     - whole sensor layer is drawn again if more sensors than this ratio are changed
+    """
+
+    def __init__(self, width, height, radius, gridEdge, colors):
+        self.width = width
+        self.height = height
+        self.radius = radius
+        self.gridEdge = gridEdge
+        self.colors = colors
+
+        self.staticLayer = None
+        self.staticKey = None
+        self.clusterLayer = None
+        self.clusterKey = None
+        self.sensorLayer = None
+        self.drawnSensors = set()
+
+        self.cellSize = 2 * (radius + sensorPadding)
+        self.extents = {}
+        self.redrawRatio = 0.5
+
+    def create_layer(self):
+        return cairo.ImageSurface(cairo.FORMAT_ARGB32, self.width, self.height)
+
+    def invalidate(self):
+        """
+        dropping all cached layers (they are drawn again with the next render)
+        """
+
+        self.staticKey = self.clusterKey = None
+        self.drawnSensors = set()
+        self.sensorLayer = None
+
+    def text_extents(self, cr, text, fontSize, font="sensor"):
+        key = (font, text, fontSize)
+        extents = self.extents.get(key)
+
+        if extents is None:
+            cr.set_font_size(fontSize)
+            extents = self.extents[key] = cr.text_extents(text)[:4]
+
+        return extents
+
+    # STATIC LAYERS
+    def update_static_layer(self, background):
+        key = (background, self.width, self.height, self.gridEdge)
+
+        if self.staticLayer is not None and self.staticKey == key:
+            return
+
+        self.staticLayer = self.create_layer()
+        self.staticKey = key
+
+        cr = cairo.Context(self.staticLayer)
+
+        if background:
+            cr.set_source_surface(background, 0, 0)
+            cr.paint_with_alpha(1.0)  # transparent paint
+
+        cr.set_source_rgb(0.0, 0.0, 0.0)
+        cr.set_line_width(0.3)
+
+        for i in range(self.gridEdge, self.height, self.gridEdge):
+            cr.move_to(0, i)
+            cr.line_to(self.width, i)
+            cr.stroke()
+
+        for i in range(self.gridEdge, self.width, self.gridEdge):
+            cr.move_to(i, 0)
+            cr.line_to(i, self.height)
+            cr.stroke()
+
+    def update_cluster_layer(self, grids, clusterPriorities):
+        if len(clusterPriorities) > 0:
+            clusterNums = [grid.clusterNum for grid in grids]
+            priorities = [round(grid.priority, 2) for grid in grids]
+            key = (tuple(clusterNums), tuple(priorities))
+        else:
+            key = ()
+
+        if self.clusterLayer is not None and self.clusterKey == key:
+            return
+
+        self.clusterLayer = self.create_layer()
+        self.clusterKey = key
+
+        if not key:
+            return
+
+        cr = cairo.Context(self.clusterLayer)
+        cr.select_font_face("Georgia", cairo.FONT_SLANT_NORMAL, cairo.FONT_WEIGHT_BOLD)
+
+        radius = self.radius
+
+        for grid, clusterNum, priority in zip(grids, clusterNums, priorities):
+            color = self.colors[clusterNum]
+            cr.set_source_rgb(color[0], color[1], color[2])
+
+            cnXBearing, cnYBearing, cnWidth, cnHeight = self.text_extents(cr, str(clusterNum), radius, "cluster")
+            cr.set_font_size(radius)
+            cr.move_to(grid.xPos - cnWidth/2 - cnXBearing, grid.yPos - cnHeight/2 - cnYBearing)
+
+            cr.show_text(str(clusterNum))
+            cr.stroke()
+
+            pvXBearing, pvYBearing, pvWidth, pvHeight = self.text_extents(cr, str(priority), radius/1.8, "cluster")
+            cr.set_font_size(radius/1.8)
+            cr.move_to(grid.xPos - pvWidth/2 - pvXBearing, grid.yPos - cnHeight/2 - (pvHeight * 1.5) - pvYBearing)
+
+            cr.show_text(str(priority))
+            cr.stroke()
+
+    # SENSOR LAYER
+    def sensor_rect(self, xPos, yPos):
+        edge = self.radius + sensorPadding
+
+        return int(math.floor(xPos)) - edge, int(math.floor(yPos)) - edge, 2 * edge + 1, 2 * edge + 1
+
+    def cell(self, xPos, yPos):
+        return int(xPos // self.cellSize), int(yPos // self.cellSize)
+
+    def find_dirty(self, sensors):
+        """
+        comparing the sensors with the drawn sensors
+
+        :return
+            current (set)     - (sensorId, xPos, yPos, priority label) of the sensors
+            dirtyRects (list) - rectangles of the changed sensors (old and new locations)
+        """
+
+        current = set((s.sensorId, s.xPos, s.yPos, str(round(s.priority, 2))) for s in sensors)
+
+        changed = current.symmetric_difference(self.drawnSensors)
+        dirtyRects = [self.sensor_rect(xPos, yPos) for sensorId, xPos, yPos, label in changed]
+
+        return current, dirtyRects
+
+    def dirty_cells(self, dirtyRects):
+        """
+        cells of the sensor centers whose circles can intersect the dirty rectangles
+
+        :return
+            cells (dict) - dirty rectangles which are near to the cell
+        """
+
+        cells = {}
+        edge = self.radius + sensorPadding
+
+        for rect in dirtyRects:
+            x, y, w, h = rect
+            xStart, yStart = self.cell(x - edge, y - edge)
+            xEnd, yEnd = self.cell(x + w + edge, y + h + edge)
+
+            for i in range(xStart, xEnd + 1):
+                for j in range(yStart, yEnd + 1):
+                    cells.setdefault((i, j), []).append(rect)
+
+        return cells
+
+    def intersects(self, xPos, yPos, rects):
+        x, y, w, h = self.sensor_rect(xPos, yPos)
+
+        for rx, ry, rw, rh in rects:
+            if x < rx + rw and rx < x + w and y < ry + rh and ry < y + h:
+                return True
+
+        return False
+
+    def draw_sensor(self, cr, sensorId, xPos, yPos, label):
+        radius = self.radius
+
+        cr.arc(xPos, yPos, radius, 0, 2 * math.pi)
+        cr.stroke()
+
+        cnXBearing, cnYBearing, cnWidth, cnHeight = self.text_extents(cr, str(sensorId), radius / 2.5)
+        cr.move_to(xPos - cnWidth/2 - cnXBearing, yPos - cnHeight/2 - cnYBearing)
+
+        cr.show_text(str(sensorId))
+        cr.stroke()
+
+        pvXBearing, pvYBearing, pvWidth, pvHeight = self.text_extents(cr, label, radius / 2.5)
+        cr.move_to(xPos - pvWidth/2 - pvXBearing, yPos + cnHeight/2 + pvHeight/2 - pvYBearing)
+
+        cr.show_text(label)
+        cr.stroke()
+
+    def update_sensor_layer(self, sensors):
+        """
+        drawing changed sensors (and the sensors around them) into the sensor layer
+
+        :return
+            dirtyRects (list) - changed rectangles of the layer (None if whole layer is drawn again)
+        """
+
+        current, dirtyRects = self.find_dirty(sensors)
+
+        if self.sensorLayer is not None and not dirtyRects:
+            return []
+
+        # each changed sensor has two rectangles (old and new states)
+        fullRedraw = self.sensorLayer is None or len(dirtyRects) > 2 * self.redrawRatio * max(len(current), 1)
+
+        if self.sensorLayer is None:
+            self.sensorLayer = self.create_layer()
+
+        cr = cairo.Context(self.sensorLayer)
+
+        if fullRedraw:
+            selected = current
+        else:
+            for rect in dirtyRects:
+                cr.rectangle(*rect)
+            cr.clip()
+
+            cells = self.dirty_cells(dirtyRects)
+            selected = [state for state in current
+                        if self.intersects(state[1], state[2], cells.get(self.cell(state[1], state[2]), ()))]
+
+        # cleaning the dirty part of the layer
+        cr.set_operator(cairo.OPERATOR_CLEAR)
+        cr.paint()
+        cr.set_operator(cairo.OPERATOR_OVER)
+
+        cr.set_source_rgb(1.0, 1.0, 1.0)
+        cr.set_line_width(1.4)
+        cr.set_font_size(self.radius / 2.5)
+
+        # sensors are drawn in id order like the sensors list
+        for state in sorted(selected):
+            self.draw_sensor(cr, *state)
+
+        self.drawnSensors = current
+
+        return None if fullRedraw else dirtyRects
+
+    # DRAWING
+    def draw_selection(self, cr, grid):
+        """
+        outline of the selected grid (it is drawn below the sensors)
+        """
+
+        cr.set_source_rgb(1.0, 0.0, 0.0)
+        cr.set_line_width(2.0)
+
+        cr.rectangle(grid.xPos - self.radius, grid.yPos - self.radius, self.gridEdge, self.gridEdge)
+        cr.stroke()
+
+    def render(self, cr, background, grids, clusterPriorities, sensors, selectedGrid=None):
+        """
+        updating the layers and painting them to the context (context is clipped to the exposed area)
+
+        :param
+            selectedGrid (GridView) - grid which is outlined below the sensor layer (None: no outline)
+        """
+
+        self.update_static_layer(background)
+        self.update_cluster_layer(grids, clusterPriorities)
+        self.update_sensor_layer(sensors)
+
+        for layer in (self.staticLayer, self.clusterLayer):
+            cr.set_source_surface(layer, 0, 0)
+            cr.paint()
+
+        if selectedGrid is not None:
+            self.draw_selection(cr, selectedGrid)
+
+        cr.set_source_surface(self.sensorLayer, 0, 0)
+        cr.paint()
@@ -0,0 +1,179 @@
+"""
+streaming response bodies for the web handler
+
+json responses are encoded part by part as a jsonp callback, generators in the values are json arrays which are
+encoded item by item, so cells and sensors are not collected into one big list and one big string
+parts are joined into chunks of the wsgi body (iterable), the first chunk is sent before the whole body is encoded
+
+compact binary format (little-endian):
+    header  - magic "APSD" (4 bytes), version (uint8), kind (uint8), record count (uint32),
+              client or job id (uuid, 16 bytes), value (float64, objective of the sensors)
+    records - cells: cellId (uint32), clusterId (uint16)
+              sensors: sensorId (uint32), x (float32), y (float32), priority (float32)
+"""
+
+import json
+import struct
+import types
+import uuid
+
+import numpy
+
+jsonType = "application/json"
+binaryType = "application/octet-stream"
+
+chunkSize = 16 * 1024
+
+magic = "APSD"
+version = 1
+headerFormat = "<4sBBI16sd"
+
+cellKind = 1
+sensorKind = 2
+
+cellDtype = numpy.dtype([("cellId", "<u4"), ("clusterId", "<u2")])
+sensorDtype = numpy.dtype([("sensorId", "<u4"), ("x", "<f4"), ("y", "<f4"), ("priority", "<f4")])
+
+
+# JSON
+def iter_encode(value):
+    """
+    encoding value part by part (generators are encoded as arrays, their items are encoded with json.dumps)
+    """
+
+    if isinstance(value, types.GeneratorType):
+        yield "["
+
+        for i, item in enumerate(value):
+            yield (", " if i else "") + json.dumps(item)
+
+        yield "]"
+
+    elif isinstance(value, dict):
+        yield "{"
+
+        for i, (key, item) in enumerate(value.iteritems()):
+            yield (", " if i else "") + json.dumps(key) + ": "
+
+            for part in iter_encode(item):
+                yield part
+
+        yield "}"
+
+    elif isinstance(value, (list, tuple)):
+        yield "["
+
+        for i, item in enumerate(value):
+            if i:
+                yield ", "
+
+            for part in iter_encode(item):
+                yield part
+
+        yield "]"
+
+    else:
+        yield json.dumps(value)
+
+
+def chunked(parts, size=chunkSize):
+    """
+    joining small parts into chunks which are at least size bytes (except the last one)
+    """
+
+    buffer = []
+    bufferSize = 0
+
+    for part in parts:
+        buffer.append(part)
+        bufferSize += len(part)
+
+        if bufferSize >= size:
+            yield "".join(buffer)
+
+            buffer = []
+            bufferSize = 0
+
+    if buffer:
+        yield "".join(buffer)
+
+
+def stream_jsonp(value, callback="callback"):
+    """
+    :return
+        chunks (generator) - callback(json of the value)
+    """
+
+    def parts():
+        yield callback + "("
+
+        for part in iter_encode(value):
+            yield part
+
+        yield ")"
+
+    return chunked(parts())
+
+
+# BINARY
+def binary_header(kind, count, uid=None, value=0.0):
+    uidBytes = uuid.UUID(str(uid)).bytes if uid is not None else "\0" * 16
+
+    return struct.pack(headerFormat, magic, version, kind, count, uidBytes, value)
+
+
+def stream_binary(kind, records, uid=None, value=0.0, chunkRecords=4096):
+    """
+    :param
+        records (array) - cell or sensor records (cellDtype, sensorDtype)
+
+    :return
+        chunks (generator) - header and the records
+    """
+
+    yield binary_header(kind, len(records), uid, value)
+
+    for start in range(0, len(records), chunkRecords):
+        yield records[start:start + chunkRecords].tostring()
+
+
+def pack_cells(cellIds, clusterIds):
+    records = numpy.empty(len(cellIds), dtype=cellDtype)
+    records["cellId"] = cellIds
+    records["clusterId"] = clusterIds
+
+    return records
+
+
+def pack_sensors(sensors):
+    """
+    :param
+        sensors (dict list) - sensorId, xPos, yPos and priority of the sensors
+    """
+
+    records = numpy.empty(len(sensors), dtype=sensorDtype)
+
+    for i, s in enumerate(sensors):
+        records[i] = (s["sensorId"], s["xPos"], s["yPos"], s["priority"])
+
+    return records
+
+
+def unpack(data):
+    """
+    reading binary response (for clients and tests)
+
+    :return
+        kind (int), uid (string), value (float), records (array)
+    """
+
+    headerSize = struct.calcsize(headerFormat)
+    dataMagic, dataVersion, kind, count, uidBytes, value = struct.unpack(headerFormat, data[:headerSize])
+
+    if dataMagic != magic or dataVersion != version:
+        raise ValueError("Invalid binary response")
+
+    dtype = cellDtype if kind == cellKind else sensorDtype
+    records = numpy.frombuffer(data, dtype=dtype, count=count, offset=headerSize)
+
+    return kind, str(uuid.UUID(bytes=uidBytes)), value, records
@@ -0,0 +1,213 @@
+"""
+content-addressed cache for the clustering results of the images
+
+results are keyed by the hash of the image data and the parameters which change the result
+(image size, crop, radius, cluster count, clustering method and its seed), so same map requests can reuse
+grid features, cluster centers and cluster numbers without clustering again
+
+recently used results are kept in memory, all results are written to a directory as .npz files
+(atomically, with size-bounded eviction of the least recently used files)
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy
+
+from stencil import read_only
+
+
+def make_key(data, **params):
+    """
+    :param
+        data (string) - image data
+        params        - parameters of the result (json serializable values)
+
+    :return
+        key (string) - sha1 hex digest of the data and the parameters
+    """
+
+    digest = hashlib.sha1(data)
+    digest.update(json.dumps(params, sort_keys=True))
+
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    memory and disk cache for dicts of arrays
+
+    :param
+        maxItems (int)     - maximum result count in memory
+        cacheDir (string)  - directory of the result files (None: only memory)
+        diskBudget (int)   - maximum bytes of the result files
+
+        items (OrderedDict) - results in memory by key from the least recently used one
+        lock (Lock)         - lock for the memory results (disk files are written atomically)
+    """
+
+    def __init__(self, maxItems=32, cacheDir=None, diskBudget=256 * 2 ** 20):
+        if maxItems < 1 or diskBudget <= 0:
+            raise ValueError("Invalid range for result cache limits")
+
+        self.maxItems = maxItems
+        self.cacheDir = cacheDir
+        self.diskBudget = diskBudget
+
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+
+        self.memoryHitCnt = 0
+        self.diskHitCnt = 0
+        self.missCnt = 0
+
+        if cacheDir is not None and not os.path.isdir(cacheDir):
+            os.makedirs(cacheDir)
+
+    def file_path(self, key):
+        return os.path.join(self.cacheDir, key + ".npz")
+
+    def get(self, key):
+        """
+        :return
+            result (dict) - read-only arrays by name (None if the key is not found)
+        """
+
+        with self.lock:
+            result = self.items.pop(key, None)
+
+            if result is not None:
+                self.items[key] = result
+                self.memoryHitCnt += 1
+                return result
+
+        result = self.read_file(key)
+
+        with self.lock:
+            if result is None:
+                self.missCnt += 1
+                return None
+
+            self.diskHitCnt += 1
+            self.add_item(key, result)
+
+        return result
+
+    def put(self, key, result):
+        """
+        adding result to the memory and the disk
+
+        :param
+            result (dict) - arrays by name
+        """
+
+        result = dict((name, read_only(numpy.array(value))) for name, value in result.items())
+
+        with self.lock:
+            self.add_item(key, result)
+
+        if self.cacheDir is not None:
+            self.write_file(key, result)
+            self.trim_disk()
+
+    def add_item(self, key, result):
+        # lock is held by the caller
+        self.items.pop(key, None)
+        self.items[key] = result
+
+        while len(self.items) > self.maxItems:
+            self.items.popitem(last=False)
+
+    def read_file(self, key):
+        if self.cacheDir is None:
+            return None
+
+        path = self.file_path(key)
+
+        try:
+            with open(path, "rb") as f:
+                data = numpy.load(f)
+                result = dict((name, read_only(data[name])) for name in data.files)
+
+            # access time of the file is the order of the eviction
+            os.utime(path, None)
+
+        except (IOError, OSError, ValueError):
+            # not found, evicted by another thread or damaged
+            return None
+
+        return result
+
+    def write_file(self, key, result):
+        """
+        writing result to a temporary file and renaming it (readers never see a half written file)
+        """
+
+        fileNo, tempName = tempfile.mkstemp(prefix=".result_", suffix=".npz", dir=self.cacheDir)
+
+        try:
+            with os.fdopen(fileNo, "wb") as f:
+                numpy.savez(f, **result)
+
+            os.rename(tempName, self.file_path(key))
+        except:
+            os.remove(tempName)
+            raise
+
+    def disk_files(self):
+        """
+        :return
+            (modification time, size, path) of the result files from the least recently used one
+        """
+
+        files = []
+
+        for name in os.listdir(self.cacheDir):
+            if not name.endswith(".npz") or name.startswith("."):
+                continue
+
+            path = os.path.join(self.cacheDir, name)
+
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+
+            files.append((stat.st_mtime, stat.st_size, path))
+
+        return sorted(files)
+
+    def trim_disk(self):
+        """
+        removing least recently used result files until they fit in the disk budget
+        """
+
+        files = self.disk_files()
+        totalSize = sum(size for mtime, size, path in files)
+
+        for mtime, size, path in files[:-1]:
+            if totalSize <= self.diskBudget:
+                break
+
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+            totalSize -= size
+
+    def metrics(self):
+        with self.lock:
+            metrics = {"memoryItems": len(self.items), "memoryHits": self.memoryHitCnt, "diskHits": self.diskHitCnt,
+                       "misses": self.missCnt}
+
+        if self.cacheDir is not None:
+            files = self.disk_files()
+            metrics["diskItems"] = len(files)
+            metrics["diskBytes"] = sum(size for mtime, size, path in files)
+
+        return metrics
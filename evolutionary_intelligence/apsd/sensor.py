@@ -1,4 +1,4 @@
-class Sensor:
+class Sensor(object):
     """
     sensor object
 
@@ -9,8 +9,12 @@ class Sensor:
         yPos (int)       - location's y position
 
         priority (float) - priority value which is coming from clusters
+
+        connected (sensor list) - sensors in communication range
     """
 
+    __slots__ = ("sensorId", "xPos", "yPos", "priority", "connected")
+
     def __init__(self, sensorId, xPos, yPos, priority=0.0):
         self.sensorId = sensorId
 
@@ -2,12 +2,22 @@ import math
 import random
 import colorsys
 import copy
+import time
 
-from grid import Grid
 from sensor import Sensor
+from record_set import SensorSet, GridSet
+from priority_queue import PriorityQueue
+from spatial_index import SpatialIndex
+from connectivity import ComponentCounter
+from fitness_cache import FitnessCache
+from clustering.cluster_lookup import ClusterLookup
 
 import image_handler
-from subject import Subject
+import instrument
+import parallel_annealing
+import parallel_evaluation
+from subject import Subject, SensorEvent, ProgressEvent
+from config import Config
 
 import array
 import random
@@ -30,20 +40,30 @@ class SensorArea(Subject):
 
         :param
             sensors (sensor list) - list of sensors will deploy to the sensor area
+            sensorIndex (SpatialIndex) - grid edge sized cells index of the sensors for finding connected sensors
+            components (ComponentCounter) - connected components of the sensors (union-find)
 
-            grids (grid list)     - grids on the sensor area
+            grids (GridSet)       - grids on the sensor area
             pixels (pixel matrix) - matrix for each pixel's color value information
+            pixelArray (uint8 array) - rgb color values of the image (width x height x 3)
 
             cfg (Config)          - Config instance for global parameters
+            iterationCnt (int)    - step count of the last deployment or optimization (sensors, iterations, generations)
         """
         Subject.__init__(self)
         
         self.sensors = []
+        self.sensorIndex = SpatialIndex(cfg.gridEdge)
+        self.components = ComponentCounter()
 
         self.grids = []
         self.pixels = []
+        self.pixelArray = None
 
         self.cfg = cfg
+        self.iterationCnt = 0
+
+        self.set_notification_rate(cfg.notificationRate)
 
         self.initialize_grids()
 
@@ -97,8 +117,12 @@ class SensorArea(Subject):
         """
         colorAvgStd = colorAvg + colorStdDev
 
-        # find cluster, then priority value
-        nearestClusterIndex = self.cfg.clusteringMethod.find_nearest_cluster(colorAvgStd)
+        # find cluster (from lookup table if it is precomputed), then priority value
+        if self.cfg.clusterLookup is not None:
+            nearestClusterIndex = self.cfg.clusterLookup.nearest(colorAvgStd)
+        else:
+            nearestClusterIndex = self.cfg.clusteringMethod.find_nearest_cluster(colorAvgStd)
+
         priority = self.cfg.clusterPriorities[nearestClusterIndex] * sizeRatio
 
         return priority, nearestClusterIndex
@@ -129,12 +153,13 @@ class SensorArea(Subject):
                 # covert to hsv
                 self.covertedPixels[w][h] = colorsys.rgb_to_hsv(pixel[0], pixel[1], pixel[2])
 
-    def import_satellite_image(self, imageFile):
+    def import_satellite_image(self, imageFile, gridFeatures=None):
         """
         importing saved map image for sensor area
 
         :param
-            imageFile - saved map image
+            imageFile            - saved map image
+            gridFeatures (array) - cached color features of the grids (see import_pixel_array)
 
         :return:
             grids with their color information
@@ -142,62 +167,187 @@ class SensorArea(Subject):
         self.pixels = imageFile.load()
 
         # self.convert_color_space()
-        for grid in self.grids:
-            self.set_grid_color(grid)
+        self.import_pixel_array(image_handler.image_to_array(imageFile), gridFeatures)
+
+    def import_pixel_array(self, pixelArray, gridFeatures=None):
+        """
+        importing color array (it can be memory-mapped for big images, see image_handler.load_image_tiled)
+
+        :param
+            pixelArray (uint8 array) - rgb color values (width x height x 3)
+            gridFeatures (array)     - color features of the grids which are found before for the same image
+                                       (grid_features), they are not calculated again (None: calculating)
+
+        :return:
+            grids with their color information
+        """
+
+        if pixelArray.shape[:2] != (self.cfg.width, self.cfg.height):
+            raise ValueError("Image size is different from sensor area size")
+
+        self.set_pixel_array(pixelArray)
+
+        if gridFeatures is None:
+            self.set_grid_colors()
+        else:
+            self.set_grid_features(gridFeatures)
+
+    def set_pixel_array(self, pixelArray):
+        """
+        setting rgb color values of the image for coverage engine
+        """
+
+        self.pixelArray = pixelArray
+        self.cfg.coverage.set_pixels(pixelArray)
+
+    def export_context(self):
+        """
+        exporting parameters, image and clustering information to create same sensor area in another process
+
+        :return
+            context (dict) - picklable sensor area information
+        """
+
+        cfg = self.cfg
+        pixels, pixelFile = self.pixelArray, None
+
+        # memory-mapped image is opened again in the other process (pickling copies the whole array)
+        if isinstance(pixels, numpy.memmap) and pixels.filename is not None:
+            pixels, pixelFile = None, (pixels.filename, pixels.shape)
+
+        return {"width": cfg.width, "height": cfg.height, "radius": cfg.radius,
+                "sensorCnt": cfg.sensorCnt, "clusterCnt": cfg.clusterCnt,
+                "clusterPriorities": list(cfg.clusterPriorities), "clusteringMethod": cfg.clusteringMethod,
+                "clusterLookup": cfg.clusterLookup,
+                "coverageEngine": cfg.coverageEngine, "tileSize": cfg.tileSize,
+                "tileMemoryBudget": cfg.tileMemoryBudget, "tileDir": cfg.tileDir, "pixels": pixels,
+                "pixelFile": pixelFile}
 
     # GRID FUNCTIONS
-    def set_grid_color(self, grid):
+    def set_grid_colors(self):
         """
-        set grid's color information (color averages and their standard deviation values)
+        set grids' color information (color averages and their standard deviation values)
 
-        scan the grid from left to right and from top to bottom and find averages and std dev for each pixel's colors
+        color sums of the grids are found with reduce passes over the image tile by tile (tile edges are
+        multiples of grid edge, grid blocks at the right and bottom edges are smaller),
+        then averages and standard deviations are written into grids' records
         """
 
-        c1, c2, c3 = [], [], []
-        width, height = self.cfg.width, self.cfg.height
+        edge = self.cfg.gridEdge
+        tileEdge = max(self.cfg.tileSize // edge, 1) * edge
+
+        xStarts = numpy.arange(0, self.cfg.width, edge)
+        yStarts = numpy.arange(0, self.cfg.height, edge)
+
+        sums = numpy.zeros((len(xStarts), len(yStarts), 3), dtype=numpy.int64)
+        sumSqs = numpy.zeros_like(sums)
+
+        for xTile in range(0, self.cfg.width, tileEdge):
+            for yTile in range(0, self.cfg.height, tileEdge):
+                area = (slice(xTile // edge, (xTile + tileEdge) // edge),
+                        slice(yTile // edge, (yTile + tileEdge) // edge))
+                pixels = image_handler.read_block(self.pixelArray, xTile, min(xTile + tileEdge, self.cfg.width),
+                                                  yTile, min(yTile + tileEdge, self.cfg.height))
+
+                sums[area], sumSqs[area] = self.calc_block_sums(pixels, edge)
 
-        # scan all grid area
-        for coor in self.cfg.gridCoordinates:
-            x = coor[0] + grid.xPos
-            y = coor[1] + grid.yPos
-            # coordinate should in the area
-            if (0 <= x < width) and (0 <= y < height):
-                pixel = self.pixels[x, y]
+        xSizes = numpy.diff(numpy.append(xStarts, self.cfg.width))
+        ySizes = numpy.diff(numpy.append(yStarts, self.cfg.height))
+        counts = (xSizes[:, None] * ySizes[None, :])[:, :, None]
 
-                c1 += [pixel[0]]
-                c2 += [pixel[1]]
-                c3 += [pixel[2]]
+        # grid ids are row by row (column x row x 3 -> row x column x 3)
+        sums = sums.transpose(1, 0, 2).reshape(-1, 3)
+        sumSqs = sumSqs.transpose(1, 0, 2).reshape(-1, 3)
+        counts = counts.transpose(1, 0, 2).reshape(-1, 1)
 
-        if c1 and c2 and c3:
-            grid.colorAvg, grid.colorStdDev = self.calc_avg_std([c1, c2, c3])
+        records = self.grids.records
+        records["colorAvg"] = sums / counts.astype(float)
+        records["colorStdDev"] = numpy.sqrt((counts * sumSqs - sums * sums) / (counts * counts).astype(float))
+
+    def calc_block_sums(self, pixels, edge):
+        """
+        finding color sums and squared color sums of edge x edge blocks of the pixels
+
+        :return
+            sums (int array)   - color sums (block column x block row x 3)
+            sumSqs (int array) - squared color sums (block column x block row x 3)
+        """
+
+        xStarts = numpy.arange(0, pixels.shape[0], edge)
+        yStarts = numpy.arange(0, pixels.shape[1], edge)
+
+        # squared color values fit in uint16, squared sums of one grid fit in uint32 for usual radius values
+        squares = pixels.astype(numpy.uint16)
+        squares *= squares
+        dtype = numpy.uint32 if edge * edge * 255 ** 2 < 2 ** 32 else numpy.int64
+
+        # columns of a grid are reduced first (y axis is contiguous)
+        sums = numpy.add.reduceat(numpy.add.reduceat(pixels, yStarts, axis=1, dtype=dtype), xStarts, axis=0)
+        sumSqs = numpy.add.reduceat(numpy.add.reduceat(squares, yStarts, axis=1, dtype=dtype), xStarts, axis=0)
+
+        return sums, sumSqs
+
+    def grid_features(self):
+        """
+        color averages and standard deviations of the grids as clustering input
+
+        :return
+            feature matrix (grid count x 6)
+        """
+
+        return numpy.hstack((self.grids.column("colorAvg"), self.grids.column("colorStdDev")))
+
+    def set_grid_features(self, features):
+        """
+        setting color averages and standard deviations of the grids from the feature matrix (grid_features)
+        """
+
+        features = numpy.asarray(features, dtype=float)
+
+        if features.shape != (len(self.grids), 6):
+            raise ValueError("Grid features are different from sensor area grids")
+
+        records = self.grids.records
+        records["colorAvg"] = features[:, :3]
+        records["colorStdDev"] = features[:, 3:]
+
+    def export_clustering(self):
+        """
+        exporting clustering result of the grids to reuse it for the same image and parameters
+
+        :return
+            clustering (dict) - grid features, cluster centers and cluster number of each grid (arrays)
+        """
+
+        return {"features": self.grid_features(),
+                "centers": numpy.array(self.cfg.clusteringMethod.clusterCenters, dtype=float),
+                "labels": self.grids.column("clusterNum").copy()}
 
     def initialize_grids(self):
         """
         finding grids' locations and size ratios
 
         :return
-            grids with their locations, and their size ratios
+            grids with their locations, and their size ratios (GridSet, grid ids are row by row)
         """
 
-        self.grids = []
         radius, edge = self.cfg.radius, self.cfg.gridEdge
         width, height = self.cfg.width, self.cfg.height
         columnCnt, rowCnt = self.cfg.columnCnt, self.cfg.rowCnt
 
-        for r in range(rowCnt):
-            for c in range(columnCnt):
-                gridId = columnCnt * r + c
-
-                xPos = ((gridId % columnCnt) * edge) + radius
-                yPos = (r * edge) + radius
+        self.grids = GridSet(columnCnt * rowCnt)
+        records = self.grids.records
 
-                xSize = edge if (xPos + radius) <= width else (width - xPos) + radius
-                ySize = edge if (yPos + radius) <= height else (height - yPos) + radius
+        gridIds = numpy.arange(columnCnt * rowCnt)
+        records["gridId"] = gridIds
+        records["xPos"] = (gridIds % columnCnt) * edge + radius
+        records["yPos"] = (gridIds // columnCnt) * edge + radius
 
-                sizeRatio = 1.0 if (xSize == edge) and (ySize == edge) else (xSize * ySize) / (edge ** 2.0)
+        # grids at the right and bottom edges can be smaller
+        xSizes = numpy.minimum(width - records["xPos"] + radius, edge)
+        ySizes = numpy.minimum(height - records["yPos"] + radius, edge)
 
-                grid = Grid(gridId, xPos, yPos, sizeRatio)
-                self.grids.append(grid)
+        records["sizeRatio"] = (xSizes * ySizes) / (edge ** 2.0)
 
     # SENSOR FUNCTIONS
     def find_connected_sensors(self, xPos, yPos, sensors):
@@ -221,27 +371,123 @@ class SensorArea(Subject):
 
         return connectedList
 
+    def find_neighbour_sensors(self, xPos, yPos, sensorId=None):
+        """
+        finding connected sensors with sensor index (only sensors in neighbour cells are checked)
+
+        :param
+            xPos (int)     - x coordinate of sensor
+            yPos (int)     - y coordinate of sensor
+            sensorId (int) - if it is given, only sensors which have bigger ids are returned
+
+        :return
+            connected sensors ordered by their ids
+        """
+
+        connectedList = self.sensorIndex.query(xPos, yPos, self.cfg.gridEdge)
+
+        if sensorId is not None:
+            connectedList = [s for s in connectedList if s.sensorId > sensorId]
+
+        return sorted(connectedList, key=lambda s: s.sensorId)
+
+    def add_sensor(self, sensor):
+        """
+        adding sensor to sensors list and sensor index
+        """
+
+        self.sensors.append(sensor)
+        self.sensorIndex.insert(sensor, sensor.xPos, sensor.yPos)
+
+    def move_sensor(self, sensor, xPos, yPos):
+        """
+        changing sensor's location and updating sensor index
+        """
+
+        sensor.xPos = xPos
+        sensor.yPos = yPos
+
+        self.sensorIndex.move(sensor, xPos, yPos)
+
     def get_intersection_sensors(self):
         """
         getting intersection point sensors (vertices of the grids)
+
+        :return
+            intersection sensors (SensorSet, ids start after grid ids)
         """
 
-        intersectionSensors = []
-        cnt = len(self.grids)
         edge = self.cfg.gridEdge
         width, height = self.cfg.width, self.cfg.height
 
         # from (0,0) to (width, height) all grid edge distances are intersection point
-        for w in range(0, width + 1, edge):
-            for h in range(0, height + 1, edge):
-                sensor = Sensor(cnt, w, h)
-                sensor.priority, c = self.calc_priority(sensor.xPos, sensor.yPos)
+        xPos = numpy.arange(0, width + 1, edge)
+        yPos = numpy.arange(0, height + 1, edge)
+
+        intersectionSensors = SensorSet(len(xPos) * len(yPos))
+        records = intersectionSensors.records
 
-                intersectionSensors.append(sensor)
-                cnt += 1
+        records["sensorId"] = numpy.arange(len(records)) + len(self.grids)
+        records["xPos"] = numpy.repeat(xPos, len(yPos))
+        records["yPos"] = numpy.tile(yPos, len(xPos))
+
+        self.score_sensors(intersectionSensors)
 
         return intersectionSensors
 
+    def get_fake_sensors(self):
+        """
+        getting fake sensors at the centers of the grids and at the intersection points
+
+        :return
+            fake sensors (SensorSet, ids are positions in the set) with priorities for current coverage
+        """
+
+        gridSensors = SensorSet(len(self.grids))
+        records = gridSensors.records
+
+        for field in ("xPos", "yPos"):
+            records[field] = self.grids.column(field)
+
+        records["sensorId"] = self.grids.column("gridId")
+        self.score_sensors(gridSensors)
+
+        return gridSensors.concatenate(self.get_intersection_sensors())
+
+    def score_sensors(self, sensors):
+        """
+        finding priority values and cluster numbers of the sensors in the set
+        """
+
+        records = sensors.records
+
+        priorities, clusterNums = records["priority"], records["clusterNum"]
+        positions = sensors.positions()
+
+        for i in self.cfg.coverage.access_order(records["xPos"], records["yPos"]):
+            priorities[i], clusterNums[i] = self.calc_priority(*positions[i])
+
+    # NOTIFICATION FUNCTIONS
+    def notify_sensor(self, sensor):
+        """
+        notifying observers about the deployed sensor (event is created only if there is an observer)
+        """
+
+        if self.has_observers():
+            self.notify(SensorEvent("deploy", sensor.sensorId, (sensor.xPos, sensor.yPos), sensor.priority))
+
+    def notify_progress(self, name, value, iteration=None, temperature=None):
+        if self.has_observers():
+            self.notify(ProgressEvent(name, value, iteration, temperature))
+
+    def notify_result(self, name, value):
+        """
+        notifying result of the deployment and delivering pending notifications
+        """
+
+        self.notify_progress(name, value)
+        self.flush()
+
     # SENSOR DEPLOYMENT FUNCTIONS
     def cover(self, xPos, yPos, sensorId):
         """
@@ -258,16 +504,10 @@ class SensorArea(Subject):
             covered coverageMatrix with sensorId
         """
 
-        width, height = self.cfg.width, self.cfg.height
-        cM = self.cfg.coverageMatrix
-
-        for coor in self.cfg.sensorCoordinates:
-            x = coor[0] + xPos
-            y = coor[1] + yPos
+        self.cfg.coverage.cover(xPos, yPos, sensorId)
 
-            if (0 <= x < width) and (0 <= y < height):
-                if cM[x][y] == -1 or sensorId <= cM[x][y]:
-                    cM[x][y] = sensorId
+        if instrument.enabled:
+            instrument.count("coverage.scanned", self.cfg.sensorCoorCnt)
 
     def uncover(self, xPos, yPos, sensorId):
         """
@@ -282,16 +522,94 @@ class SensorArea(Subject):
             uncovered coverageMatrix
         """
 
-        width, height = self.cfg.width, self.cfg.height
-        cM = self.cfg.coverageMatrix
+        self.cfg.coverage.uncover(xPos, yPos, sensorId)
+
+        if instrument.enabled:
+            instrument.count("coverage.scanned", self.cfg.sensorCoorCnt)
+
+    def coverage_ratio(self):
+        """
+        ratio of the covered pixels in the image (popcount of the coverage plane with bits engine)
+        """
+
+        return float(self.cfg.coverage.covered_count()) / (self.cfg.width * self.cfg.height)
+
+    def calc_color_features(self, coveredCnt, sums, sumSqs):
+        """
+        finding color average, standard deviation and size ratio with color sums of the covered pixels
+
+        :param
+            coveredCnt (int)  - number of covered pixels (should be bigger than 1)
+            sums (int list)   - sum of the color values for each color
+            sumSqs (int list) - sum of the squared color values for each color
+
+        :return:
+            colorAvg (list)    - average values for each color
+            colorStdDev (list) - standard deviation values for each color
+            sizeRatio (float)  - coverage ratio for sensor
+        """
+
+        rsum, gsum, bsum = sums
+        rsumSq, gsumSq, bsumSq = sumSqs
+
+        sizeRatio = float(coveredCnt) / self.cfg.gridCoorCnt
+        colorAvg = [rsum/coveredCnt, gsum/coveredCnt, bsum/coveredCnt]
+        colorStdDev = [math.sqrt((rsumSq-(rsum*rsum)/coveredCnt)/(coveredCnt-1)),
+                       math.sqrt((gsumSq-(gsum*gsum)/coveredCnt)/(coveredCnt-1)),
+                       math.sqrt((bsumSq-(bsum*bsum)/coveredCnt)/(coveredCnt-1))
+                       ]
+
+        return colorAvg, colorStdDev, sizeRatio
+
+    def calc_color_priority(self, coveredCnt, sums, sumSqs):
+        """
+        finding priority value and cluster number with color sums of the covered pixels
+
+        :param
+            coveredCnt (int)  - number of covered pixels
+            sums (int list)   - sum of the color values for each color
+            sumSqs (int list) - sum of the squared color values for each color
+
+        :return:
+            priority (float)          - priority value for sensor (clusterPriority * sizeRatio)
+            nearestClusterIndex (int) - cluster number for sensor
+        """
+
+        if coveredCnt > 1:
+            colorAvg, colorStdDev, sizeRatio = self.calc_color_features(coveredCnt, sums, sumSqs)
+
+            return self.find_cluster_and_priority(colorAvg, colorStdDev, sizeRatio)
+        else:
+            return 0.0, -1
+
+    def precompute_cluster_lookup(self):
+        """
+        creating nearest cluster lookup table after clustering and filling it with the features of the grids
+        and the candidate sensor locations (grid centers and intersections) in one vectorized step
 
-        for coor in self.cfg.sensorCoordinates:
-            x = coor[0] + xPos
-            y = coor[1] + yPos
+        :return
+            cluster lookup table (Config.clusterLookup)
+        """
+
+        lookup = ClusterLookup(self.cfg.clusteringMethod, self.cfg.clusterLookupStep)
+        features = self.grid_features().tolist()
+
+        edge = self.cfg.gridEdge
 
-            if (0 <= x < width) and (0 <= y < height):
-                if sensorId == cM[x][y]:
-                    cM[x][y] = -1
+        candidates = [(grid.xPos, grid.yPos) for grid in self.grids] + \
+                     [(w, h) for w in range(0, self.cfg.width + 1, edge) for h in range(0, self.cfg.height + 1, edge)]
+
+        for xPos, yPos in candidates:
+            coveredCnt, sums, sumSqs = self.cfg.coverage.color_sums(xPos, yPos)
+
+            if coveredCnt > 1:
+                colorAvg, colorStdDev, sizeRatio = self.calc_color_features(coveredCnt, sums, sumSqs)
+                features.append(colorAvg + colorStdDev)
+
+        lookup.nearest_batch(features)
+        self.cfg.clusterLookup = lookup
+
+        return lookup
 
     def calc_priority(self, xPos, yPos):
         """
@@ -300,58 +618,20 @@ class SensorArea(Subject):
         :param
             xPos (int)     - x coordinate of sensor
             yPos (int)     - y coordinate of sensor
-            sensorId (int) - sensorId of current sensor
 
         :return:
             priority (float)          - priority value for sensor (clusterPriority * sizeRatio)
             nearestClusterIndex (int) - cluster number for sensor
         """
 
-        coveredCnt = 0
-        # c1, c2, c3 = [], [], []
-        width, height = self.cfg.width, self.cfg.height
-        cM = self.cfg.coverageMatrix
-
-        rsum = 0
-        bsum = 0
-        gsum = 0
-        rsumSq = 0
-        bsumSq = 0
-        gsumSq = 0
-
-        for coor in self.cfg.sensorCoordinates:
-            x = coor[0] + xPos
-            y = coor[1] + yPos
-
-            if (0 <= x < width) and (0 <= y < height):
-                if cM[x][y] == -1:
-                    pixel = self.pixels[x, y]
-
-                    # c1 += [pixel[0]]
-                    r = pixel[0]
-                    rsum += r
-                    rsumSq += r*r
-                    # c2 += [pixel[1]]
-                    g = pixel[1]
-                    gsum += g
-                    gsumSq += g*g
-                    # c3 += [pixel[2]]
-                    b = pixel[2]
-                    bsum += b
-                    bsumSq += b*b
-
-                    coveredCnt += 1
+        coveredCnt, sums, sumSqs = self.cfg.coverage.color_sums(xPos, yPos)
 
-        if coveredCnt > 1:
-            sizeRatio = float(coveredCnt) / self.cfg.gridCoorCnt
-            colorAvg = [rsum/coveredCnt, gsum/coveredCnt, bsum/coveredCnt]
-            colorStdDev = [math.sqrt((rsumSq-(rsum*rsum)/coveredCnt)/(coveredCnt-1)),
-                           math.sqrt((gsumSq-(gsum*gsum)/coveredCnt)/(coveredCnt-1)),
-                           math.sqrt((bsumSq-(bsum*bsum)/coveredCnt)/(coveredCnt-1))
-                           ]
-            return self.find_cluster_and_priority(colorAvg, colorStdDev, sizeRatio)
-        else:
-            return 0.0, -1
+        if instrument.enabled:
+            instrument.count("calc_priority")
+            instrument.count("coverage.scanned", self.cfg.sensorCoorCnt)
+            instrument.count("coverage.selected", coveredCnt)
+
+        return self.calc_color_priority(coveredCnt, sums, sumSqs)
 
     def cover_and_priority(self, xPos, yPos, sensorId):
         """
@@ -375,53 +655,14 @@ class SensorArea(Subject):
             covered coverageMatrix with sensorId
         """
 
-        coveredCnt = 0
-        # c1, c2, c3 = [], [], []
+        coveredCnt, sums, sumSqs = self.cfg.coverage.cover_and_color_sums(xPos, yPos, sensorId)
 
-        width, height = self.cfg.width, self.cfg.height
-        cM = self.cfg.coverageMatrix
-
-        rsum = 0
-        bsum = 0
-        gsum = 0
-        rsumSq = 0
-        bsumSq = 0
-        gsumSq = 0
-
-        for coor in self.cfg.sensorCoordinates:
-            x = coor[0] + xPos
-            y = coor[1] + yPos
-
-            if (0 <= x < width) and (0 <= y < height):
-                if cM[x][y] == -1 or sensorId <= cM[x][y]:
-                    pixel = self.pixels[x, y]
-
-                    # c1 += [pixel[0]]
-                    r = pixel[0]
-                    rsum += r
-                    rsumSq += r*r
-                    # c2 += [pixel[1]]
-                    g = pixel[1]
-                    gsum += g
-                    gsumSq += g*g
-                    # c3 += [pixel[2]]
-                    b = pixel[2]
-                    bsum += b
-                    bsumSq += b*b
-                    coveredCnt += 1
-                    cM[x][y] = sensorId
+        if instrument.enabled:
+            instrument.count("cover_and_priority")
+            instrument.count("coverage.scanned", self.cfg.sensorCoorCnt)
+            instrument.count("coverage.selected", coveredCnt)
 
-        if coveredCnt > 1:
-            colorAvg = [rsum/coveredCnt, gsum/coveredCnt, bsum/coveredCnt]
-            colorStdDev = [math.sqrt((rsumSq-(rsum*rsum)/coveredCnt)/(coveredCnt-1)),
-                           math.sqrt((gsumSq-(gsum*gsum)/coveredCnt)/(coveredCnt-1)),
-                           math.sqrt((bsumSq-(bsum*bsum)/coveredCnt)/(coveredCnt-1))
-                           ]
-            sizeRatio = float(coveredCnt) / self.cfg.gridCoorCnt
-
-            return self.find_cluster_and_priority(colorAvg, colorStdDev, sizeRatio)
-        else:
-            return 0.0, -1
+        return self.calc_color_priority(coveredCnt, sums, sumSqs)
 
     def clear_deployment(self):
         """
@@ -430,7 +671,10 @@ class SensorArea(Subject):
 
         self.cfg.clear_coverage()
         self.sensors = []
+        self.sensorIndex.clear()
+        self.components.clear()
 
+    @instrument.timed("deployment.pq")
     def pq_deployment(self):
         """
         priority queue deployment
@@ -440,8 +684,14 @@ class SensorArea(Subject):
 
         if sensors are more than fake sensors (same number of grids) call to remaining deployment
 
+        priority queue is an indexed max-heap, only fake sensors around the deployed sensor are scored again
+        same priorities are ordered like the stable sorted fake sensors list:
+            - fake sensors whose priority are increased go before the others with the same priority
+            - fake sensors whose priority are decreased go after the others with the same priority
+
         :param
             fakeSensors - assume that there are some sensors center of grids (original and from intersection points)
+            fakeIndex (SpatialIndex) - fake sensor indices in grid edge sized cells for finding connected fake sensors
 
         :return
             deployed sensors in sensor area
@@ -451,51 +701,81 @@ class SensorArea(Subject):
 
         self.clear_deployment()
 
-        fakeSensors = []
+        startTime = time.time()
+        fakeSensors = self.get_fake_sensors()
+        scoringTime = time.time() - startTime
 
-        for grid in self.grids:
-            sensor = Sensor(grid.gridId, grid.xPos, grid.yPos)
-            sensor.priority, c = self.calc_priority(sensor.xPos, sensor.yPos)
+        startTime = time.time()
+        edge = self.cfg.gridEdge
 
-            fakeSensors.append(sensor)
+        queue = PriorityQueue()
+        fakeIndex = SpatialIndex(edge)
 
-        intersectionSensors = self.get_intersection_sensors()
+        positions = fakeSensors.positions()
+        priorities = fakeSensors.column("priority").tolist()
 
-        fakeSensors += intersectionSensors
+        for i in numpy.flatnonzero(fakeSensors.column("priority") != 0).tolist():
+            queue.push(i, priorities[i], i)
+            fakeIndex.insert(i, *positions[i])
 
-        fakeSensors = filter(lambda s: s.priority != 0, fakeSensors)
-        fakeSensors = sorted(fakeSensors, key=lambda s: s.priority)
+        lowOrder, highOrder = -1, len(fakeSensors)
+        queueTime = time.time() - startTime
 
+        startTime = time.time()
         sensorCnt = self.cfg.sensorCnt
         for i in range(sensorCnt):
-            best = fakeSensors.pop()
+            best, priority = queue.pop()
 
-            sensor = Sensor(i, best.xPos, best.yPos, best.priority)
+            sensor = Sensor(i, fakeSensors[best].xPos, fakeSensors[best].yPos, priority)
             self.cover(sensor.xPos, sensor.yPos, sensor.sensorId)
-            self.sensors.append(sensor)
+            self.add_sensor(sensor)
+            fakeIndex.remove(best)
+
+            # find connected fake sensors in the queue and score them again
+            changed = []
 
-            connectedSensors = self.find_connected_sensors(sensor.xPos, sensor.yPos, fakeSensors)
-            for s in connectedSensors:
+            for j in fakeIndex.query(sensor.xPos, sensor.yPos, edge):
+                s = fakeSensors[j]
                 s.priority, c = self.calc_priority(s.xPos, s.yPos)
 
-            fakeSensors = filter(lambda s: s.priority != 0, fakeSensors)
-            fakeSensors = sorted(fakeSensors, key=lambda s: s.priority)
+                if s.priority != queue.priority(j):
+                    changed.append((queue.priority(j), queue.order(j), j))
+
+            # changed fake sensors are ordered with their old (priority, order) like stable sorting
+            changed.sort()
+            below = [j for p, o, j in changed if 0 < p < fakeSensors[j].priority]
+            above = [j for p, o, j in changed if 0 < fakeSensors[j].priority < p]
+
+            for k, j in enumerate(below):
+                queue.push(j, fakeSensors[j].priority, lowOrder - len(below) + 1 + k)
+            for k, j in enumerate(above):
+                queue.push(j, fakeSensors[j].priority, highOrder + k)
+            for p, o, j in changed:
+                if fakeSensors[j].priority == 0:
+                    queue.remove(j)
+                    fakeIndex.remove(j)
 
-            if not fakeSensors:
+            lowOrder -= len(below)
+            highOrder += len(above)
+
+            if not queue:
                 start = i + 1
                 totalSensor = sensorCnt - start
 
                 self.remaining_deployment(start, totalSensor)
                 break
 
-            log_message = "Sensor" + " " + str(sensor.sensorId) + " " + \
-                          str(sensor.xPos) + " " + str(sensor.yPos) + " " + str(sensor.priority)
-            self.notify(log_message)
+            self.notify_sensor(sensor)
+
+        deploymentTime = time.time() - startTime
+
+        print "Scoring: {0} sec., Queue: {1} sec., Deployment: {2} sec.".format(
+            round(scoringTime, 4), round(queueTime, 4), round(deploymentTime, 4))
 
         result = sum([sensor.priority for sensor in self.sensors])
+        self.iterationCnt = len(self.sensors)
 
-        log_message = "PQ:" + " " + str(result)
-        self.notify(log_message)
+        self.notify_result("PQ", result)
         print "Priority: " + str(result),
 
         return result
@@ -526,18 +806,17 @@ class SensorArea(Subject):
             sensor = Sensor(start + i, best.xPos + moveX, best.yPos + moveY)
             sensor.priority, c = self.cover_and_priority(sensor.xPos, sensor.yPos, sensor.sensorId)
 
-            self.sensors.append(sensor)
+            self.add_sensor(sensor)
 
-            log_message = "Sensor" + " " + str(sensor.sensorId) + " " + \
-                          str(sensor.xPos) + " " + str(sensor.yPos) + " " + str(sensor.priority)
-            self.notify(log_message)
+            self.notify_sensor(sensor)
 
+    @instrument.timed("deployment.random")
     def random_deployment(self):
         print "\n-> Random Deployment"
 
         self.clear_deployment()
 
-        grids = filter(lambda g: g.priority != 0, self.grids)
+        grids = list(self.grids.filter(self.grids.column("priority") != 0))
         sensorCnt = self.cfg.sensorCnt
         width, height = self.cfg.width, self.cfg.height
 
@@ -550,11 +829,9 @@ class SensorArea(Subject):
 
             if sensor.priority != 0:
                 self.cover(sensor.xPos, sensor.yPos, sensor.sensorId)
-                self.sensors.append(sensor)
+                self.add_sensor(sensor)
 
-                log_message = "Sensor" + " " + str(sensor.sensorId) + " " + \
-                              str(sensor.xPos) + " " + str(sensor.yPos) + " " + str(sensor.priority)
-                self.notify(log_message)
+                self.notify_sensor(sensor)
 
             if not grids:
                 start = i + 1
@@ -567,40 +844,39 @@ class SensorArea(Subject):
                     sensor = Sensor(start + j, xPos, yPos)
                     sensor.priority, c = self.calc_priority(sensor.xPos, sensor.yPos)
 
-                    log_message = "Sensor" + " " + str(sensor.sensorId) + " " + \
-                                  str(sensor.xPos) + " " + str(sensor.yPos) + " " + str(sensor.priority)
-
                     if sensor.priority != 0:
                         self.cover(sensor.xPos, sensor.yPos, sensor.sensorId)
-                        self.sensors.append(sensor)
+                        self.add_sensor(sensor)
                     else:
                         j -= 1
 
-                    self.notify(log_message)
+                    self.notify_sensor(sensor)
                 break
 
         result = sum([sensor.priority for sensor in self.sensors])
+        self.iterationCnt = len(self.sensors)
 
-        self.notify(result)
+        self.notify_result("Random", result)
         print "Priority: " + str(result),
 
         return result
 
     # OPTIMIZATION FUNCTIONS
-    def simulated_annealing(self):
+    @instrument.timed("deployment.simulated_annealing")
+    def simulated_annealing(self, temperature=0.3, absoluteTemperature=0.05, coolingRate=0.9995):
         """
         finding better solution for deployment with simulated annealing optimization method
 
+        objective is updated with deltas of the moved sensor and its connected sensors,
+        rejected moves are undone with the coverage journal and saved priorities
+
         :param
             temperature (float)         - SA steps starting value
             coolingRate (float)         - each step temperature multiplied by coolingRate to reach absoluteTemperature
             absoluteTemperature (float) - SA steps ending value
 
-            moveX (int)                 - random movement value for x coordinate (random sensor move at each SA step)
-            moveY (int)                 - random movement value for y coordinate (random sensor move at each SA step)
-
+            totalPriority (float)       - running total priority of the sensors
             maxPriority (float)         - update maxPriority if current deployment is better
-            delta (float)               - difference between current deployment p
 
         :return
             deployed sensors which are optimized their priorities and locations
@@ -609,103 +885,239 @@ class SensorArea(Subject):
         print "-> Simulated Annealing Optimization"
         iterCnt = 0
 
-        temperature = 0.3
-        coolingRate = 0.9995
-        absoluteTemperature = 0.05
+        totalPriority, maxPriority = self.start_annealing()
+
+        while temperature > absoluteTemperature:
+            totalPriority, maxPriority, event = self.annealing_step(temperature, totalPriority, maxPriority)
+
+            temperature *= coolingRate
+            iterCnt += 1
+
+            if event is not None:
+                self.notify(event)
+                self.notify_progress("MaxPriority", maxPriority, iterCnt, temperature)
+
+        self.iterationCnt = iterCnt
+        self.notify_result("SA", maxPriority)
+
+        print "iteration:", iterCnt
+        print "Priority:", maxPriority,
+
+        return maxPriority
+
+    def start_annealing(self):
+        """
+        finding connected components and objective value of the current deployment
+
+        :return
+            totalPriority (float) - total priority of the sensors
+            objective (float)     - total priority / connected component count
+        """
 
         self.find_connected_component()
-        maxPriority = sum([sensor.priority for sensor in self.sensors]) / float(self.calc_connected_component())
+        totalPriority = sum([sensor.priority for sensor in self.sensors])
+
+        return totalPriority, totalPriority / float(self.calc_connected_component())
+
+    def annealing_step(self, temperature, totalPriority, maxPriority):
+        """
+        one simulated annealing step: moving random sensor and accepting or rejecting the new deployment
+
+        :param
+            temperature (float)   - current temperature
+            totalPriority (float) - running total priority of the sensors
+            maxPriority (float)   - objective value of the current deployment
+
+            moveX (int)           - random movement value for x coordinate
+            moveY (int)           - random movement value for y coordinate
+            delta (float)         - difference between new and current deployment objective values
+
+        :return
+            totalPriority (float) - updated total priority
+            maxPriority (float)   - updated objective value
+            event (SensorEvent)   - old and new location of the moved sensor (None if there is no observer)
+        """
+
         radius = self.cfg.radius
+        coverage = self.cfg.coverage
 
-        while temperature > absoluteTemperature:
-            sensor = random.choice(self.sensors)
-            tempSensorPriority = sensor.priority
+        sensor = random.choice(self.sensors)
+        tempSensorPriority = sensor.priority
+        tempTotalPriority = totalPriority
 
-            moveX = int(round(3 * temperature * radius * random.uniform(-1.0, 1.0)))
-            moveY = int(round(3 * temperature * radius * random.uniform(-1.0, 1.0)))
+        moveX = int(round(3 * temperature * radius * random.uniform(-1.0, 1.0)))
+        moveY = int(round(3 * temperature * radius * random.uniform(-1.0, 1.0)))
 
-            log_message = "SensorOld" + " " + str(sensor.sensorId) + " " + \
-                          str(sensor.xPos) + " " + str(sensor.yPos) + " " + str(sensor.priority)
-            # remove sensor
-            self.uncover(sensor.xPos, sensor.yPos, sensor.sensorId)
+        oldPos = sensor.xPos, sensor.yPos
 
-            # find connected sensors
-            connectedSensors = self.find_connected_sensors(sensor.xPos, sensor.yPos, self.sensors[(sensor.sensorId+1):])
+        # remove sensor
+        coverage.begin_journal()
+        self.uncover(sensor.xPos, sensor.yPos, sensor.sensorId)
 
-            sensor.xPos += moveX
-            sensor.yPos += moveY
+        # find connected sensors
+        connectedSensors = self.find_neighbour_sensors(sensor.xPos, sensor.yPos, sensor.sensorId)
 
-            newConnected = self.find_connected_sensors(sensor.xPos, sensor.yPos, self.sensors[(sensor.sensorId+1):])
-            # connection
-            for sc in sensor.connected:
-                sc.connected.remove(sensor)
-            sensor.connected = []
-            newConnection = self.find_connected_sensors(sensor.xPos, sensor.yPos, self.sensors)
-            for unconnected in newConnection:
-                sensor.connected.append(unconnected)
-                unconnected.connected.append(sensor)
+        self.move_sensor(sensor, sensor.xPos + moveX, sensor.yPos + moveY)
 
-            for conSensor in newConnected:
-                if conSensor not in connectedSensors:
-                    connectedSensors.append(conSensor)
+        newConnected = self.find_neighbour_sensors(sensor.xPos, sensor.yPos, sensor.sensorId)
+        # connection
+        self.update_connections(sensor)
 
-            connectedSensors = sorted(connectedSensors, key=lambda s: s.sensorId)
+        for conSensor in newConnected:
+            if conSensor not in connectedSensors:
+                connectedSensors.append(conSensor)
 
-            # add sensor and calculate priority
-            sensor.priority, c = self.cover_and_priority(sensor.xPos, sensor.yPos, sensor.sensorId)
+        connectedSensors = sorted(connectedSensors, key=lambda s: s.sensorId)
 
-            # update priority for connected sensors
-            tempConnectedPriorities = []
-            for conSensor in connectedSensors:
-                tempConnectedPriorities.append(conSensor.priority)
-                conSensor.priority, c = self.cover_and_priority(conSensor.xPos, conSensor.yPos, conSensor.sensorId)
+        # add sensor and calculate priority
+        sensor.priority, c = self.cover_and_priority(sensor.xPos, sensor.yPos, sensor.sensorId)
+        totalPriority += sensor.priority - tempSensorPriority
 
-            newPriority = sum([s.priority for s in self.sensors]) / float(self.calc_connected_component())
+        # update priority for connected sensors
+        tempConnectedPriorities = []
+        for conSensor in connectedSensors:
+            tempConnectedPriorities.append(conSensor.priority)
+            conSensor.priority, c = self.cover_and_priority(conSensor.xPos, conSensor.yPos, conSensor.sensorId)
+            totalPriority += conSensor.priority - tempConnectedPriorities[-1]
 
-            delta = newPriority - maxPriority
+        newPriority = totalPriority / float(self.calc_connected_component())
 
-            if delta >= 0 or (math.exp(float(delta)*15 / temperature) > random.random()):
-                maxPriority = newPriority
-            else:
-                self.uncover(sensor.xPos, sensor.yPos, sensor.sensorId)
-                sensor.xPos -= moveX
-                sensor.yPos -= moveY
-                sensor.priority = tempSensorPriority
+        delta = newPriority - maxPriority
 
-                self.cover(sensor.xPos, sensor.yPos, sensor.sensorId)
+        accepted = delta >= 0 or (math.exp(float(delta)*15 / temperature) > random.random())
 
-                for i, conSensor in enumerate(connectedSensors):
-                    conSensor.priority = tempConnectedPriorities[i]
+        if instrument.enabled:
+            instrument.count("sa.steps")
+            instrument.count("sa.accepted", int(accepted))
 
-                    self.cover(conSensor.xPos, conSensor.yPos, conSensor.sensorId)
+        if accepted:
+            maxPriority = newPriority
+            coverage.commit_journal()
+        else:
+            coverage.rollback_journal()
 
-            temperature *= coolingRate
-            iterCnt += 1
+            self.move_sensor(sensor, sensor.xPos - moveX, sensor.yPos - moveY)
+            self.update_connections(sensor)
+            sensor.priority = tempSensorPriority
+
+            for i, conSensor in enumerate(connectedSensors):
+                conSensor.priority = tempConnectedPriorities[i]
+
+            totalPriority = tempTotalPriority
+
+        event = None
+
+        if self.has_observers():
+            event = SensorEvent("move", sensor.sensorId, (sensor.xPos, sensor.yPos), sensor.priority, oldPos,
+                                sensor.priority - tempSensorPriority, accepted)
+
+        return totalPriority, maxPriority, event
+
+    @instrument.timed("deployment.parallel_simulated_annealing")
+    def parallel_simulated_annealing(self):
+        """
+        simulated annealing with multiple chains in a process pool (independent or replica exchange)
+        chain count, exchange interval, temperature ladder and seeds are read from Config
+
+        :return
+            best deployment of the chains and its objective value
+        """
+
+        print "-> Parallel Simulated Annealing Optimization"
 
-            log_message += "\nSensorNew" + " " + str(sensor.sensorId) + " " + \
-                           str(sensor.xPos) + " " + str(sensor.yPos) + " " + str(sensor.priority)
+        result, positions, iterCnt = parallel_annealing.run_chains(self.export_context(), self.deployment_positions(),
+                                                                   self.cfg)
+        self.load_deployment(positions)
+        self.find_connected_component()
 
-            log_message += "\nMaxPriority" + " " + str(maxPriority) + " " + "Temperature" + "" + str(temperature)
+        for sensor in self.sensors:
+            self.notify_sensor(sensor)
 
-            self.notify(log_message)
+        self.iterationCnt = iterCnt
+        self.notify_result("SA", result)
 
         print "iteration:", iterCnt
-        print "Priority:", maxPriority,
+        print "Priority:", result,
 
-        return maxPriority
+        return result
+
+    def deployment_positions(self):
+        """
+        :return
+            (sensorId, xPos, yPos) list of the deployed sensors
+        """
+
+        return [(s.sensorId, s.xPos, s.yPos) for s in self.sensors]
+
+    def load_deployment(self, positions):
+        """
+        deploying sensors to the given locations in sensor id order
+
+        :param
+            positions (list) - (sensorId, xPos, yPos) list
+        """
+
+        self.clear_deployment()
+
+        for sensorId, xPos, yPos in sorted(positions):
+            sensor = Sensor(sensorId, xPos, yPos)
+            sensor.priority, c = self.cover_and_priority(sensor.xPos, sensor.yPos, sensor.sensorId)
+
+            self.add_sensor(sensor)
 
     def find_connected_component(self):
-        edgeSqr = self.cfg.gridEdge ** 2
+        """
+        finding connected sensors of each sensor with sensor index (sensor index is rebuilt from sensors list)
+        and building connected components
+        """
+
+        self.sensorIndex.rebuild(self.sensors)
 
-        for i in range(len(self.sensors)-1):
-            for j in range(i+1, len(self.sensors)):
-                dist = (self.sensors[i].xPos - self.sensors[j].xPos) ** 2 + (self.sensors[i].yPos - self.sensors[j].yPos) ** 2
+        for sensor in self.sensors:
+            for s in self.find_neighbour_sensors(sensor.xPos, sensor.yPos):
+                if s is not sensor:
+                    sensor.connected.append(s)
 
-                if dist <= edgeSqr:
-                    self.sensors[i].connected.append(self.sensors[j])
-                    self.sensors[j].connected.append(self.sensors[i])
+        self.components.build(self.sensors, lambda sensor: sensor.connected)
+
+    def update_connections(self, sensor):
+        """
+        updating connected sensors and connected components after sensor is moved
+        """
+
+        for sc in sensor.connected:
+            sc.connected.remove(sensor)
+        sensor.connected = []
+
+        for s in self.find_neighbour_sensors(sensor.xPos, sensor.yPos):
+            if s is not sensor:
+                sensor.connected.append(s)
+                s.connected.append(sensor)
+
+        self.components.move(sensor, sensor.connected)
 
     def calc_connected_component(self):
+        """
+        finding number of connected components (without copying sensors)
+
+        if validateConnectivity is set in Config, result is checked with calc_connected_component_bfs
+        """
+
+        componentCount = self.components.count()
+
+        if self.cfg.validateConnectivity:
+            bfsCount = self.calc_connected_component_bfs()
+
+            if componentCount != bfsCount:
+                raise ValueError("Connected component count mismatch: " + str(componentCount) + " != " + str(bfsCount))
+
+        return componentCount
+
+    def calc_connected_component_bfs(self):
+        """
+        finding number of connected components with breadth first search on copied sensors (slow, for validation)
+        """
+
         unchecked = copy.deepcopy(self.sensors)
         componentCount = 0
 
@@ -727,22 +1139,13 @@ class SensorArea(Subject):
 
         return componentCount
 
+    @instrument.timed("deployment.genetic_algorithms")
     def genetic_algorithms(self):
         print "\n-> Genetic Algorithm Deployment"
 
         self.clear_deployment()
 
-        fakeSensors = []
-
-        for grid in self.grids:
-            sensor = Sensor(grid.gridId, grid.xPos, grid.yPos)
-            sensor.priority, c = self.calc_priority(sensor.xPos, sensor.yPos)
-
-            fakeSensors.append(sensor)
-
-        intersectionSensors = self.get_intersection_sensors()
-
-        fakeSensors += intersectionSensors
+        fakeSensors = self.get_fake_sensors()
 
         # fakeSensors = filter(lambda s: s.priority != 0, fakeSensors)
         # fakeSensors = sorted(fakeSensors, key=lambda s: s.priority)
@@ -763,32 +1166,21 @@ class SensorArea(Subject):
         toolbox.register("individual", tools.initIterate, creator.Individual, toolbox.indices)
         toolbox.register("population", tools.initRepeat, list, toolbox.individual)
 
-        def evalSD(individual):
-            sensors = []
-
-            for i, j in enumerate(individual):
-                sensor = Sensor(i, fakeSensors[j].xPos, fakeSensors[j].yPos)
-                sensor.priority, c = self.cover_and_priority(sensor.xPos, sensor.yPos, sensor.sensorId)
-
-                # connectedSensors = self.find_connected_sensors(sensor.xPos, sensor.yPos, sensors)
-                # for s in connectedSensors:
-                #   s.priority, c = self.calc_priority(s.xPos, s.yPos)
-
-                sensors.append(sensor)
-
-            totalPriority = sum([sensor.priority for sensor in sensors])
-            # print individual
-            # print totalPriority
-
-            self.cfg.clear_coverage()
-            return totalPriority,
-
         toolbox.register("mate", tools.cxTwoPoint)
         toolbox.register("mutate", tools.mutShuffleIndexes, indpb=0.05)
         toolbox.register("select", tools.selTournament, tournsize=3)
-        toolbox.register("evaluate", evalSD)
 
-        pop = toolbox.population(n=sensorCnt)
+        # fitness evaluation is done with private coverage matrices of the worker processes
+        candidateLocations = fakeSensors.positions()
+        fitnessCache = FitnessCache(self.cfg.gaCacheSize) if self.cfg.gaCacheSize > 0 else None
+        evaluator = parallel_evaluation.Evaluator(self.export_context(), candidateLocations, self.cfg.gaProcessCnt,
+                                                  fitnessCache, self.cfg.gaDropDuplicates)
+
+        toolbox.register("evaluate", parallel_evaluation.evaluate)
+        toolbox.register("map", evaluator.map)
+
+        pop = toolbox.population(n=self.cfg.gaPopulationSize)
+        generationCnt = 40
 
         hof = tools.HallOfFame(1)
         stats = tools.Statistics(lambda ind: ind.fitness.values)
@@ -797,30 +1189,72 @@ class SensorArea(Subject):
         stats.register("min", numpy.min)
         stats.register("max", numpy.max)
 
-        algorithms.eaSimple(pop, toolbox, 0.7, 0.2, 40, stats=stats,
-                            halloffame=hof)
+        try:
+            algorithms.eaSimple(pop, toolbox, 0.7, 0.2, generationCnt, stats=stats,
+                                halloffame=hof)
+            evaluator.close()
+        except:
+            evaluator.terminate()
+            raise
         # return pop, stats, hof
 
+        if fitnessCache is not None:
+            print "Fitness cache hits:", fitnessCache.hitCnt, "misses:", fitnessCache.missCnt
+
         print hof[0]
         for i, best in enumerate(hof[0]):
             sensor = Sensor(i, fakeSensors[best].xPos, fakeSensors[best].yPos)
             sensor.priority, c = self.cover_and_priority(sensor.xPos, sensor.yPos, sensor.sensorId)
-            self.sensors.append(sensor)
+            self.add_sensor(sensor)
 
             # connectedSensors = self.find_connected_sensors(sensor.xPos, sensor.yPos, fakeSensors)
             # for s in connectedSensors:
             #     s.priority, c = self.calc_priority(s.xPos, s.yPos)
 
 
-            log_message = "Sensor" + " " + str(sensor.sensorId) + " " + \
-                          str(sensor.xPos) + " " + str(sensor.yPos) + " " + str(sensor.priority)
-            self.notify(log_message)
+            self.notify_sensor(sensor)
 
 
         result = sum([sensor.priority for sensor in self.sensors])
+        self.iterationCnt = generationCnt
 
-        log_message = "PQ:" + " " + str(result)
-        self.notify(log_message)
+        self.notify_result("GA", result)
         print "Priority: " + str(result),
 
-        return result
\ No newline at end of file
+        return result
+
+
+def create_sensor_area(context):
+    """
+    creating sensor area (with its own Config and coverage matrix) from exported context
+
+    :param
+        context (dict) - exported with SensorArea.export_context
+
+    :return
+        sensor area without observers
+    """
+
+    cfg = Config(context["width"], context["height"], context["radius"], sensorCnt=context["sensorCnt"],
+                 clusterCnt=context["clusterCnt"], coverageEngine=context["coverageEngine"],
+                 tileSize=context["tileSize"], tileMemoryBudget=context["tileMemoryBudget"], tileDir=context["tileDir"])
+
+    cfg.clusterPriorities = list(context["clusterPriorities"])
+    cfg.clusteringMethod = context["clusteringMethod"]
+    cfg.clusterLookup = context["clusterLookup"]
+
+    sa = SensorArea(cfg)
+
+    if context.get("pixelFile") is not None:
+        path, shape = context["pixelFile"]
+        pixels = numpy.load(path, mmap_mode="r")
+
+        if pixels.shape != shape:
+            raise ValueError("Image array file is different from exported image: " + path)
+
+        sa.set_pixel_array(pixels)
+
+    elif context["pixels"] is not None:
+        sa.set_pixel_array(context["pixels"])
+
+    return sa
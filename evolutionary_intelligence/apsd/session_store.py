@@ -0,0 +1,254 @@
+"""
+bounded store for the web client states
+
+each client state keeps a controller with its image, coverage matrix and grids, so the store evicts sessions
+which are not used for ttl seconds and least recently used sessions when the session count or the estimated memory
+of the sessions is over the limits
+
+store is used by the threads of the wsgi daemon, all operations are done with a lock
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy
+
+
+def estimate_size(value):
+    """
+    estimated memory size of an array or nested list (nested lists are estimated from their first items)
+
+    :return
+        size (int) - bytes (0 for memory-mapped arrays which are kept on disk)
+    """
+
+    if value is None or isinstance(value, numpy.memmap):
+        return 0
+
+    if isinstance(value, numpy.ndarray):
+        return value.nbytes
+
+    if isinstance(value, (list, tuple)):
+        if len(value) == 0:
+            return sys.getsizeof(value)
+
+        return sys.getsizeof(value) + len(value) * estimate_size(value[0])
+
+    return sys.getsizeof(value)
+
+
+class Session:
+    """
+    :param
+        state           - stored client state
+        size (int)      - estimated memory size of the state in bytes
+        createTime (float), accessTime (float) - creation and last access times
+    """
+
+    def __init__(self, state, size):
+        self.state = state
+        self.size = size
+        self.createTime = self.accessTime = time.time()
+
+
+class SessionStore:
+    """
+    LRU session store with TTL eviction and memory budget
+
+    :param
+        maxSessions (int)   - maximum session count
+        ttl (float)         - seconds after the last access until the session is evicted (None: no expiry)
+        memoryBudget (int)  - maximum estimated bytes of all sessions (None: no limit)
+        sizeFunc (function) - estimated size of a state (default: state.estimate_size())
+        onEvict (function)  - called with (clientId, state, reason) for evicted sessions ("ttl", "lru", "memory")
+
+        sessions (OrderedDict) - sessions by client id from the least recently used one
+        totalSize (int)        - estimated bytes of all sessions
+    """
+
+    def __init__(self, maxSessions=100, ttl=1800, memoryBudget=2 ** 30, sizeFunc=None, onEvict=None):
+        if maxSessions < 1 or (ttl is not None and ttl <= 0) or (memoryBudget is not None and memoryBudget <= 0):
+            raise ValueError("Invalid range for session store limits")
+
+        self.maxSessions = maxSessions
+        self.ttl = ttl
+        self.memoryBudget = memoryBudget
+        self.sizeFunc = sizeFunc or (lambda state: state.estimate_size())
+        self.onEvict = onEvict
+
+        self.sessions = OrderedDict()
+        self.totalSize = 0
+        self.lock = threading.Lock()
+
+        self.hitCnt = 0
+        self.missCnt = 0
+        self.evictionCnts = {"ttl": 0, "lru": 0, "memory": 0}
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def __contains__(self, clientId):
+        with self.lock:
+            session = self.sessions.get(clientId)
+            return session is not None and not self.is_expired(session, time.time())
+
+    def is_expired(self, session, now):
+        return self.ttl is not None and now - session.accessTime > self.ttl
+
+    def put(self, clientId, state):
+        """
+        adding (or replacing) the client state, expired and least recently used sessions are evicted for it
+        (new session is kept even if it is bigger than the memory budget)
+        """
+
+        size = self.sizeFunc(state)
+
+        with self.lock:
+            old = self.sessions.pop(clientId, None)
+
+            if old is not None:
+                self.totalSize -= old.size
+
+            self.sessions[clientId] = Session(state, size)
+            self.totalSize += size
+
+            evicted = self.evict(time.time())
+
+        self.notify_evicted(evicted)
+
+    def get(self, clientId):
+        """
+        :return
+            state of the client (None if it is not found or it is expired)
+        """
+
+        with self.lock:
+            now = time.time()
+            evicted = self.evict(now)
+
+            session = self.sessions.pop(clientId, None)
+
+            if session is None:
+                self.missCnt += 1
+                state = None
+            else:
+                # moving to the most recently used end
+                session.accessTime = now
+                self.sessions[clientId] = session
+                self.hitCnt += 1
+                state = session.state
+
+        self.notify_evicted(evicted)
+
+        return state
+
+    def update_size(self, clientId):
+        """
+        estimating size of the state again (after the state grows, e.g. deployment or drawing)
+        """
+
+        with self.lock:
+            session = self.sessions.get(clientId)
+
+            if session is None:
+                return
+
+            size = self.sizeFunc(session.state)
+            self.totalSize += size - session.size
+            session.size = size
+
+            evicted = self.evict(time.time())
+
+        self.notify_evicted(evicted)
+
+    def remove(self, clientId):
+        """
+        removing the session (it is not an eviction, so onEvict is not called)
+
+        :return
+            state of the client (None if it is not found)
+        """
+
+        with self.lock:
+            session = self.sessions.pop(clientId, None)
+
+            if session is None:
+                return None
+
+            self.totalSize -= session.size
+
+            return session.state
+
+    def clear(self):
+        """
+        :return
+            (clientId, state) list of the removed sessions
+        """
+
+        with self.lock:
+            removed = [(clientId, session.state) for clientId, session in self.sessions.iteritems()]
+
+            self.sessions.clear()
+            self.totalSize = 0
+
+        return removed
+
+    def evict_expired(self):
+        with self.lock:
+            evicted = self.evict(time.time())
+
+        self.notify_evicted(evicted)
+
+    def evict(self, now):
+        """
+        evicting expired sessions, then least recently used ones until the limits are met
+        (lock is held by the caller, newest session is not evicted)
+
+        :return
+            evicted (list) - (clientId, state, reason) of the evicted sessions
+        """
+
+        evicted = []
+
+        while self.sessions:
+            clientId, session = next(self.sessions.iteritems())
+            hasOthers = len(self.sessions) > 1
+
+            if self.is_expired(session, now):
+                reason = "ttl"
+            elif hasOthers and len(self.sessions) > self.maxSessions:
+                reason = "lru"
+            elif hasOthers and self.memoryBudget is not None and self.totalSize > self.memoryBudget:
+                reason = "memory"
+            else:
+                break
+
+            del self.sessions[clientId]
+            self.totalSize -= session.size
+            self.evictionCnts[reason] += 1
+
+            evicted.append((clientId, session.state, reason))
+
+        return evicted
+
+    def notify_evicted(self, evicted):
+        # callbacks are called without the lock (they can use the store)
+        if self.onEvict is not None:
+            for clientId, state, reason in evicted:
+                self.onEvict(clientId, state, reason)
+
+    def metrics(self):
+        """
+        :return
+            metrics (dict) - session count, estimated bytes, limits, hit, miss and eviction counts
+        """
+
+        with self.lock:
+            now = time.time()
+            oldest = min([session.accessTime for session in self.sessions.itervalues()] or [now])
+
+            return {"sessionCnt": len(self.sessions), "bytes": self.totalSize, "maxSessions": self.maxSessions,
+                    "memoryBudget": self.memoryBudget, "ttl": self.ttl, "hits": self.hitCnt, "misses": self.missCnt,
+                    "evictions": dict(self.evictionCnts), "oldestAccessAge": now - oldest}
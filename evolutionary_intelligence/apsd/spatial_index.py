@@ -0,0 +1,103 @@
+class SpatialIndex():
+    """
+    uniform grid (spatial hash) index for finding items around a location
+
+    :param
+        cellSize (int)   - edge length of the cells (grid edge for sensors), query radius can not be bigger than it
+        cells (dict)     - items in each cell, key is (column, row)
+        positions (dict) - location of each item
+    """
+
+    def __init__(self, cellSize):
+        self.cellSize = cellSize
+        self.cells = {}
+        self.positions = {}
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __contains__(self, item):
+        return item in self.positions
+
+    def cell(self, xPos, yPos):
+        """
+        finding cell (column, row) of the location
+        """
+
+        return int(xPos // self.cellSize), int(yPos // self.cellSize)
+
+    def insert(self, item, xPos, yPos):
+        """
+        adding item to the index (or moving it if it is already in the index)
+        """
+
+        self.remove(item)
+
+        self.positions[item] = (xPos, yPos)
+        self.cells.setdefault(self.cell(xPos, yPos), []).append(item)
+
+    def move(self, item, xPos, yPos):
+        """
+        updating location of the item
+        """
+
+        self.insert(item, xPos, yPos)
+
+    def remove(self, item):
+        """
+        removing item from the index
+        """
+
+        position = self.positions.pop(item, None)
+
+        if position is not None:
+            cell = self.cell(position[0], position[1])
+            items = self.cells[cell]
+            items.remove(item)
+
+            if not items:
+                del self.cells[cell]
+
+    def clear(self):
+        self.cells = {}
+        self.positions = {}
+
+    def rebuild(self, sensors):
+        """
+        building index again from sensors list (items which have xPos and yPos)
+        """
+
+        self.clear()
+
+        for sensor in sensors:
+            self.insert(sensor, sensor.xPos, sensor.yPos)
+
+    def query(self, xPos, yPos, radius):
+        """
+        finding items in the radius of the location, only 3x3 neighbour cells are scanned
+
+        :param
+            xPos (int)   - x coordinate of the location
+            yPos (int)   - y coordinate of the location
+            radius (int) - search radius (smaller than or equal to cell size)
+
+        :return
+            items whose distance to the location is smaller than or equal to the radius
+        """
+
+        if radius > self.cellSize:
+            raise ValueError("Query radius is bigger than cell size")
+
+        column, row = self.cell(xPos, yPos)
+        radiusSqr = radius ** 2
+        found = []
+
+        for c in range(column - 1, column + 2):
+            for r in range(row - 1, row + 2):
+                for item in self.cells.get((c, r), ()):
+                    x, y = self.positions[item]
+
+                    if (xPos - x) ** 2 + (yPos - y) ** 2 <= radiusSqr:
+                        found.append(item)
+
+        return found
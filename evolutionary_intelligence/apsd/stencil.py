@@ -0,0 +1,92 @@
+"""
+precomputed disk stencils of the sensor areas
+
+a stencil is built once for each radius in the process and shared by every config and coverage engine,
+its arrays are read-only so they can not be changed by one of the users
+"""
+
+import numpy
+
+# stencils by radius (process-wide cache)
+stencils = {}
+
+
+def read_only(array):
+    array.flags.writeable = False
+
+    return array
+
+
+class Stencil:
+    """
+    covered coordinates of the sensor which has default location (xPos = 0, yPos = 0)
+
+    coverage matrices are indexed as [x][y], so a span is the covered y range of one x offset (one matrix column)
+
+    :param
+        radius (int)               - sensor radius length
+        mask (bool matrix)         - covered coordinates (2 * radius x 2 * radius, [x + radius, y + radius])
+        offsets (int matrix)       - (x, y) offsets of the covered coordinates (x major order)
+        pixelCnt (int)             - number of covered coordinates
+        xOffsets (int array)       - x offset of each span (-radius to radius - 1)
+        spanStart (int array)      - first covered y offset for each x offset
+        spanEnd (int array)        - last covered y offset + 1 for each x offset
+        spanCounts (int array)     - covered coordinate count for each x offset
+        spans (tuple)              - (x offset, span start, span end) tuples for python loops
+        squareOffsets (int matrix) - (x, y) offsets of the grid square (2 * radius x 2 * radius, x major order)
+        squareCnt (int)            - number of grid square coordinates
+    """
+
+    def __init__(self, radius):
+        if radius < 1:
+            raise ValueError("Invalid range for radius value")
+
+        self.radius = radius
+
+        values = numpy.arange(-radius, radius)
+        self.mask = read_only((values[:, None] ** 2 + values[None, :] ** 2) <= radius ** 2)
+
+        xIndexes, yIndexes = numpy.nonzero(self.mask)
+        self.offsets = read_only(numpy.column_stack((xIndexes, yIndexes)) - radius)
+        self.pixelCnt = len(self.offsets)
+
+        # each column of a disk has one covered range (y = 0 is always covered)
+        self.xOffsets = read_only(values)
+        self.spanStart = read_only(self.mask.argmax(axis=1) - radius)
+        self.spanEnd = read_only(self.mask.shape[1] - self.mask[:, ::-1].argmax(axis=1) - radius)
+        self.spanCounts = read_only(self.spanEnd - self.spanStart)
+        self.spans = tuple(zip(values.tolist(), self.spanStart.tolist(), self.spanEnd.tolist()))
+
+        xSquare, ySquare = numpy.meshgrid(values, values, indexing="ij")
+        self.squareOffsets = read_only(numpy.column_stack((xSquare.ravel(), ySquare.ravel())))
+        self.squareCnt = len(self.squareOffsets)
+
+    def clipped_spans(self, xPos, yPos, width, height):
+        """
+        spans of the sensor which are in the image
+
+        :return
+            (x, y start, y end) tuples in image coordinates
+        """
+
+        for dx, ys, ye in self.spans:
+            x = xPos + dx
+
+            if 0 <= x < width:
+                ys, ye = max(yPos + ys, 0), min(yPos + ye, height)
+
+                if ys < ye:
+                    yield x, ys, ye
+
+
+def get_stencil(radius):
+    """
+    stencil of the radius (it is built once and shared)
+    """
+
+    stencil = stencils.get(radius)
+
+    if stencil is None:
+        stencil = stencils.setdefault(radius, Stencil(radius))
+
+    return stencil
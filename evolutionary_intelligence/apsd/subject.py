@@ -4,22 +4,171 @@ Created on Jan 4, 2015
 @author: kalayci
 """
 
+import threading
+import time
+
+
+class SensorEvent:
+    """
+    structured notification of a deployed or moved sensor (observers can update only the changed sensor)
+
+    :param
+        kind (string)         - "deploy" or "move"
+        sensorId (int)        - sensor id
+        oldPos (tuple)        - (xPos, yPos) before the move (None for deploy)
+        newPos (tuple)        - (xPos, yPos) after the event (old position if the move is rejected)
+        priority (float)      - priority after the event
+        priorityDelta (float) - priority change of the sensor
+        accepted (bool)       - move is accepted (always True for deploy)
+    """
+
+    def __init__(self, kind, sensorId, newPos, priority, oldPos=None, priorityDelta=None, accepted=True):
+        self.kind = kind
+        self.sensorId = sensorId
+        self.oldPos = oldPos
+        self.newPos = newPos
+        self.priority = priority
+        self.priorityDelta = priority if priorityDelta is None else priorityDelta
+        self.accepted = accepted
+
+    def __str__(self):
+        new = "Sensor" + " " + str(self.sensorId) + " " + \
+              str(self.newPos[0]) + " " + str(self.newPos[1]) + " " + str(self.priority)
+
+        if self.oldPos is None:
+            return new
+
+        old = "SensorOld" + " " + str(self.sensorId) + " " + \
+              str(self.oldPos[0]) + " " + str(self.oldPos[1]) + " " + str(self.priority - self.priorityDelta)
+
+        return old + "\n" + new.replace("Sensor", "SensorNew", 1)
+
+
+class ProgressEvent:
+    """
+    structured notification of the deployment progress
+
+    :param
+        name (string)       - method or value name (e.g. "PQ", "MaxPriority")
+        value (float)       - objective value
+        iteration (int)     - iteration number (None if it is the result)
+        temperature (float) - simulated annealing temperature (None for other methods)
+    """
+
+    def __init__(self, name, value, iteration=None, temperature=None):
+        self.name = name
+        self.value = value
+        self.iteration = iteration
+        self.temperature = temperature
+
+    def __str__(self):
+        if self.temperature is not None:
+            return self.name + " " + str(self.value) + " " + "Temperature" + " " + str(self.temperature)
+
+        return self.name + ":" + " " + str(self.value)
+
+
+class EventBatch(list):
+    """
+    coalesced notifications which are delivered together (string is one message for each line)
+    """
+
+    def __str__(self):
+        return "\n".join(str(message) for message in self)
+
 
 class Subject:
+    """
+    observable object
+
+    messages are delivered immediately by default, if a notification rate is set they are coalesced into
+    EventBatch lists and delivered at most rate times in a second (remaining messages are delivered with flush)
+    messages are not built when there is no observer (callable messages are called only before delivery)
+
+    :param
+        _observers (list)         - observers which have update(subject, message) method
+        _maxRate (float)          - maximum deliveries in a second (None: immediate delivery without batching)
+        _pending (list)           - (message, modifier) list which is waiting for delivery
+        _lastDelivery (float)     - time of the last delivery
+        _lock (Lock)              - lock for observers and pending messages
+    """
+
     def __init__(self):
         self._observers = []
+        self._maxRate = None
+        self._pending = []
+        self._lastDelivery = 0.0
+        self._lock = threading.Lock()
 
     def attach(self, observer):
-        if observer not in self._observers:
-            self._observers.append(observer)
+        with self._lock:
+            if observer not in self._observers:
+                self._observers.append(observer)
 
     def detach(self, observer):
-        try:
-            self._observers.remove(observer)
-        except ValueError:
-            pass
+        with self._lock:
+            try:
+                self._observers.remove(observer)
+            except ValueError:
+                pass
+
+    def has_observers(self):
+        return bool(self._observers)
+
+    def set_notification_rate(self, maxRate=None):
+        """
+        setting maximum delivery count in a second (None: immediate delivery)
+        """
+
+        if maxRate is not None and maxRate <= 0:
+            raise ValueError("Invalid range for notification rate value")
+
+        self.flush()
+        self._maxRate = maxRate
 
     def notify(self, message=None, modifier=None):
-        for observer in self._observers:
-            if modifier != observer:
-                observer.update(self, message)
\ No newline at end of file
+        """
+        notifying observers (except modifier) with message
+
+        :param
+            message  - string, SensorEvent, ProgressEvent or a callable which creates the message
+            modifier - observer which will not be notified
+        """
+
+        if not self._observers:
+            return
+
+        if callable(message):
+            message = message()
+
+        if self._maxRate is None:
+            for observer in list(self._observers):
+                if modifier != observer:
+                    observer.update(self, message)
+            return
+
+        with self._lock:
+            self._pending.append((message, modifier))
+            due = time.time() - self._lastDelivery >= 1.0 / self._maxRate
+
+        if due:
+            self.flush()
+
+    def flush(self):
+        """
+        delivering pending messages as one batch to each observer
+        """
+
+        with self._lock:
+            pending, self._pending = self._pending, []
+            observers = list(self._observers)
+            self._lastDelivery = time.time()
+
+        if not pending:
+            return
+
+        for observer in observers:
+            batch = EventBatch(message for message, modifier in pending if modifier != observer)
+
+            if batch:
+                observer.update(self, batch)
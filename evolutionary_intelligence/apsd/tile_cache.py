@@ -0,0 +1,238 @@
+"""
+on-disk cache for the static maps
+
+maps are keyed by the hash of their request parameters (center, zoom, size, format, maptype, markers),
+files are written atomically and the least recently used files are removed when the cache is bigger than its
+byte limit
+
+concurrent requests of the same map are fetched once: first thread fetches the map with the backend,
+other threads wait for it and use its result
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+
+class PendingFetch:
+    """
+    map which is being fetched by a thread
+
+    :param
+        done (Event) - set when the fetch is finished
+        data         - map data (None if the fetch is failed)
+        error        - exception of the failed fetch
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.data = None
+        self.error = None
+
+
+class TileCache:
+    """
+    :param
+        cacheDir (string)  - directory of the map files
+        maxBytes (int)     - maximum total size of the map files
+        backend            - fetch backend which has fetch(params) method (map_handler.HttpBackend, DirectoryBackend)
+        waitTimeout (float) - seconds to wait for the same map which is fetched by another thread
+
+        pending (dict)     - PendingFetch by key
+        totalBytes (int)   - total size of the map files
+    """
+
+    def __init__(self, cacheDir, maxBytes=128 * 2 ** 20, backend=None, waitTimeout=60.0):
+        if maxBytes <= 0:
+            raise ValueError("Invalid range for tile cache size value")
+
+        if backend is None:
+            from map_handler import HttpBackend
+            backend = HttpBackend()
+
+        self.cacheDir = cacheDir
+        self.maxBytes = maxBytes
+        self.backend = backend
+        self.waitTimeout = waitTimeout
+
+        self.pending = {}
+        self.lock = threading.Lock()
+
+        self.hitCnt = 0
+        self.missCnt = 0
+        self.sharedCnt = 0
+        self.evictionCnt = 0
+
+        if not os.path.isdir(cacheDir):
+            os.makedirs(cacheDir)
+
+        self.totalBytes = sum(size for mtime, size, path in self.cache_files())
+
+    def key(self, params):
+        return hashlib.sha1(json.dumps(params, sort_keys=True)).hexdigest()
+
+    def file_path(self, key, params):
+        return os.path.join(self.cacheDir, key + "." + params["format"])
+
+    def get(self, params):
+        """
+        :param
+            params (dict) - map request parameters (map_handler.map_params)
+
+        :return
+            map data (string) from the cache, from the other thread or from the backend
+        """
+
+        key = self.key(params)
+        path = self.file_path(key, params)
+
+        data = self.read_file(path)
+
+        if data is not None:
+            with self.lock:
+                self.hitCnt += 1
+
+            return data
+
+        with self.lock:
+            fetch = self.pending.get(key)
+            owner = fetch is None
+
+            if owner:
+                fetch = self.pending[key] = PendingFetch()
+            else:
+                self.sharedCnt += 1
+
+        if not owner:
+            if not fetch.done.wait(self.waitTimeout):
+                raise IOError("Map fetch is timed out")
+
+            if fetch.error is not None:
+                raise fetch.error
+
+            return fetch.data
+
+        try:
+            # map can be written after the first read
+            data = self.read_file(path)
+
+            if data is None:
+                data = self.backend.fetch(params)
+
+                with self.lock:
+                    self.missCnt += 1
+
+                self.write_file(path, data)
+                self.trim()
+            else:
+                with self.lock:
+                    self.hitCnt += 1
+
+            fetch.data = data
+
+            return data
+
+        except Exception as e:
+            fetch.error = e
+            raise
+
+        finally:
+            with self.lock:
+                del self.pending[key]
+
+            fetch.done.set()
+
+    def read_file(self, path):
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+
+            # access time of the file is the order of the eviction
+            os.utime(path, None)
+
+        except (IOError, OSError):
+            return None
+
+        return data
+
+    def write_file(self, path, data):
+        """
+        writing map to a temporary file and renaming it (readers never see a half written file)
+        size of the replaced file is not counted again
+        """
+
+        fileNo, tempName = tempfile.mkstemp(prefix=".map_", dir=self.cacheDir)
+
+        try:
+            with os.fdopen(fileNo, "wb") as f:
+                f.write(data)
+
+            with self.lock:
+                try:
+                    oldSize = os.path.getsize(path)
+                except OSError:
+                    oldSize = 0
+
+                os.rename(tempName, path)
+                self.totalBytes += len(data) - oldSize
+        except:
+            os.remove(tempName)
+            raise
+
+    def cache_files(self):
+        """
+        :return
+            (modification time, size, path) of the map files from the least recently used one
+        """
+
+        files = []
+
+        for name in os.listdir(self.cacheDir):
+            if name.startswith("."):
+                continue
+
+            path = os.path.join(self.cacheDir, name)
+
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+
+            files.append((stat.st_mtime, stat.st_size, path))
+
+        return sorted(files)
+
+    def trim(self):
+        """
+        removing least recently used map files until they fit in the byte limit (newest map is kept)
+        """
+
+        if self.totalBytes <= self.maxBytes:
+            return
+
+        files = self.cache_files()
+        totalBytes = sum(size for mtime, size, path in files)
+
+        for mtime, size, path in files[:-1]:
+            if totalBytes <= self.maxBytes:
+                break
+
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            else:
+                with self.lock:
+                    self.evictionCnt += 1
+
+            totalBytes -= size
+
+        with self.lock:
+            self.totalBytes = totalBytes
+
+    def metrics(self):
+        with self.lock:
+            return {"hits": self.hitCnt, "misses": self.missCnt, "shared": self.sharedCnt,
+                    "evictions": self.evictionCnt, "bytes": self.totalBytes, "maxBytes": self.maxBytes}
@@ -1,40 +1,69 @@
 from urlparse import parse_qs
+from itertools import izip
+import os
 import uuid
-import json
 
 from app import Controller
 from client_state import ClientState
+from clustering.kmeans import KMeans
+from jobs import JobQueue, JobError
+from session_store import SessionStore
+from result_cache import ResultCache, make_key
+from tile_cache import TileCache
+from response_encoder import jsonType, binaryType, cellKind, sensorKind, stream_jsonp, stream_binary, pack_cells, \
+    pack_sensors
+import map_handler
 
 # url: http://yzgrafik.ege.edu.tr/wh
 # need action parameter
 
-clients = dict()
+# deployments run in worker processes (web threads only submit jobs and read their status)
+jobQueue = JobQueue(maxPending=20, maxPerClient=1)
+
+
+def evict_client(clientId, clientState, reason):
+    jobQueue.cancel_client(clientId)
+
+
+# APSD_CACHE_DIR is the directory of the clustering results and the maps (default: cache in the app directory)
+cacheDir = os.environ.get("APSD_CACHE_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")
+
+# clustering results of the same maps and parameters (k-means has a fixed seed, so results are reusable)
+kmeansSeed = 0
+resultCache = ResultCache(maxItems=32, cacheDir=os.path.join(cacheDir, "clustering"), diskBudget=256 * 2 ** 20)
+
+# maps are fetched once, APSD_MAP_DIR is a local map directory for offline runs (see map_handler)
+mapDir = os.environ.get("APSD_MAP_DIR")
+mapBackend = map_handler.DirectoryBackend(mapDir) if mapDir else map_handler.HttpBackend(timeout=10.0)
+tileCache = TileCache(os.path.join(cacheDir, "maps"), maxBytes=128 * 2 ** 20, backend=mapBackend)
+map_handler.set_tile_cache(tileCache)
+
+# client states which are not used for 30 minutes or which are over the limits are evicted (LRU)
+clients = SessionStore(maxSessions=50, ttl=1800, memoryBudget=2 ** 30, onEvict=evict_client)
 
 
 def application(environment, start_response):
     """
     web application
+
+    responses are streamed (iterable body), format parameter selects json (jsonp callback, default) or
+    binary output (cells of init and sensors of result, see response_encoder)
     """
 
     status = '200 OK'
-    responseHeaders = [('Content-type', 'application/json')]
     variables = parse_qs(environment['QUERY_STRING'])
     action = ""
+    handler = None
 
     if variables.get('action') is not None:
         action = variables.get('action')[0]
+        handler = actions.get(action)
 
-        if action == 'init':
-            start_response(status, responseHeaders)
-            return init(variables)
+    if handler is not None and output_format(variables) in outputFormats:
+        contentType, body = handler(variables)
 
-        elif action == 'priority':
-            start_response(status, responseHeaders)
-            return priority(variables)
-        
-        elif action == "exit":
-            start_response(status, responseHeaders)
-            return exit_clean(variables)
+        start_response(status, [('Content-type', contentType)])
+        return body
 
     else:
         responseHeaders = [('Content-type', 'text/html')]
@@ -43,6 +72,18 @@ def application(environment, start_response):
         return "<html><body><h1>Usage Error!</h1><p>%s</p></body></html>" % variables
 
 
+def output_format(variables):
+    return variables.get("format", ["json"])[0]
+
+
+def json_output(value):
+    return jsonType, stream_jsonp(value)
+
+
+def error_output(message):
+    return json_output({"error": message})
+
+
 def init(variables):
     # generate uuid
     clientId = uuid.uuid4()
@@ -61,57 +102,148 @@ def init(variables):
     clientState.controller.init_params(radius=radius)
 
     # load the image from google static maps
-    clientState.controller.search_location(location, zoom)
+    mapData = controller.fetch_map(location, zoom)
 
-    # execute the clustering using parameters
-    clientState.controller.run_kmeans(clusterCnt)
+    cfg = controller.cfg
+    key = make_key(mapData, width=cfg.width, height=cfg.height, crop=cfg.gMapCrop, radius=radius,
+                   clusterCnt=clusterCnt, clustering="kmeans", seed=kmeansSeed)
+    clustering = resultCache.get(key)
 
-    # generate JSON for the results
-    cellsJs = []
-    for grid in clientState.controller.sa.grids:
-        cellsJs.append({"cellId": grid.gridId, "clusterId": int(grid.clusterNum)})
-        clientState.clusters.append(grid.clusterNum)
+    if clustering is None:
+        controller.load_image(mapData, cfg.gMapCrop)
 
-    outputJs = [{"clientId": str(clientId), "cells": cellsJs}]
+        # execute the clustering using parameters
+        controller.run_kmeans(clusterCnt, seed=kmeansSeed)
+        resultCache.put(key, controller.sa.export_clustering())
+    else:
+        # same map and parameters are clustered before
+        controller.load_image(mapData, cfg.gMapCrop, gridFeatures=clustering["features"])
+        controller.restore_clustering(KMeans(kmeansSeed), clustering)
 
-    output = json.dumps({"clustering": outputJs})
+    grids = controller.sa.grids
+    gridIds, clusterNums = grids.column("gridId"), grids.column("clusterNum")
+    clientState.clusters = clusterNums.tolist()
 
     # save the client state to the dictionary
-    clients[str(clientId)] = clientState
+    clients.put(str(clientId), clientState)
+
+    if output_format(variables) == "binary":
+        return binaryType, stream_binary(cellKind, pack_cells(gridIds, clusterNums), clientId)
+
+    # cells are encoded while the response is sent
+    cellsJs = ({"cellId": int(gridId), "clusterId": int(clusterNum)}
+               for gridId, clusterNum in izip(gridIds, clusterNums))
+
+    outputJs = [{"clientId": str(clientId), "cells": cellsJs}]
 
     # return the JSON with clientId
-    return "callback(%s)" %output
+    return json_output({"clustering": outputJs})
 
 
 def priority(variables):
+    """
+    submitting deployment job (job id is returned at once, status and result actions give its progress and sensors)
+    """
 
     clusterPrio = variables.get("clusterPrio")[0].split(",")
     sensorCnt = int(variables.get("sensorCnt")[0])
     clientId = variables.get("clientId")[0]
-    
+
     clientState = clients.get(clientId)
 
+    if clientState is None:
+        return error_output("Client is not found: " + clientId)
+
+    if sensorCnt <= 0:
+        return error_output("Invalid range for sensor count value")
+
     for i, j in enumerate(clusterPrio):
         clientState.controller.set_priority(i, int(j))
 
-    clientState.controller.deploy_simulated_annealing(sensorCnt)
+    context = clientState.controller.sa.export_context()
+    context["sensorCnt"] = sensorCnt
 
-    sensorsJs = []
-    for s in clientState.controller.sa.sensors:
-        sensorsJs.append({"sensorId": s.sensorId, "priority": s.priority, "coordinates": [{"x": s.xPos, "y": s.yPos}]})
+    try:
+        job = jobQueue.submit(clientId, context)
+    except JobError as e:
+        return error_output(str(e))
 
-    outputJs = [{"sensors": sensorsJs}]
+    return json_output({"job": job.to_dict()})
 
-    output = json.dumps({"deployment": outputJs})
 
-    return "callback(%s)" %output
+def job_status(variables):
+    """
+    status and progress (stage, iteration, temperature, best objective) of the job
+    """
+
+    try:
+        job = jobQueue.get(variables.get("jobId")[0])
+    except JobError as e:
+        return error_output(str(e))
+
+    return json_output({"job": job.to_dict()})
+
+
+def job_result(variables):
+    """
+    deployed sensors of the finished job (json status of the job if it is not finished, also in binary format)
+    """
+
+    try:
+        job = jobQueue.get(variables.get("jobId")[0])
+    except JobError as e:
+        return error_output(str(e))
+
+    if job.status != "done":
+        return json_output({"job": job.to_dict()})
+
+    sensors = job.result["sensors"]
+
+    if output_format(variables) == "binary":
+        return binaryType, stream_binary(sensorKind, pack_sensors(sensors), job.jobId, job.result["objective"])
+
+    sensorsJs = ({"sensorId": s["sensorId"], "priority": s["priority"],
+                  "coordinates": [{"x": s["xPos"], "y": s["yPos"]}]} for s in sensors)
+
+    outputJs = [{"sensors": sensorsJs, "objective": job.result["objective"]}]
+
+    return json_output({"job": job.to_dict(), "deployment": outputJs})
+
+
+def job_cancel(variables):
+    try:
+        job = jobQueue.cancel(variables.get("jobId")[0])
+    except JobError as e:
+        return error_output(str(e))
+
+    return json_output({"job": job.to_dict()})
 
 
 def exit_clean(variables):
-    global clients
     clientId = variables.get("clientId")[0]
 
     if clientId is None or clientId == "":
-        clients = dict()
+        for clientId, clientState in clients.clear():
+            jobQueue.cancel_client(clientId)
+
+        return json_output({"exit": "all"})
     else:
-        del clients[clientId]
+        jobQueue.cancel_client(clientId)
+        clients.remove(clientId)
+
+        return json_output({"exit": clientId})
+
+
+def metrics(variables):
+    """
+    session count and estimated bytes of the client states, hits of the clustering result and map caches
+    """
+
+    return json_output({"sessions": clients.metrics(), "resultCache": resultCache.metrics(),
+                        "tileCache": tileCache.metrics()})
+
+
+outputFormats = {"json": jsonType, "binary": binaryType}
+
+actions = {"init": init, "priority": priority, "status": job_status, "result": job_result, "cancel": job_cancel,
+           "exit": exit_clean, "metrics": metrics}